@@ -0,0 +1,159 @@
+def _raw_fields(entity, fields):
+    """Read fields from an entity's raw JSON, skipping the Entity attribute conversions"""
+    raw = getattr(entity, '_raw', None)
+    if isinstance(raw, dict):
+        return tuple(raw.get(field) for field in fields)
+    return tuple(getattr(entity, field, None) for field in fields)
+
+def _format_timestamp(value):
+    """Format an API timestamp as 'YYYY-MM-DD HH:MM:SS' in its own offset"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        # '2024-01-02T15:30:00.123456789Z' -> '2024-01-02 15:30:00', without building a Timestamp
+        return value[:19].replace('T', ' ')
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+class PositionRecord:
+    """
+    One open position, parsed once and updated in place.
+
+    update() compares the raw API strings with the last ones seen and only
+    re-parses when they differ. The dict sent to the dashboard is built on
+    first use and reused until the position changes, so unchanged positions
+    cost no allocations between polls.
+    """
+    __slots__ = ('symbol', 'qty', 'side', 'avg_entry_price', 'current_price', 'unrealized_pl',
+                 'unrealized_plpc', '_raw', '_dict')
+
+    FIELDS = ('qty', 'avg_entry_price', 'current_price', 'unrealized_pl', 'unrealized_plpc')
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self._raw = None
+        self._dict = None
+
+    def update(self, position):
+        """
+        Refresh the record from a Position entity.
+
+        Args:
+            position: alpaca_trade_api Position for this record's symbol
+
+        Returns:
+            bool: True if any field changed
+        """
+        raw = _raw_fields(position, self.FIELDS)
+        if raw == self._raw:
+            return False
+        self._raw = raw
+        qty, avg_entry_price, current_price, unrealized_pl, unrealized_plpc = raw
+        self.qty = qty
+        self.side = 'buy' if float(qty) > 0 else 'sell'
+        self.avg_entry_price = float(avg_entry_price)
+        self.current_price = float(current_price)
+        self.unrealized_pl = float(unrealized_pl)
+        self.unrealized_plpc = float(unrealized_plpc) * 100
+        self._dict = None
+        return True
+
+    def to_dict(self):
+        """The dashboard row; shared between snapshots, so treat it as read-only"""
+        if self._dict is None:
+            self._dict = {
+                'symbol': self.symbol,
+                'qty': self.qty,
+                'side': self.side,
+                'avg_entry_price': self.avg_entry_price,
+                'current_price': self.current_price,
+                'unrealized_pl': self.unrealized_pl,
+                'unrealized_plpc': self.unrealized_plpc
+            }
+        return self._dict
+
+class OrderRecord:
+    """
+    One open order, parsed once and updated in place.
+
+    submitted_at is formatted from the raw string, so no pandas Timestamp is
+    built per order per poll.
+    """
+    __slots__ = ('id', 'symbol', 'qty', 'side', 'type', 'limit_price', 'submitted_at', '_raw', '_dict')
+
+    FIELDS = ('symbol', 'qty', 'side', 'type', 'limit_price', 'submitted_at')
+
+    def __init__(self, order_id):
+        self.id = order_id
+        self._raw = None
+        self._dict = None
+
+    def update(self, order):
+        """
+        Refresh the record from an Order entity.
+
+        Args:
+            order: alpaca_trade_api Order with this record's id
+
+        Returns:
+            bool: True if any field changed
+        """
+        raw = _raw_fields(order, self.FIELDS)
+        if raw == self._raw:
+            return False
+        self._raw = raw
+        self.symbol, self.qty, self.side, self.type, limit_price, submitted_at = raw
+        self.limit_price = float(limit_price) if limit_price else None
+        self.submitted_at = _format_timestamp(submitted_at)
+        self._dict = None
+        return True
+
+    def to_dict(self):
+        """The dashboard row; shared between snapshots, so treat it as read-only"""
+        if self._dict is None:
+            self._dict = {
+                'id': self.id,
+                'symbol': self.symbol,
+                'qty': self.qty,
+                'side': self.side,
+                'type': self.type,
+                'limit_price': self.limit_price,
+                'submitted_at': self.submitted_at
+            }
+        return self._dict
+
+class RecordSet:
+    """
+    Records for one snapshot collection, keyed like the snapshot rows.
+
+    Usage:
+        positions = RecordSet(PositionRecord, 'symbol')
+        rows = positions.update(api.list_positions())
+    """
+    def __init__(self, record_type, key):
+        self.record_type = record_type
+        self.key = key
+        self.records = {}
+
+    def update(self, entities):
+        """
+        Bring the records in line with a fresh API response.
+
+        Records are updated in place, created for new keys and dropped for keys
+        the response no longer has.
+
+        Args:
+            entities: Position or Order entities, or None for an empty collection
+
+        Returns:
+            list: Row dicts in response order
+        """
+        records = {}
+        for entity in entities or []:
+            key = getattr(entity, self.key)
+            record = self.records.get(key)
+            if record is None:
+                record = self.record_type(key)
+            record.update(entity)
+            records[key] = record
+        self.records = records
+        return [record.to_dict() for record in records.values()]
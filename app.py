@@ -1,13 +1,37 @@
 import os
-from dotenv import load_dotenv
 import config
+
+# Green server modes patch the standard library before anything else imports it,
+# so threads, sleeps and sockets in every module become cooperative
+if config.Config.SERVER_MODE in ('eventlet', 'gevent'):
+    try:
+        if config.Config.SERVER_MODE == 'eventlet':
+            import eventlet
+            eventlet.monkey_patch()
+        else:
+            from gevent import monkey
+            monkey.patch_all()
+    except ImportError as e:
+        print(f"[Server] Error: SERVER_MODE={config.Config.SERVER_MODE} needs the {config.Config.SERVER_MODE} "
+              f"package. Install it with 'pip install -r requirements.txt', or set SERVER_MODE=dev.")
+        raise ImportError(f"SERVER_MODE={config.Config.SERVER_MODE} requires the "
+                          f"{config.Config.SERVER_MODE} package: {str(e)}") from e
+
+from dotenv import load_dotenv
 import logging
-from flask import Flask, render_template
+import alpaca_trade_api as tradeapi
+from flask import Flask, render_template, request
 from flask_socketio import SocketIO
 from trading_bot import TradingBot
 from balance_tracker import BalanceTracker
-import threading
-import time
+from async_balance_tracker import AsyncBalanceTracker
+from streaming_balance_tracker import StreamingBalanceTracker
+from equity_store import EquityStore
+from dashboard_fanout import DashboardFanout
+from payload_codec import PayloadCodec
+from market_clock import MarketClock
+from utils.log_batcher import BatchingLogHandler
+import asyncio
 from datetime import datetime
 import json
 
@@ -20,37 +44,65 @@ if not os.getenv('APCA_API_KEY_ID') or not os.getenv('APCA_API_SECRET_KEY'):
     raise ValueError("Alpaca API keys not found in environment variables.")
 
 app = Flask(__name__)
-socketio = SocketIO(app, cors_allowed_origins="*")
+# 'dev' serves on Werkzeug with a thread per connection; the green modes use their own server
+socketio = SocketIO(app, cors_allowed_origins="*",
+                    async_mode=config.Config.SERVER_MODE if config.Config.SERVER_MODE in ('eventlet', 'gevent') else 'threading')
 
 # Configure logging to emit to WebSocket and console
-class SocketIOHandler(logging.Handler):
-    def emit(self, record):
-        msg = self.format(record)
-        socketio.emit('log_message', {
-            'timestamp': datetime.now().isoformat(),
-            'level': record.levelname,
-            'message': msg
-        })
+class SocketIOHandler(BatchingLogHandler):
+    """Ships log records to the dashboard as one 'log_batch' event every LOG_BATCH_INTERVAL seconds"""
+    def __init__(self):
+        super().__init__(lambda batch: socketio.emit('log_batch', batch),
+                         interval=config.Config.LOG_BATCH_INTERVAL)
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger()
-logger.addHandler(SocketIOHandler())
+log_handler = SocketIOHandler()
+logger.addHandler(log_handler)
+
+# Balance events go to the clients viewing an account or symbol, never to everyone
+fanout = DashboardFanout(socketio, max_queued=config.Config.CLIENT_QUEUE_SIZE,
+                         codec=PayloadCodec(precision=config.Config.PAYLOAD_PRECISION))
+
+# Name of the account the dashboard's tracker follows
+DEFAULT_ACCOUNT = 'default'
+
+# Answers the market status locally once started in __main__; without it every update calls get_clock
+market_clock = None
+
+def market_status_from_clock(clock):
+    """Classify a market clock as REGULAR, EXTENDED or CLOSED"""
+    if clock and clock.is_open:
+        # API clock times are timezone-aware, so compare them with an aware now
+        now = datetime.now(clock.next_close.tzinfo)
+        if clock.next_close - now > clock.next_open - now:
+            return "REGULAR"
+        else:
+            return "EXTENDED"
+    return "CLOSED"
 
 def get_market_status(api):
     """Get the current market status"""
     try:
-        clock = api.get_clock()
-        if clock and clock.is_open:
-            if clock.next_close - datetime.now() > clock.next_open - datetime.now():
-                return "REGULAR"
-            else:
-                return "EXTENDED"
-        return "CLOSED"
+        return market_status_from_clock(api.get_clock())
     except Exception as e:
         logger.error(f"Error getting market status: {str(e)}")
         return "UNKNOWN"
 
+async def get_market_status_async(tracker):
+    """Get the current market status through an AsyncBalanceTracker"""
+    try:
+        return market_status_from_clock(await tracker.get_clock())
+    except Exception as e:
+        logger.error(f"Error getting market status: {str(e)}")
+        return "UNKNOWN"
+
+def publish_market_status(status):
+    """Push a market state change to the dashboard as it happens"""
+    logger.info(f"Market is now {status}")
+    fanout.publish(fanout.account_room(DEFAULT_ACCOUNT), 'market_status', {'status': status})
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -62,10 +114,91 @@ def bot_thread(bot, symbols):
             bot.run_trading_cycle()
         except Exception as e:
             logger.error(f"Error in trading cycle: {str(e)}")
-        time.sleep(60)  # Wait 1 minute between cycles
+        socketio.sleep(60)  # Wait 1 minute between cycles
+
+# Tracker whose snapshots are published, and the latest of them, so new subscribers can be sent the current state
+published_tracker = None
+published_account_info = None
+
+def symbol_update(account_info, symbol):
+    """The position and open orders of one symbol in a balance snapshot"""
+    return {
+        'symbol': symbol,
+        'position': next((position for position in account_info.get('positions', [])
+                          if position['symbol'] == symbol), None),
+        'orders': [order for order in account_info.get('orders', []) if order['symbol'] == symbol]
+    }
+
+def publish_balance(tracker, account_info, market_status, account=DEFAULT_ACCOUNT):
+    """Emit the market status and what changed in the balance snapshot to the account's and symbols' rooms"""
+    global published_tracker, published_account_info
+    published_tracker = tracker
+    published_account_info = account_info
+    room = fanout.account_room(account)
+
+    # Emit market status
+    fanout.publish(room, 'market_status', {'status': market_status})
+    
+    # Emit only what changed; clients get the full snapshot on subscribe or on a sequence gap.
+    # The delta is always taken so the sequence stays continuous while nobody is watching
+    delta = tracker.diff_account_info(account_info)
+    if delta is None:
+        fanout.publish(room, 'balance_update', tracker.snapshot_deltas.full_snapshot)
+    elif delta:
+        fanout.publish(room, 'balance_delta', delta)
+
+    for symbol in fanout.subscribed_symbols():
+        fanout.publish(fanout.symbol_room(symbol), 'symbol_update',
+                       lambda symbol=symbol: symbol_update(account_info, symbol))
+    
+    # Log important changes
+    if account_info.get('daily_change', 0) < -100:
+        logger.warning(f"Large daily loss: ${account_info['daily_change']:.2f}")
+    elif account_info.get('daily_change', 0) > 100:
+        logger.info(f"Large daily gain: ${account_info['daily_change']:.2f}")
+
+def balance_poll_interval(market_status):
+    """Seconds between balance updates for a market status"""
+    if market_status == "REGULAR":
+        return 5  # Update every 5 seconds during regular hours
+    elif market_status == "EXTENDED":
+        return 10  # Update every 10 seconds during extended hours
+    return 30  # Update every 30 seconds when market is closed
+
+async def balance_loop(tracker):
+    """Coroutine that runs an AsyncBalanceTracker on the current event loop"""
+    market_status = "UNKNOWN"
+    try:
+        while True:
+            try:
+                account_info = await tracker.get_account_info()
+                if account_info:
+                    if market_clock is not None:
+                        new_market_status = market_clock.status()
+                    else:
+                        new_market_status = await get_market_status_async(tracker)
+                    if new_market_status:
+                        market_status = new_market_status
+                    publish_balance(tracker, account_info, market_status)
+                await asyncio.sleep(balance_poll_interval(market_status))
+            except Exception as e:
+                logger.error(f"Error in balance loop: {str(e)}")
+                await asyncio.sleep(5)
+    finally:
+        await tracker.close()
 
 def balance_thread(tracker):
     """Thread function to run the balance tracker"""
+    if isinstance(tracker, AsyncBalanceTracker):
+        # One event loop drives the tracker and all of its requests
+        asyncio.run(balance_loop(tracker))
+        return
+
+    streaming = isinstance(tracker, StreamingBalanceTracker)
+    if streaming:
+        # Fills arrive over the trade_updates stream; REST only reconciles
+        tracker.start()
+
     market_status = "UNKNOWN"
     while True:
         try:
@@ -74,35 +207,26 @@ def balance_thread(tracker):
             if account_info:
                 try:
                     # Get market status
-                    new_market_status = get_market_status(tracker.api)
+                    if market_clock is not None:
+                        new_market_status = market_clock.status()
+                    else:
+                        new_market_status = get_market_status(tracker.api)
                     if new_market_status:
                         market_status = new_market_status
                 except Exception as e:
                     logger.error(f"Error getting market status: {str(e)}")
                 
-                # Emit market status
-                socketio.emit('market_status', {'status': market_status})
-                
-                # Emit balance update
-                socketio.emit('balance_update', account_info)
-                
-                # Log important changes
-                if account_info.get('daily_change', 0) < -100:
-                    logger.warning(f"Large daily loss: ${account_info['daily_change']:.2f}")
-                elif account_info.get('daily_change', 0) > 100:
-                    logger.info(f"Large daily gain: ${account_info['daily_change']:.2f}")
+                publish_balance(tracker, account_info, market_status)
             
-            # Adjust sleep time based on market hours
-            if market_status == "REGULAR":
-                time.sleep(5)  # Update every 5 seconds during regular hours
-            elif market_status == "EXTENDED":
-                time.sleep(10)  # Update every 10 seconds during extended hours
+            # Adjust sleep time based on market hours; a streamed update wakes the loop early
+            if streaming:
+                tracker.wait_for_update(timeout=balance_poll_interval(market_status))
             else:
-                time.sleep(30)  # Update every 30 seconds when market is closed
+                socketio.sleep(balance_poll_interval(market_status))
                 
         except Exception as e:
             logger.error(f"Error in balance thread: {str(e)}")
-            time.sleep(5)
+            socketio.sleep(5)
 
 def refresh_tradable_symbols_periodically(bot):
     """Thread function to periodically refresh tradable symbols"""
@@ -111,26 +235,93 @@ def refresh_tradable_symbols_periodically(bot):
             bot.update_tradable_symbols()
         except Exception as e:
             logger.error(f"Error refreshing symbols: {str(e)}")
-        time.sleep(3600)  # Refresh every hour
+        socketio.sleep(3600)  # Refresh every hour
+
+def send_full_snapshot():
+    """Send the latest balance snapshot, with its sequence number, to the requesting client"""
+    if published_tracker is None:
+        return
+    snapshot = published_tracker.snapshot_deltas.full_snapshot()
+    if snapshot is not None:
+        fanout.send(request.sid, 'balance_update', snapshot)
+
+def subscribe_client(subscription):
+    """Join the requesting client to the rooms in a subscription and send it their current state"""
+    joined = fanout.subscribe(request.sid, subscription.get('accounts'), subscription.get('symbols'))
+    if fanout.account_room(DEFAULT_ACCOUNT) in joined:
+        send_full_snapshot()
+    for room in joined:
+        if room.startswith('symbol:') and published_account_info is not None:
+            fanout.send(request.sid, 'symbol_update', symbol_update(published_account_info, room[len('symbol:'):]))
 
 @socketio.on('connect')
-def handle_connect():
-    """Handle client connection"""
+def handle_connect(auth=None):
+    """Handle client connection; auth may carry {'accounts': [...], 'symbols': [...], 'format': 'msgpack'}"""
     logger.info("Client connected")
+    subscription = auth if isinstance(auth, dict) else {}
+    socketio.emit('payload_format', fanout.connect(request.sid, subscription.get('format')), to=request.sid)
+    # Clients that do not say what they view get the dashboard's account
+    if 'accounts' not in subscription and 'symbols' not in subscription:
+        subscription = dict(subscription, accounts=[DEFAULT_ACCOUNT])
+    subscribe_client(subscription)
+
+@socketio.on('subscribe')
+def handle_subscribe(subscription):
+    """Start receiving updates for more accounts and symbols"""
+    if isinstance(subscription, dict):
+        subscribe_client(subscription)
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe(subscription):
+    """Stop receiving updates for accounts and symbols"""
+    if isinstance(subscription, dict):
+        fanout.unsubscribe(request.sid, subscription.get('accounts'), subscription.get('symbols'))
+
+@socketio.on('request_snapshot')
+def handle_request_snapshot():
+    """Resend the full snapshot to a client that missed a delta"""
+    send_full_snapshot()
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
+    fanout.disconnect(request.sid)
     logger.info("Client disconnected")
 
+def run_server(host='0.0.0.0', port=None):
+    """
+    Serve the dashboard in the configured SERVER_MODE.
+
+    Args:
+        host: Interface to listen on
+        port: Port to listen on; defaults to SERVER_PORT
+    """
+    port = port or config.Config.SERVER_PORT
+    if config.Config.SERVER_MODE == 'eventlet':
+        socketio.run(app, host=host, port=port, max_size=config.Config.SERVER_MAX_CONNECTIONS, log_output=False)
+    elif config.Config.SERVER_MODE == 'gevent':
+        socketio.run(app, host=host, port=port, spawn=config.Config.SERVER_MAX_CONNECTIONS, log_output=False)
+    else:
+        # Start Flask-SocketIO with unsafe Werkzeug allowed
+        socketio.run(app, debug=True, use_reloader=False, allow_unsafe_werkzeug=True, port=port, host=host)
+
 if __name__ == '__main__':
     print("[Server] Starting application...")
     
-    # Create balance tracker instance
-    tracker = BalanceTracker(
+    # Create balance tracker instance; BALANCE_TRACKER_MODE picks polling, asyncio or streaming
+    tracker_class = {
+        'async': AsyncBalanceTracker,
+        'stream': StreamingBalanceTracker
+    }.get(config.Config.BALANCE_TRACKER_MODE, BalanceTracker)
+    tracker_options = {}
+    if tracker_class is not AsyncBalanceTracker:
+        tracker_options['track_orders'] = config.Config.TRACK_ORDER_HISTORY
+    tracker = tracker_class(
         api_key=os.getenv('APCA_API_KEY_ID'),
         api_secret=os.getenv('APCA_API_SECRET_KEY'),
-        base_url=os.getenv('APCA_API_BASE_URL')
+        base_url=os.getenv('APCA_API_BASE_URL'),
+        equity_store=EquityStore(config.Config.EQUITY_DB_PATH) if config.Config.EQUITY_DB_PATH else None,
+        **tracker_options
     )
     
     # Create trading bot instance
@@ -140,20 +331,19 @@ if __name__ == '__main__':
         base_url=os.getenv('APCA_API_BASE_URL')
     )
     
-    # Start balance tracker thread
-    balance_tracker_thread = threading.Thread(target=balance_thread, args=(tracker,))
-    balance_tracker_thread.daemon = True
-    balance_tracker_thread.start()
-    
-    # Start trading bot thread
-    trading_bot_thread = threading.Thread(target=bot_thread, args=(bot, config.Config.TRADING_SYMBOLS))
-    trading_bot_thread.daemon = True
-    trading_bot_thread.start()
+    # Market status from a calendar fetched once a day, instead of a get_clock call per update
+    market_clock = MarketClock(tradeapi.REST(
+        key_id=os.getenv('APCA_API_KEY_ID'),
+        secret_key=os.getenv('APCA_API_SECRET_KEY'),
+        base_url=os.getenv('APCA_API_BASE_URL'),
+        api_version='v2'
+    ))
+    market_clock.refresh()
     
-    # Start symbol refresh thread
-    symbol_refresh_thread = threading.Thread(target=refresh_tradable_symbols_periodically, args=(bot,))
-    symbol_refresh_thread.daemon = True
-    symbol_refresh_thread.start()
+    # Background tasks are threads in 'dev' mode and green threads in the production modes
+    socketio.start_background_task(market_clock.run, publish_market_status)
+    socketio.start_background_task(balance_thread, tracker)
+    socketio.start_background_task(bot_thread, bot, config.Config.TRADING_SYMBOLS)
+    socketio.start_background_task(refresh_tradable_symbols_periodically, bot)
     
-    # Start Flask-SocketIO with unsafe Werkzeug allowed on port 5001
-    socketio.run(app, debug=True, use_reloader=False, allow_unsafe_werkzeug=True, port=5001, host='0.0.0.0')
+    run_server()
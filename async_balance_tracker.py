@@ -0,0 +1,263 @@
+import asyncio
+import logging
+import time
+
+import aiohttp
+from alpaca_trade_api.entity import Account, Clock, Order, Position
+from alpaca_trade_api.rest import APIError
+
+import config
+from balance_tracker import SNAPSHOT_SECTIONS, BalanceSnapshotBuilder
+from utils.rate_limiter import RATE_LIMITERS
+from utils.retry_executor import API_EXECUTOR, UNKNOWN, CircuitOpenError, endpoint_key
+from utils.snapshot_cache import AsyncSnapshotCache
+
+logger = logging.getLogger(__name__)
+
+# Trading API path and response wrapper for each snapshot section
+SECTION_ENDPOINTS = {
+    'account': ('/v2/account', None, Account),
+    'positions': ('/v2/positions', None, Position),
+    'orders': ('/v2/orders', {'status': 'open'}, Order)
+}
+
+def create_session(limit=100, keepalive_timeout=30):
+    """
+    Create an HTTP session whose connections stay open between requests.
+
+    One session can be shared by any number of AsyncBalanceTracker instances on
+    the same event loop; credentials are sent per request, not per session.
+
+    Args:
+        limit: Maximum number of simultaneous connections in the pool
+        keepalive_timeout: Seconds an idle connection is kept open for reuse
+
+    Returns:
+        aiohttp.ClientSession: Must be created and closed inside the running loop
+    """
+    connector = aiohttp.TCPConnector(limit=limit, keepalive_timeout=keepalive_timeout)
+    return aiohttp.ClientSession(connector=connector, raise_for_status=False)
+
+class AsyncBalanceTracker(BalanceSnapshotBuilder):
+    """
+    asyncio counterpart of BalanceTracker.
+
+    Talks to the trading API over a pooled keep-alive aiohttp session and backs
+    off with asyncio.sleep, so a single event loop can drive many trackers and
+    their requests concurrently without a thread each. Snapshots have the same
+    shape as BalanceTracker.get_account_info, including the 'stale' list.
+
+    Usage:
+        async with create_session() as session:
+            trackers = [AsyncBalanceTracker(key, secret, url, session=session) for key, secret in accounts]
+            snapshots = await asyncio.gather(*(t.get_account_info() for t in trackers))
+    """
+    def __init__(self, api_key, api_secret, base_url, session=None, request_timeouts=None, latency_budget=4.0,
+                 snapshot_ttl=None, equity_store=None, executor=None, rate_limiter=None):
+        super().__init__(equity_store)
+        self.api_key = api_key
+        self.api_secret = api_secret
+        # Strip a trailing "/v2" path, not the characters '/', 'v' and '2'
+        self.base_url = base_url.rstrip('/').removesuffix('/v2')
+        self._headers = {
+            'APCA-API-KEY-ID': self.api_key,
+            'APCA-API-SECRET-KEY': self.api_secret
+        }
+
+        # A session passed in is shared and left open; otherwise one is made on first use
+        self._session = session
+        self._owns_session = session is None
+
+        # Same retry configuration as BalanceTracker; rate_limiter replaces the shared account limiter
+        self.executor = executor or API_EXECUTOR
+        self.rate_limiter = rate_limiter
+        self.max_retries = 3  # Attempts per request, including the first
+        self.base_delay = 0.5  # Base delay in seconds, jittered
+        self.max_delay = 8  # Maximum delay in seconds
+
+        self.request_timeouts = {'account': 3.0, 'positions': 3.0, 'orders': 3.0}
+        self.request_timeouts.update(request_timeouts or {})
+        self.latency_budget = latency_budget
+        self._in_flight = {}
+        self._last_good = {}
+
+        # Callers within the TTL share one snapshot, and concurrent misses share one fetch
+        if snapshot_ttl is None:
+            snapshot_ttl = config.Config.ACCOUNT_SNAPSHOT_TTL
+        self._snapshot_cache = AsyncSnapshotCache(self._load_account_info, ttl=snapshot_ttl)
+
+    @property
+    def session(self):
+        """The HTTP session, created on first use inside the running loop"""
+        if self._session is None or self._session.closed:
+            self._session = create_session()
+            self._owns_session = True
+        return self._session
+
+    async def _request(self, path, params=None, timeout=None):
+        """GET a trading API path and return the decoded JSON body"""
+        client_timeout = aiohttp.ClientTimeout(total=timeout or max(self.request_timeouts.values()))
+        async with self.session.get(self.base_url + path, params=params, headers=self._headers,
+                                    timeout=client_timeout) as response:
+            body = await response.json(content_type=None)
+            if response.status == 429:
+                raise APIError({'code': 429, 'message': 'too many requests'})
+            if response.status >= 400:
+                if not isinstance(body, dict) or 'message' not in body:
+                    body = {'code': response.status, 'message': f"HTTP {response.status}"}
+                # The code is what classify_error reads the status from
+                body.setdefault('code', response.status)
+                raise APIError(body)
+            return body
+
+    async def _make_api_request(self, path, params=None, timeout=None):
+        """
+        Make an API request through the shared retry executor, backing off without blocking the loop.
+
+        Args:
+            path: Trading API path; each path has its own circuit breaker
+            params: Query parameters
+            timeout: Seconds after which no further attempt is started
+
+        Returns:
+            The decoded JSON body; raises once retries run out
+        """
+        try:
+            return await self.executor.call_async(endpoint_key(self.base_url, path.removeprefix('/v2/')),
+                                                  self._request, (path, params, timeout), timeout=timeout,
+                                                  attempts=self.max_retries,
+                                                  limiter=self.rate_limiter or RATE_LIMITERS['account'],
+                                                  base_delay=self.base_delay, max_delay=self.max_delay)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.error(f"{path} request failed ({getattr(e, 'error_class', UNKNOWN)}): "
+                         f"{str(e) or type(e).__name__}")
+            raise
+
+    async def _fetch_section(self, section):
+        """Fetch one snapshot section and wrap it in the alpaca_trade_api entity types"""
+        path, params, entity = SECTION_ENDPOINTS[section]
+        body = await self._make_api_request(path, params, self.request_timeouts[section])
+        if body is None:
+            return None
+        if isinstance(body, list):
+            return [entity(item) for item in body]
+        return entity(body)
+
+    async def _fetch_sections(self):
+        """
+        Fetch account, positions and orders concurrently.
+
+        Waits for each section until its own timeout or the latency budget runs out,
+        whichever comes first. A section that is still in flight is not requested
+        again; the next call waits on the same request.
+
+        Returns:
+            tuple: (sections by name, names of sections served from the last good copy)
+        """
+        start = time.monotonic()
+        tasks = {}
+        for section in SNAPSHOT_SECTIONS:
+            task = self._in_flight.get(section)
+            if task is None or task.done():
+                task = asyncio.ensure_future(self._fetch_section(section))
+                self._in_flight[section] = task
+            tasks[section] = task
+
+        async def wait_for_section(section):
+            deadline = start + min(self.request_timeouts[section], self.latency_budget)
+            # Shield the request so running out of budget here leaves it in flight
+            return await asyncio.wait_for(asyncio.shield(tasks[section]),
+                                          timeout=max(0.0, deadline - time.monotonic()))
+
+        results = await asyncio.gather(*(wait_for_section(section) for section in SNAPSHOT_SECTIONS),
+                                       return_exceptions=True)
+
+        sections = {}
+        stale = []
+        for section, value in zip(SNAPSHOT_SECTIONS, results):
+            if isinstance(value, asyncio.TimeoutError):
+                logger.warning(f"Timed out waiting for {section}; serving last known data")
+            elif isinstance(value, Exception):
+                logger.warning(f"Error getting {section}: {str(value)}")
+            elif value is None:
+                logger.warning(f"Error getting {section}: no data returned")
+            else:
+                self._last_good[section] = value
+                sections[section] = value
+            if section not in sections:
+                stale.append(section)
+                sections[section] = self._last_good.get(section)
+        return sections, stale
+
+    async def get_account_info(self, max_age=None):
+        """
+        Get a snapshot of the account, positions and open orders.
+
+        Snapshots are cached for snapshot_ttl seconds and shared by every caller,
+        so treat the returned dict as read-only.
+
+        Args:
+            max_age: Accept a cached snapshot up to this many seconds old instead of the TTL
+
+        Returns:
+            dict: The snapshot, or None if no account data is available at all
+        """
+        return await self._snapshot_cache.get(max_age)
+
+    async def get_account(self, max_age=None):
+        """
+        Get the raw account entity behind the shared snapshot.
+
+        Args:
+            max_age: Accept a cached snapshot up to this many seconds old instead of the TTL
+
+        Returns:
+            Account: The account entity, or None if no account data is available
+        """
+        if await self.get_account_info(max_age) is None:
+            return None
+        return self._last_good.get('account')
+
+    async def _load_account_info(self):
+        """Fetch and build a fresh snapshot; the loader behind the snapshot cache"""
+        try:
+            sections, stale = await self._fetch_sections()
+            if not sections['account']:
+                logger.error("Failed to get account information")
+                return None
+            return self._build_snapshot(sections['account'], sections['positions'], sections['orders'], stale)
+
+        except Exception as e:
+            logger.error(f"Error in get_account_info: {str(e)}")
+            return None
+
+    async def get_clock(self):
+        """Get the market clock, as tradeapi.REST.get_clock would"""
+        body = await self._make_api_request('/v2/clock', timeout=self.request_timeouts['account'])
+        return Clock(body) if body is not None else None
+
+    async def close(self):
+        """Cancel requests in flight and close the session if this tracker created it"""
+        for task in self._in_flight.values():
+            task.cancel()
+        self._in_flight.clear()
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+        self._session = None
+        if self.equity_store is not None:
+            self.equity_store.flush()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def run(self):
+        while True:
+            info = await self.get_account_info()
+            if info:
+                pass
+            await asyncio.sleep(10)  # Update every 10 seconds
@@ -1,96 +1,112 @@
 import alpaca_trade_api as tradeapi
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 import logging
 import os
+from requests.adapters import HTTPAdapter
 import config
 from utils.rate_limiter import RATE_LIMITERS
+from utils.retry_executor import API_EXECUTOR, UNKNOWN, CircuitOpenError, endpoint_key
+from utils.snapshot_cache import SnapshotCache
+from snapshot_delta import SnapshotDiffer
+from account_records import OrderRecord, PositionRecord, RecordSet
+from order_store import OrderStore
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class BalanceTracker:
-    def __init__(self, api_key, api_secret, base_url):
-        self.api_key = api_key
-        self.api_secret = api_secret
-        self.base_url = base_url.rstrip('/v2')
-        
-        # Create the API client
-        self.api = tradeapi.REST(
-            key_id=self.api_key,
-            secret_key=self.api_secret,
-            base_url=self.base_url,
-            api_version='v2'
-        )
-        
+# Sections of an account snapshot, fetched concurrently
+SNAPSHOT_SECTIONS = ('account', 'positions', 'orders')
+
+class _TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default socket timeout to every request"""
+    def __init__(self, timeout, *args, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+class BalanceSnapshotBuilder:
+    """
+    Hour and day balance bookkeeping shared by the blocking and asyncio trackers.
+
+    Subclasses fetch the account, positions and orders however they like and
+    hand the results to _build_snapshot. With an EquityStore, every snapshot's
+    equity is persisted and the hour and day anchors come from the stored
+    series, so they survive restarts.
+    """
+    def __init__(self, equity_store=None):
+        self.equity_store = equity_store
+
         # Initialize tracking variables
         self.previous_balance = None
         self.hour_start_balance = None
         self.hour_start_time = None
         self.day_start_balance = None
         self.day_start_time = None
+
+        # Sequence-numbered deltas between the snapshots that get published
+        self.snapshot_deltas = SnapshotDiffer()
+
+        # Position and order rows, parsed once and reused until they change
+        self._position_records = RecordSet(PositionRecord, 'symbol')
+        self._order_records = RecordSet(OrderRecord, 'id')
+
+    def diff_account_info(self, snapshot):
+        """
+        Diff a snapshot against the last one published and advance the sequence.
+        :param snapshot: Snapshot from get_account_info
+        :return: The delta, an empty dict if nothing changed, or None if the
+            snapshot has to be sent in full
+        """
+        return self.snapshot_deltas.update(snapshot)
+
+    def _format_positions(self, positions):
+        return self._position_records.update(positions)
+
+    def _format_orders(self, orders):
+        return self._order_records.update(orders)
+
+    def _anchor_from_store(self, current_balance):
+        """Record the sample and set the hour and day anchors from the stored series"""
+        now = time.time()
+        self.equity_store.record(now, current_balance)
+        hour_start = self.equity_store.hour_start(now)
+        day_start = self.equity_store.day_start(now)
+        self.hour_start_balance = self.equity_store.value_at(hour_start)
+        self.hour_start_time = datetime.fromtimestamp(hour_start)
+        self.day_start_balance = self.equity_store.value_at(day_start)
+        self.day_start_time = datetime.fromtimestamp(day_start)
+        if self.previous_balance is None:
+            self.previous_balance = current_balance
+
+    def _build_snapshot(self, account, positions, orders, stale=()):
+        """Merge the fetched sections into the snapshot sent to the dashboard"""
+        current_time = datetime.now()
         
-        # Add retry configuration
-        self.max_retries = 3
-        self.base_delay = 3  # Base delay in seconds
-        self.max_delay = 30  # Maximum delay in seconds
-
-    def _make_api_request(self, request_func, *args, **kwargs):
-        """Helper method to make API requests with retries and rate limiting"""
-        for attempt in range(self.max_retries):
-            try:
-                # Check rate limit before making request
-                if not RATE_LIMITERS['account'].acquire(tokens=1, wait=True):
-                    delay = min(self.base_delay * (2 ** attempt), self.max_delay)
-                    logger.warning(f"Rate limit reached, waiting {delay}s before retry...")
-                    time.sleep(delay)
-                    continue
-                
-                return request_func(*args, **kwargs)
-                
-            except Exception as e:
-                delay = min(self.base_delay * (2 ** attempt), self.max_delay)
-                if attempt < self.max_retries - 1:
-                    if "too many requests" in str(e).lower():
-                        RATE_LIMITERS['account'].record_error()
-                        logger.warning(f"Rate limit exceeded. Waiting {delay}s before retry...")
-                    elif "subscription does not permit" in str(e).lower():
-                        # Skip retrying for subscription-related errors
-                        logger.info(f"Skipping retry due to subscription limitation: {str(e)}")
-                        break
-                    else:
-                        logger.warning(f"Request failed: {str(e)}. Retrying in {delay}s... ({attempt + 1}/{self.max_retries})")
-                    time.sleep(delay)
-                else:
-                    logger.error(f"Final attempt failed: {str(e)}")
-                    raise
+        # Get current values
+        current_balance = float(account.portfolio_value)
+        cash_balance = float(account.cash)
+        buying_power = float(account.buying_power)
         
-        return None  # Return None for failed requests
+        if self.equity_store is not None:
+            self._anchor_from_store(current_balance)
 
-    def get_account_info(self):
-        try:
-            # Get account information with retry logic
-            account = self._make_api_request(self.api.get_account)
-            if not account:
-                logger.error("Failed to get account information")
-                return None
-                
-            current_time = datetime.now()
-            
-            # Get current values
-            current_balance = float(account.portfolio_value)
-            cash_balance = float(account.cash)
-            buying_power = float(account.buying_power)
-            
-            # Initialize balances if not set
-            if self.previous_balance is None:
-                self.previous_balance = current_balance
-                self.hour_start_balance = current_balance
-                self.hour_start_time = current_time
-                self.day_start_balance = current_balance
-                self.day_start_time = current_time
-            
-            # Update hourly and daily balances
+        # Initialize balances if not set
+        if self.previous_balance is None:
+            self.previous_balance = current_balance
+            self.hour_start_balance = current_balance
+            self.hour_start_time = current_time
+            self.day_start_balance = current_balance
+            self.day_start_time = current_time
+        
+        # Update hourly and daily balances
+        if self.equity_store is None:
             if self.hour_start_time is None or (current_time - self.hour_start_time).total_seconds() > 3600:
                 self.hour_start_balance = current_balance
                 self.hour_start_time = current_time
@@ -99,67 +115,206 @@ class BalanceTracker:
                 self.day_start_balance = current_balance
                 self.day_start_time = current_time
 
-            # Calculate changes
-            hourly_change = current_balance - self.hour_start_balance
-            hourly_change_pct = (hourly_change / self.hour_start_balance) * 100 if self.hour_start_balance else 0
-            
-            daily_change = current_balance - self.day_start_balance
-            daily_change_pct = (daily_change / self.day_start_balance) * 100 if self.day_start_balance else 0
-            
-            # Update previous balance
-            self.previous_balance = current_balance
+        # Calculate changes
+        hourly_change = current_balance - self.hour_start_balance
+        hourly_change_pct = (hourly_change / self.hour_start_balance) * 100 if self.hour_start_balance else 0
+        
+        daily_change = current_balance - self.day_start_balance
+        daily_change_pct = (daily_change / self.day_start_balance) * 100 if self.day_start_balance else 0
+        
+        # Update previous balance
+        self.previous_balance = current_balance
 
-            # Get positions and orders with retry logic
-            positions_data = []
-            orders_data = []
-            
-            try:
-                positions = self._make_api_request(self.api.list_positions)
-                if positions:
-                    positions_data = [{
-                        'symbol': pos.symbol,
-                        'qty': pos.qty,
-                        'side': 'buy' if float(pos.qty) > 0 else 'sell',
-                        'avg_entry_price': float(pos.avg_entry_price),
-                        'current_price': float(pos.current_price),
-                        'unrealized_pl': float(pos.unrealized_pl),
-                        'unrealized_plpc': float(pos.unrealized_plpc) * 100
-                    } for pos in positions]
-            except Exception as e:
-                logger.warning(f"Error getting positions: {str(e)}")
-                
+        return {
+            'total_equity': current_balance,
+            'current_balance': current_balance,
+            'cash_balance': cash_balance,
+            'buying_power': buying_power,
+            'hourly_change': hourly_change,
+            'hourly_change_pct': hourly_change_pct,
+            'daily_change': daily_change,
+            'daily_change_pct': daily_change_pct,
+            'positions': self._format_positions(positions),
+            'orders': self._format_orders(orders),
+            'stale': list(stale),
+            'last_update': current_time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+class BalanceTracker(BalanceSnapshotBuilder):
+    def __init__(self, api_key, api_secret, base_url, request_timeouts=None, latency_budget=4.0,
+                 snapshot_ttl=None, equity_store=None, executor=None, track_orders=False, rate_limiter=None):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        # Strip a trailing "/v2" path, not the characters '/', 'v' and '2'
+        self.base_url = base_url.rstrip('/').removesuffix('/v2')
+        
+        # Create the API client
+        self.api = tradeapi.REST(
+            key_id=self.api_key,
+            secret_key=self.api_secret,
+            base_url=self.base_url,
+            api_version='v2'
+        )
+        
+        # Hour and day balance tracking
+        super().__init__(equity_store)
+        
+        # Retry configuration, applied per call by the shared executor; rate_limiter replaces the shared account limiter
+        self.executor = executor or API_EXECUTOR
+        self.rate_limiter = rate_limiter
+        self.max_retries = 3  # Attempts per request, including the first
+        self.base_delay = 0.5  # Base delay in seconds, jittered
+        self.max_delay = 8  # Maximum delay in seconds
+        # The executor owns retries; the client's own 429 loop sleeps 3s per retry regardless of deadlines
+        self.api._retry = 0
+
+        # Concurrent snapshot fetching: each section gets its own timeout, and the
+        # whole snapshot returns within the latency budget, serving the last good
+        # copy of any section that is not in by then
+        self.request_timeouts = {'account': 3.0, 'positions': 3.0, 'orders': 3.0}
+        self.request_timeouts.update(request_timeouts or {})
+        self.latency_budget = latency_budget
+
+        # Optional local order history; when set, the orders section comes from its incremental sync
+        self.order_store = None
+        if track_orders:
+            self.order_store = OrderStore(self.api, request=self._make_api_request,
+                                          request_timeout=self.request_timeouts['orders'])
+
+        self._executor = ThreadPoolExecutor(max_workers=len(SNAPSHOT_SECTIONS), thread_name_prefix='balance-fetch')
+        self._in_flight = {}
+        self._last_good = {}
+        self._fetch_lock = threading.Lock()
+
+        # Callers within the TTL share one snapshot, and concurrent misses share one fetch
+        if snapshot_ttl is None:
+            snapshot_ttl = config.Config.ACCOUNT_SNAPSHOT_TTL
+        self._snapshot_cache = SnapshotCache(self._load_account_info, ttl=snapshot_ttl)
+
+        # Socket timeout as a backstop, so abandoned requests do not hold workers forever
+        session = getattr(self.api, '_session', None)
+        if session is not None and hasattr(session, 'mount'):
+            adapter = _TimeoutHTTPAdapter(max(self.request_timeouts.values()))
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+
+    def _make_api_request(self, endpoint, request_func, *args, timeout=None, **kwargs):
+        """
+        Make an API request through the shared retry executor.
+
+        Takes one account rate-limit token for the whole call, backs off with
+        jitter between attempts, never starts an attempt after the timeout and
+        fails fast while the endpoint's circuit is open.
+        :param endpoint: Endpoint name, e.g. 'account'; each has its own circuit
+        :param request_func: The tradeapi.REST method to call
+        :param timeout: Seconds after which no further attempt is started
+        :return: What request_func returns; raises once retries run out
+        """
+        try:
+            return self.executor.call(endpoint_key(self.base_url, endpoint), request_func, args, kwargs,
+                                      timeout=timeout, attempts=self.max_retries,
+                                      limiter=self.rate_limiter or RATE_LIMITERS['account'],
+                                      base_delay=self.base_delay, max_delay=self.max_delay)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.error(f"{endpoint} request failed ({getattr(e, 'error_class', UNKNOWN)}): {str(e)}")
+            raise
+
+    def _fetch_section(self, section):
+        """Fetch one snapshot section through the retrying request helper"""
+        timeout = self.request_timeouts[section]
+        if section == 'account':
+            return self._make_api_request(section, self.api.get_account, timeout=timeout)
+        if section == 'positions':
+            return self._make_api_request(section, self.api.list_positions, timeout=timeout)
+        if self.order_store is not None:
+            return self.order_store.sync(timeout=timeout)
+        return self._make_api_request(section, self.api.list_orders, status='open', timeout=timeout)
+
+    def _fetch_sections(self):
+        """
+        Fetch account, positions and orders concurrently.
+
+        Waits for each section until its own timeout or the latency budget runs out,
+        whichever comes first. A section that is still in flight is not requested
+        again; the next call waits on the same request.
+        :return: (sections by name, names of sections served from the last good copy)
+        """
+        start = time.monotonic()
+        with self._fetch_lock:
+            futures = {}
+            for section in SNAPSHOT_SECTIONS:
+                future = self._in_flight.get(section)
+                if future is None or future.done():
+                    future = self._executor.submit(self._fetch_section, section)
+                    self._in_flight[section] = future
+                futures[section] = future
+
+        sections = {}
+        stale = []
+        for section, future in futures.items():
+            deadline = start + min(self.request_timeouts[section], self.latency_budget)
             try:
-                orders = self._make_api_request(lambda: self.api.list_orders(status='open'))
-                if orders:
-                    orders_data = [{
-                        'symbol': order.symbol,
-                        'qty': order.qty,
-                        'side': order.side,
-                        'type': order.type,
-                        'limit_price': float(order.limit_price) if order.limit_price else None,
-                        'submitted_at': order.submitted_at.strftime('%Y-%m-%d %H:%M:%S') if order.submitted_at else None
-                    } for order in orders]
+                value = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                if value is None:
+                    raise ValueError("no data returned")
+                self._last_good[section] = value
+                sections[section] = value
+            except FutureTimeoutError:
+                logger.warning(f"Timed out waiting for {section}; serving last known data")
             except Exception as e:
-                logger.warning(f"Error getting orders: {str(e)}")
-
-            return {
-                'total_equity': current_balance,
-                'current_balance': current_balance,
-                'cash_balance': cash_balance,
-                'buying_power': buying_power,
-                'hourly_change': hourly_change,
-                'hourly_change_pct': hourly_change_pct,
-                'daily_change': daily_change,
-                'daily_change_pct': daily_change_pct,
-                'positions': positions_data,
-                'orders': orders_data,
-                'last_update': current_time.strftime('%Y-%m-%d %H:%M:%S')
-            }
+                logger.warning(f"Error getting {section}: {str(e)}")
+            if section not in sections:
+                stale.append(section)
+                sections[section] = self._last_good.get(section)
+        return sections, stale
+
+    def get_account_info(self, max_age=None):
+        """
+        Get a snapshot of the account, positions and open orders.
+
+        The three requests run concurrently. Sections that fail or miss their
+        timeout are filled from the last good response and listed under 'stale'.
+        Snapshots are cached for snapshot_ttl seconds and shared by every caller,
+        so treat the returned dict as read-only.
+        :param max_age: Accept a cached snapshot up to this many seconds old instead of the TTL
+        :return: The snapshot, or None if no account data is available at all
+        """
+        return self._snapshot_cache.get(max_age)
+
+    def get_account(self, max_age=None):
+        """
+        Get the raw account entity behind the shared snapshot.
+
+        Lets risk checks read fields the snapshot does not carry without a
+        separate API call.
+        :param max_age: Accept a cached snapshot up to this many seconds old instead of the TTL
+        :return: The account entity, or None if no account data is available
+        """
+        if self.get_account_info(max_age) is None:
+            return None
+        return self._last_good.get('account')
+
+    def _load_account_info(self):
+        """Fetch and build a fresh snapshot; the loader behind the snapshot cache"""
+        try:
+            sections, stale = self._fetch_sections()
+            if not sections['account']:
+                logger.error("Failed to get account information")
+                return None
+            return self._build_snapshot(sections['account'], sections['positions'], sections['orders'], stale)
             
         except Exception as e:
             logger.error(f"Error in get_account_info: {str(e)}")
             return None
 
+    def close(self):
+        """Stop the fetch workers without waiting for requests in flight"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self.equity_store is not None:
+            self.equity_store.flush()
+
     def run(self):
         while True:
             info = self.get_account_info()
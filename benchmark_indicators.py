@@ -0,0 +1,317 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from indicators import (
+    TechnicalIndicators, StreamingEMA, StreamingMovingAverages, StreamingVolatility,
+    StreamingRSI, StreamingMACD, StreamingBollingerBands, StreamingVolumeProfile
+)
+from market_calendar import CALENDAR
+
+DEFAULT_LENGTHS = [10**2, 10**3, 10**4, 10**5, 10**6, 10**7]
+DEFAULT_UNIVERSES = [1, 10, 100, 1000, 5000]
+DEFAULT_BATCH_BARS = 390  # One regular session of minute bars
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'indicators_baseline.json')
+
+# Peak memory differences below this many bytes are noise, not regressions
+MEMORY_NOISE_BYTES = 64 * 1024
+
+# A benchmark case. ``run`` takes the generated bars and processes all of them;
+# ``max_length`` caps the bars fed to cases too slow for the longest series, and
+# throughput is reported per bar so capped cases stay comparable. Cases that
+# ``loop`` over bars in Python get their columns as lists, converted up front.
+Case = namedtuple('Case', ['name', 'form', 'run', 'max_length', 'loop'], defaults=(None, False))
+
+
+def make_bars(symbols: int, bars: int, seed: int = 0) -> Dict[str, np.ndarray]:
+    """Random-walk OHLCV bars, (symbols x bars) when ``symbols > 1`` else 1-D."""
+    rng = np.random.default_rng(seed)
+    shape = (symbols, bars) if symbols > 1 else (bars,)
+    close = 100 + np.cumsum(rng.standard_normal(shape) * 0.1, axis=-1)
+    spread = rng.uniform(0, 0.2, shape)
+    return {
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': rng.uniform(100, 10000, shape),
+        'timestamp': pd.date_range('2024-01-02 14:30', periods=bars, freq='min', tz='UTC').asi8
+    }
+
+
+def _stream(indicator_factory: Callable[[], object]) -> Callable[[Dict[str, list]], None]:
+    def run(data):
+        indicator = indicator_factory()
+        for price in data['close']:
+            indicator.update(price)
+    return run
+
+
+def _stream_volume_profile(data):
+    profile = StreamingVolumeProfile(tick_size=0.01)
+    for price, volume in zip(data['close'], data['volume']):
+        profile.update(price, volume)
+    profile.profile()
+
+
+def _pandas_macd(data):
+    """The pandas implementation calculate_macd used before the NumPy kernel, for comparison."""
+    prices = pd.Series(data['close'])
+    macd_series = prices.ewm(span=12, adjust=False).mean() - prices.ewm(span=26, adjust=False).mean()
+    macd_series.ewm(span=9, adjust=False).mean().iloc[-1]
+
+
+def _sessions_scalar(data):
+    for timestamp in data['timestamp']:
+        TechnicalIndicators.get_market_session(pd.Timestamp(timestamp, tz='UTC'))
+
+
+TI = TechnicalIndicators
+
+CASES: List[Case] = [
+    Case('moving_averages', 'scalar', lambda d: TI.calculate_moving_averages(d['close'])),
+    Case('volatility', 'scalar', lambda d: TI.calculate_volatility(d['close'])),
+    Case('atr', 'scalar', lambda d: TI.calculate_atr(d['high'], d['low'], d['close'])),
+    Case('rsi', 'scalar', lambda d: TI.calculate_rsi(d['close'])),
+    Case('macd', 'scalar', lambda d: TI.calculate_macd(d['close'])),
+    Case('ema', 'scalar', lambda d: TI.calculate_ema(d['close'], 20)),
+    Case('bollinger_bands', 'scalar', lambda d: TI.calculate_bollinger_bands(d['close'])),
+    Case('volume_profile', 'scalar', lambda d: TI.calculate_volume_profile(d['close'], d['volume'])),
+    # One call per bar
+    Case('market_session', 'scalar', _sessions_scalar, 10**4, loop=True),
+    # The pandas MACD calculate_macd replaced, to compare scalar/macd against
+    Case('macd', 'pandas', _pandas_macd),
+
+    Case('moving_averages', 'series', lambda d: TI.calculate_moving_averages_series(d['close'])),
+    Case('volatility', 'series', lambda d: TI.calculate_volatility_series(d['close'])),
+    Case('atr', 'series', lambda d: TI.calculate_atr_series(d['high'], d['low'], d['close'])),
+    Case('rsi', 'series', lambda d: TI.calculate_rsi_series(d['close'])),
+    Case('macd', 'series', lambda d: TI.calculate_macd_series(d['close'])),
+    Case('ema', 'series', lambda d: TI.calculate_ema_series(d['close'], 20)),
+    Case('bollinger_bands', 'series', lambda d: TI.calculate_bollinger_bands_series(d['close'])),
+    Case('volume_profile', 'series', lambda d: TI.calculate_volume_profile_series(d['close'], d['volume']), 10**6),
+    Case('market_session', 'series', lambda d: CALENDAR.label_sessions(d['timestamp'])),
+
+    # Streaming updates run one Python call per bar
+    Case('moving_averages', 'streaming', _stream(StreamingMovingAverages), 10**5, loop=True),
+    Case('volatility', 'streaming', _stream(StreamingVolatility), 10**5, loop=True),
+    Case('rsi', 'streaming', _stream(StreamingRSI), 10**5, loop=True),
+    Case('macd', 'streaming', _stream(StreamingMACD), 10**5, loop=True),
+    Case('ema', 'streaming', _stream(lambda: StreamingEMA(20)), 10**5, loop=True),
+    Case('bollinger_bands', 'streaming', _stream(StreamingBollingerBands), 10**5, loop=True),
+    Case('volume_profile', 'streaming', _stream_volume_profile, 10**5, loop=True),
+
+    Case('moving_averages', 'batch', lambda d: TI.calculate_moving_averages_batch(d['close'])),
+    Case('volatility', 'batch', lambda d: TI.calculate_volatility_batch(d['close'])),
+    Case('atr', 'batch', lambda d: TI.calculate_atr_batch(d['high'], d['low'], d['close'])),
+    Case('rsi', 'batch', lambda d: TI.calculate_rsi_batch(d['close'])),
+    Case('macd', 'batch', lambda d: TI.calculate_macd_batch(d['close'])),
+    Case('ema', 'batch', lambda d: TI.calculate_ema_batch(d['close'], 20)),
+    Case('bollinger_bands', 'batch', lambda d: TI.calculate_bollinger_bands_batch(d['close'])),
+]
+
+
+def _time(run: Callable[[], None], repeat: int, min_time: float) -> float:
+    """Best seconds per call over ``repeat`` rounds, each looping for at least ``min_time``."""
+    best = float('inf')
+    for _ in range(repeat):
+        number = 0
+        start = time.perf_counter()
+        while True:
+            run()
+            number += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / number)
+    return best
+
+
+def _peak_memory(run: Callable[[], None]) -> int:
+    """Peak bytes allocated by one call, as seen by tracemalloc."""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _slice(data: Dict[str, np.ndarray], bars: int, as_lists: bool = False) -> Dict[str, np.ndarray]:
+    """The last ``bars`` of every column; as Python lists for cases that loop over bars."""
+    return {name: values[..., -bars:].tolist() if as_lists else values[..., -bars:]
+            for name, values in data.items()}
+
+
+def run_benchmarks(lengths: List[int] = DEFAULT_LENGTHS, universes: List[int] = DEFAULT_UNIVERSES,
+                   batch_bars: int = DEFAULT_BATCH_BARS, forms: Optional[List[str]] = None,
+                   names: Optional[List[str]] = None, repeat: int = 3, min_time: float = 0.05,
+                   log: Callable[[str], None] = print) -> Dict[str, Dict[str, float]]:
+    """Run the benchmark cases.
+
+    Args:
+        lengths (List[int], optional): Series lengths for the scalar, series and streaming forms.
+        universes (List[int], optional): Symbol counts for the batch form.
+        batch_bars (int, optional): Bars per symbol for the batch form. Defaults to 390.
+        forms (List[str], optional): Only run these forms. Defaults to all.
+        names (List[str], optional): Only run these indicators. Defaults to all.
+        repeat (int, optional): Timing rounds; the best is kept. Defaults to 3.
+        min_time (float, optional): Minimum seconds per timing round. Defaults to 0.05.
+        log (Callable[[str], None], optional): Progress output. Defaults to print.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Results keyed "form/indicator/size" with the seconds
+        per call, bars per second and peak bytes.
+    """
+    cases = [case for case in CASES
+             if (forms is None or case.form in forms) and (names is None or case.name in names)]
+    results = {}
+
+    single = [case for case in cases if case.form != 'batch']
+    if single and lengths:
+        series = make_bars(1, max(lengths))
+        for length in lengths:
+            for case in single:
+                bars = min(length, case.max_length or length)
+                data = _slice(series, bars, as_lists=case.loop)
+                results[f"{case.form}/{case.name}/n={length}"] = _measure(case, data, bars, repeat, min_time, log)
+
+    batch = [case for case in cases if case.form == 'batch']
+    for symbols in (universes if batch else []):
+        # Always a matrix, even for one symbol
+        matrix = make_bars(max(symbols, 2), batch_bars)
+        data = {name: values[:symbols] for name, values in matrix.items() if name != 'timestamp'}
+        for case in batch:
+            results[f"batch/{case.name}/symbols={symbols}"] = _measure(
+                case, data, symbols * batch_bars, repeat, min_time, log)
+
+    return results
+
+
+def _measure(case: Case, data: Dict[str, np.ndarray], bars: int, repeat: int, min_time: float,
+             log: Callable[[str], None]) -> Dict[str, float]:
+    seconds = _time(lambda: case.run(data), repeat, min_time)
+    result = {
+        'seconds': seconds,
+        'bars': bars,
+        'bars_per_second': bars / seconds if seconds > 0 else float('inf'),
+        'peak_bytes': _peak_memory(lambda: case.run(data))
+    }
+    log(f"{case.form:>9} {case.name:<16} bars={bars:<10} {result['bars_per_second']:>14,.0f} bars/s "
+        f"{result['peak_bytes'] / 1024:>12,.1f} KiB")
+    return result
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """List the cases that regressed against a baseline.
+
+    A case regresses when its throughput drops by more than ``tolerance`` or its peak
+    memory grows by more than ``tolerance`` (and by more than MEMORY_NOISE_BYTES).
+    Cases missing from either side are ignored.
+
+    Args:
+        results (Dict[str, Dict[str, float]]): Results of ``run_benchmarks``.
+        baseline (Dict[str, Dict[str, float]]): Baseline results.
+        tolerance (float, optional): Allowed relative change. Defaults to 0.25.
+
+    Returns:
+        List[str]: A message per regression; empty when nothing regressed.
+    """
+    regressions = []
+    for key, result in results.items():
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+        if result['bars_per_second'] < expected['bars_per_second'] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {result['bars_per_second']:,.0f} bars/s, "
+                               f"baseline {expected['bars_per_second']:,.0f} bars/s")
+        memory_growth = result['peak_bytes'] - expected['peak_bytes']
+        if memory_growth > MEMORY_NOISE_BYTES and result['peak_bytes'] > expected['peak_bytes'] * (1 + tolerance):
+            regressions.append(f"{key}: peak memory {result['peak_bytes']:,} bytes, "
+                               f"baseline {expected['peak_bytes']:,} bytes")
+    return regressions
+
+
+def save_baseline(results: Dict[str, Dict[str, float]], path: str) -> None:
+    """Write results, with the environment they were measured in, to a JSON baseline."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    document = {
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor()
+        },
+        'results': results
+    }
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, float]]:
+    """Read the results of a JSON baseline."""
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def _sizes(text: str) -> List[int]:
+    return [int(float(value)) for value in text.split(',') if value]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark TechnicalIndicators and check for regressions")
+    parser.add_argument('--lengths', type=_sizes, default=DEFAULT_LENGTHS,
+                        help="Comma-separated series lengths, e.g. 1e2,1e4,1e6")
+    parser.add_argument('--universes', type=_sizes, default=DEFAULT_UNIVERSES,
+                        help="Comma-separated symbol counts for the batch form")
+    parser.add_argument('--batch-bars', type=int, default=DEFAULT_BATCH_BARS, help="Bars per symbol in the batch form")
+    parser.add_argument('--forms', type=lambda text: text.split(','), help="Only run these forms")
+    parser.add_argument('--indicators', type=lambda text: text.split(','), help="Only run these indicators")
+    parser.add_argument('--repeat', type=int, default=3, help="Timing rounds per case")
+    parser.add_argument('--quick', action='store_true', help="Small sizes only, for a fast check")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument('--save', action='store_true', help="Write the results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative throughput drop or memory growth (default 0.25)")
+    args = parser.parse_args(argv)
+
+    lengths, universes = args.lengths, args.universes
+    if args.quick:
+        lengths = [length for length in lengths if length <= 10**4]
+        universes = [symbols for symbols in universes if symbols <= 100]
+
+    results = run_benchmarks(lengths, universes, args.batch_bars, args.forms, args.indicators, args.repeat)
+
+    if args.save:
+        save_baseline(results, args.baseline)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save to create one")
+        return 0
+
+    regressions = compare(results, load_baseline(args.baseline), args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,158 @@
+import argparse
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from socketio import packet
+
+from payload_codec import PayloadCodec
+
+DEFAULT_POSITIONS = [10, 100, 1000]
+DEFAULT_CLIENTS = [1, 100, 1000]
+
+
+def make_snapshot(positions: int, orders: int = None, seed: int = 0) -> dict:
+    """A balance snapshot shaped like BalanceSnapshotBuilder's, with full-precision floats."""
+    rng = np.random.default_rng(seed)
+    orders = positions // 2 if orders is None else orders
+    prices = rng.uniform(5, 500, positions)
+    return {
+        'total_equity': float(rng.uniform(1e4, 1e7)),
+        'cash_balance': float(rng.uniform(1e3, 1e6)),
+        'buying_power': float(rng.uniform(1e3, 1e6)),
+        'daily_change': float(rng.normal(0, 500)),
+        'daily_change_pct': float(rng.normal(0, 1)),
+        'hourly_change': float(rng.normal(0, 100)),
+        'hourly_change_pct': float(rng.normal(0, 0.2)),
+        'stale': [],
+        'seq': 1,
+        'positions': [{'symbol': f"SYM{i}", 'qty': str(int(rng.integers(1, 1000))), 'side': 'long',
+                       'avg_entry_price': float(price * rng.uniform(0.9, 1.1)), 'current_price': float(price),
+                       'unrealized_pl': float(rng.normal(0, 100)), 'unrealized_plpc': float(rng.normal(0, 5))}
+                      for i, price in enumerate(prices)],
+        'orders': [{'id': f"order-{i}", 'symbol': f"SYM{i}", 'qty': '5', 'side': 'buy', 'type': 'limit',
+                    'limit_price': float(rng.uniform(5, 500)), 'submitted_at': '2024-01-02 15:30:00'}
+                   for i in range(orders)]
+    }
+
+
+def _packet(event: str, data) -> list:
+    """The Socket.IO packet for an event, as the list of parts sent on the wire."""
+    encoded = packet.Packet(packet.EVENT, data=[event, data]).encode()
+    return encoded if isinstance(encoded, list) else [encoded]
+
+
+def _wire_bytes(parts: list) -> int:
+    return sum(len(part.encode() if isinstance(part, str) else part) for part in parts)
+
+
+def _baseline(snapshot: dict, clients: int, codec: PayloadCodec) -> list:
+    # One emit per client, each encoding the full dict again
+    queued = []
+    for _ in range(clients):
+        parts = _packet('balance_update', snapshot)
+        queued.append(parts)
+    return parts
+
+
+def _encoded_once(fmt: str) -> Callable[[dict, int, PayloadCodec], list]:
+    def run(snapshot, clients, codec):
+        # One room emit: encoded once, the same packet queued for every client
+        parts = _packet('balance_update', codec.encode(snapshot, fmt))
+        queued = []
+        for _ in range(clients):
+            queued.append(parts)
+        return parts
+    return run
+
+
+MODES = {
+    'baseline': _baseline,
+    'json': _encoded_once('json'),
+    'msgpack': _encoded_once('msgpack')
+}
+
+
+def _cpu_time(run: Callable[[], None], repeat: int, min_time: float) -> float:
+    """Best CPU seconds per call over ``repeat`` rounds, each looping for at least ``min_time``."""
+    best = float('inf')
+    for _ in range(repeat):
+        number = 0
+        start = time.process_time()
+        while True:
+            run()
+            number += 1
+            elapsed = time.process_time() - start
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / number)
+    return best
+
+
+def run_benchmarks(positions: List[int] = DEFAULT_POSITIONS, clients: List[int] = DEFAULT_CLIENTS,
+                   modes: Optional[List[str]] = None, repeat: int = 3, min_time: float = 0.05,
+                   log: Callable[[str], None] = print) -> Dict[str, Dict[str, float]]:
+    """Measure the CPU and wire bytes of emitting one balance update to many clients.
+
+    Args:
+        positions (List[int], optional): Positions per snapshot; half as many open orders are added.
+        clients (List[int], optional): Clients the update is emitted to.
+        modes (List[str], optional): Only run these of MODES. Defaults to all that are available.
+        repeat (int, optional): Timing rounds; the best is kept. Defaults to 3.
+        min_time (float, optional): Minimum CPU seconds per timing round. Defaults to 0.05.
+        log (Callable[[str], None], optional): Progress output. Defaults to print.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Results keyed "mode/positions=N/clients=M" with the CPU
+        seconds per emitted update and the bytes each client receives.
+    """
+    codec = PayloadCodec()
+    modes = [mode for mode in (modes or MODES) if mode == 'baseline' or mode in codec.formats]
+    results = {}
+    for size in positions:
+        snapshot = make_snapshot(size)
+        for count in clients:
+            for mode in modes:
+                run = MODES[mode]
+                cpu = _cpu_time(lambda: run(snapshot, count, codec), repeat, min_time)
+                result = results[f"{mode}/positions={size}/clients={count}"] = {
+                    'cpu_seconds': cpu,
+                    'bytes': _wire_bytes(run(snapshot, 1, codec))
+                }
+                log(f"{mode:>9} positions={size:<6} clients={count:<6} {cpu * 1e3:>10.3f} ms CPU "
+                    f"{result['bytes']:>10,} bytes/client")
+    return results
+
+
+def _sizes(text: str) -> List[int]:
+    return [int(float(value)) for value in text.split(',') if value]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare the cost of emitting balance updates per payload format")
+    parser.add_argument('--positions', type=_sizes, default=DEFAULT_POSITIONS,
+                        help="Comma-separated positions per snapshot, e.g. 10,100,1000")
+    parser.add_argument('--clients', type=_sizes, default=DEFAULT_CLIENTS,
+                        help="Comma-separated client counts, e.g. 1,100,1000")
+    parser.add_argument('--modes', type=lambda text: text.split(','), help="Only run these modes")
+    parser.add_argument('--repeat', type=int, default=3, help="Timing rounds per case")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.positions, args.clients, args.modes, args.repeat)
+
+    # Savings against today's per-client path, at the largest case measured
+    size, count = max(args.positions), max(args.clients)
+    baseline = results.get(f"baseline/positions={size}/clients={count}")
+    if baseline is not None:
+        print(f"\nAt {size} positions and {count} clients, against the baseline:")
+        for mode in MODES:
+            result = results.get(f"{mode}/positions={size}/clients={count}")
+            if mode != 'baseline' and result is not None:
+                print(f"  {mode:>7}: {baseline['cpu_seconds'] / result['cpu_seconds']:,.1f}x less CPU, "
+                      f"{1 - result['bytes'] / baseline['bytes']:.0%} fewer bytes")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
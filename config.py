@@ -22,8 +22,32 @@ class Config:
     MAX_TOTAL_RISK_PERCENT = 0.1  # 10% total portfolio risk
     CORRELATION_THRESHOLD = 0.7  # Stock correlation threshold
 
+    # Balance tracker: 'thread' (blocking REST client), 'async' (aiohttp event loop)
+    # or 'stream' (trade_updates WebSocket, reconciled with REST every STREAM_RECONCILE_INTERVAL seconds)
+    BALANCE_TRACKER_MODE = os.getenv('BALANCE_TRACKER_MODE', 'thread').lower()
+    # Seconds an account snapshot is shared before the API is asked again
+    ACCOUNT_SNAPSHOT_TTL = float(os.getenv('ACCOUNT_SNAPSHOT_TTL', '2.0'))
+    STREAM_RECONCILE_INTERVAL = float(os.getenv('STREAM_RECONCILE_INTERVAL', '60'))
+    # SQLite file for the persistent equity series; empty keeps hour/day anchors in memory only
+    EQUITY_DB_PATH = os.getenv('EQUITY_DB_PATH', 'equity.db')
+    # Keep a local order history synced incrementally (thread and stream trackers only)
+    TRACK_ORDER_HISTORY = os.getenv('TRACK_ORDER_HISTORY', 'false').lower() == 'true'
+
+    # Dashboard server: 'dev' (Werkzeug, a thread per connection) or, for production,
+    # 'eventlet' / 'gevent' (green threads; the package must be installed)
+    SERVER_MODE = os.getenv('SERVER_MODE', 'dev').lower()
+    SERVER_PORT = int(os.getenv('SERVER_PORT', '5001'))
+    # Most concurrent connections served in the green modes
+    SERVER_MAX_CONNECTIONS = int(os.getenv('SERVER_MAX_CONNECTIONS', '2000'))
+    # Packets a dashboard client may have waiting before new frames skip it
+    CLIENT_QUEUE_SIZE = int(os.getenv('CLIENT_QUEUE_SIZE', '16'))
+    # Decimals floats in dashboard payloads are rounded to
+    PAYLOAD_PRECISION = int(os.getenv('PAYLOAD_PRECISION', '4'))
+
     # Logging and Monitoring
     LOG_LEVEL = 'INFO'
+    # Seconds between the log batches sent to the dashboard
+    LOG_BATCH_INTERVAL = float(os.getenv('LOG_BATCH_INTERVAL', '0.25'))
     TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')
     TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID', '')
 
@@ -0,0 +1,173 @@
+import logging
+
+from payload_codec import PayloadCodec
+
+logger = logging.getLogger(__name__)
+
+class DashboardFanout:
+    """
+    Room-based fan-out of dashboard events with per-client backpressure.
+
+    Clients join an 'account:<name>' room for each account they view and a
+    'symbol:<SYMBOL>' room for each symbol they view, and publish() emits to
+    one room:
+
+    - An event for a room without members is skipped before its payload is
+      built, so nothing is serialized while nobody is watching.
+    - Otherwise the payload is encoded once per payload format (see
+      PayloadCodec) and the same packet is queued for every member using
+      that format. Clients of each format share a sub-room, '<room>/<format>'
+      for all but 'json', so no per-client filtering is needed.
+    - A member whose outbound queue already holds max_queued packets is
+      skipped, so a slow browser loses stale frames instead of growing server
+      memory. Deltas it misses show up as a sequence gap, and the client then
+      asks for a full snapshot.
+
+    Usage:
+        fanout = DashboardFanout(socketio)
+        fanout.connect(request.sid, fmt=auth.get('format'))
+        fanout.subscribe(request.sid, accounts=['default'], symbols=['AAPL'])
+        fanout.publish(fanout.account_room('default'), 'balance_delta', delta)
+    """
+    def __init__(self, socketio, max_queued=16, max_symbols=50, namespace='/', codec=None):
+        """
+        Initialize the fan-out.
+
+        Args:
+            socketio: flask_socketio.SocketIO instance
+            max_queued: Packets a client may have waiting before new frames skip it
+            max_symbols: Most symbol rooms one client may join
+            namespace: Socket.IO namespace the rooms live in
+            codec: PayloadCodec; a default one if None
+        """
+        self.socketio = socketio
+        self.max_queued = max_queued
+        self.max_symbols = max_symbols
+        self.namespace = namespace
+        self.codec = codec or PayloadCodec()
+        self.formats = {}  # sid -> payload format
+        self.dropped = 0  # Frames skipped for slow clients
+
+    @property
+    def _manager(self):
+        return self.socketio.server.manager
+
+    @staticmethod
+    def account_room(account):
+        return f"account:{account}"
+
+    @staticmethod
+    def symbol_room(symbol):
+        return f"symbol:{symbol.upper()}"
+
+    @staticmethod
+    def _format_room(room, fmt):
+        return room if fmt == 'json' else f"{room}/{fmt}"
+
+    def connect(self, sid, fmt=None):
+        """
+        Register a client and settle its payload format.
+
+        Args:
+            sid: Socket.IO session id
+            fmt: Format the client asked for, or None for 'json'
+
+        Returns:
+            dict: The codec's description of the format, for the client's 'payload_format' event
+        """
+        fmt = self.formats[sid] = self.codec.negotiate(fmt)
+        return self.codec.describe(fmt)
+
+    def disconnect(self, sid):
+        """Forget a client; Socket.IO removes it from its rooms"""
+        self.formats.pop(sid, None)
+
+    def _rooms_for(self, accounts, symbols):
+        accounts = [account for account in accounts or () if isinstance(account, str)]
+        symbols = [symbol for symbol in symbols or () if isinstance(symbol, str)]
+        return ([self.account_room(account) for account in accounts] +
+                [self.symbol_room(symbol) for symbol in symbols])
+
+    def subscribe(self, sid, accounts=(), symbols=()):
+        """
+        Add a client to the rooms of accounts and symbols.
+
+        Args:
+            sid: Socket.IO session id
+            accounts: Account names
+            symbols: Ticker symbols; past max_symbols in total the rest are ignored
+
+        Returns:
+            list: Rooms the client joined
+        """
+        joined = []
+        fmt = self.formats.get(sid, 'json')
+        symbol_rooms = sum(1 for room in self._manager.get_rooms(sid, self.namespace)
+                           if isinstance(room, str) and room.startswith('symbol:'))
+        for room in self._rooms_for(accounts, symbols):
+            if room.startswith('symbol:'):
+                if symbol_rooms >= self.max_symbols:
+                    logger.warning(f"Client {sid} is at {self.max_symbols} symbols; not joining {room}")
+                    continue
+                symbol_rooms += 1
+            self.socketio.server.enter_room(sid, self._format_room(room, fmt), namespace=self.namespace)
+            joined.append(room)
+        return joined
+
+    def unsubscribe(self, sid, accounts=(), symbols=()):
+        """Remove a client from the rooms of accounts and symbols"""
+        fmt = self.formats.get(sid, 'json')
+        for room in self._rooms_for(accounts, symbols):
+            self.socketio.server.leave_room(sid, self._format_room(room, fmt), namespace=self.namespace)
+
+    def members(self, room, fmt='json'):
+        """(sid, eio_sid) pairs of the clients of one payload format in a room"""
+        return list(self._manager.get_participants(self.namespace, self._format_room(room, fmt)))
+
+    def subscribed_symbols(self):
+        """Symbols with at least one client in their room, in any format"""
+        rooms = self._manager.rooms.get(self.namespace, {})
+        return list({room[len('symbol:'):].split('/')[0] for room, participants in list(rooms.items())
+                     if isinstance(room, str) and room.startswith('symbol:') and participants})
+
+    def _queued(self, eio_sid):
+        """Packets waiting in a client's Engine.IO queue, 0 if the socket is gone"""
+        socket = self.socketio.server.eio.sockets.get(eio_sid)
+        return socket.queue.qsize() if socket is not None else 0
+
+    def send(self, sid, event, data):
+        """Emit an event to one client, encoded in its payload format"""
+        fmt = self.formats.get(sid, 'json')
+        self.socketio.emit(event, self.codec.encode(data, fmt), to=sid, namespace=self.namespace)
+
+    def publish(self, room, event, payload):
+        """
+        Emit an event to every client in a room that is keeping up.
+
+        Args:
+            room: Room name, from account_room() or symbol_room()
+            event: Event name
+            payload: The data, or a callable building it; it is only called if the room has members
+
+        Returns:
+            int: Clients the event was queued for
+        """
+        data = None
+        sent = 0
+        for fmt in self.codec.formats:
+            members = self.members(room, fmt)
+            if not members:
+                continue
+            slow = [sid for sid, eio_sid in members if self._queued(eio_sid) >= self.max_queued]
+            if slow:
+                self.dropped += len(slow)
+                logger.debug(f"Skipping {event} for {len(slow)} slow {fmt} clients in {room}")
+                if len(slow) == len(members):
+                    continue
+
+            if data is None:
+                data = payload() if callable(payload) else payload
+            self.socketio.emit(event, self.codec.encode(data, fmt), to=self._format_room(room, fmt),
+                               skip_sid=slow, namespace=self.namespace)
+            sent += len(members) - len(slow)
+        return sent
@@ -0,0 +1,218 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from market_calendar import EXCHANGE_TIMEZONE
+
+# Rollup tables and the fixed bucket width of each, in seconds. Day buckets
+# start at exchange-local midnight instead, so they are not a fixed width.
+ROLLUPS = {'minute': 60, 'hour': 3600, 'day': None}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS equity_samples (
+    ts REAL NOT NULL,
+    equity REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS equity_samples_ts ON equity_samples (ts);
+""" + "".join(f"""
+CREATE TABLE IF NOT EXISTS equity_{name} (
+    bucket INTEGER PRIMARY KEY,
+    open REAL NOT NULL,
+    high REAL NOT NULL,
+    low REAL NOT NULL,
+    close REAL NOT NULL,
+    first_ts REAL NOT NULL,
+    last_ts REAL NOT NULL,
+    samples INTEGER NOT NULL
+);
+""" for name in ROLLUPS)
+
+# Merge a pre-aggregated batch bucket into a rollup row
+_UPSERT = """
+INSERT INTO equity_{name} (bucket, open, high, low, close, first_ts, last_ts, samples)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (bucket) DO UPDATE SET
+    open = CASE WHEN excluded.first_ts < first_ts THEN excluded.open ELSE open END,
+    high = MAX(high, excluded.high),
+    low = MIN(low, excluded.low),
+    close = CASE WHEN excluded.last_ts >= last_ts THEN excluded.close ELSE close END,
+    first_ts = MIN(first_ts, excluded.first_ts),
+    last_ts = MAX(last_ts, excluded.last_ts),
+    samples = samples + excluded.samples
+"""
+
+class EquityStore:
+    """
+    Persistent equity time series in SQLite.
+
+    Samples are buffered and written in batches, in WAL mode so readers never
+    block the writer. Every batch also updates minute, hour and day rollup
+    tables (open/high/low/close per bucket), so anchors and history queries
+    read a handful of rollup rows instead of scanning the raw samples.
+
+    Usage:
+        store = EquityStore('equity.db')
+        store.record(time.time(), 10000.0)
+        hour_anchor = store.value_at(store.hour_start(time.time()))
+    """
+    def __init__(self, path, batch_size=100, flush_interval=5.0, timezone=EXCHANGE_TIMEZONE):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timezone = ZoneInfo(timezone)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+        self._pending = []  # (ts, equity) not yet written, in time order
+        self._last_flush = time.monotonic()
+        self._anchors = {}  # anchor ts -> equity, for boundaries already resolved
+        row = self._conn.execute('SELECT MAX(last_ts) FROM equity_day').fetchone()
+        self._latest_ts = row[0]
+
+    def day_start(self, ts):
+        """Epoch seconds of exchange-local midnight on the day containing ts"""
+        local = datetime.fromtimestamp(ts, self.timezone)
+        return local.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+    def hour_start(self, ts):
+        """Epoch seconds of the top of the hour containing ts"""
+        return ts - ts % 3600
+
+    def _bucket(self, name, ts, day_cache):
+        width = ROLLUPS[name]
+        if width is not None:
+            return int(ts // width * width)
+        # Day buckets: one timezone conversion per distinct UTC hour in the batch
+        hour = int(ts // 3600)
+        if hour not in day_cache:
+            day_cache[hour] = int(self.day_start(ts))
+        return day_cache[hour]
+
+    def record(self, ts, equity):
+        """
+        Buffer an equity sample, writing the batch once it is full or old enough.
+
+        Args:
+            ts: Sample time in epoch seconds; samples are expected in time order
+            equity: Account equity
+        """
+        with self._lock:
+            self._pending.append((float(ts), float(equity)))
+            self._latest_ts = float(ts)
+            due = (len(self._pending) >= self.batch_size or
+                   time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write buffered samples and fold them into the rollups in one transaction"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+            if not pending:
+                return
+
+            day_cache = {}
+            rows = {}
+            for name in ROLLUPS:
+                buckets = {}
+                for ts, equity in pending:
+                    bucket = self._bucket(name, ts, day_cache)
+                    row = buckets.get(bucket)
+                    if row is None:
+                        buckets[bucket] = [bucket, equity, equity, equity, equity, ts, ts, 1]
+                    else:
+                        row[2] = max(row[2], equity)
+                        row[3] = min(row[3], equity)
+                        if ts >= row[6]:
+                            row[4], row[6] = equity, ts
+                        if ts < row[5]:
+                            row[1], row[5] = equity, ts
+                        row[7] += 1
+                rows[name] = list(buckets.values())
+
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany('INSERT INTO equity_samples (ts, equity) VALUES (?, ?)', pending)
+                for name, bucket_rows in rows.items():
+                    self._conn.executemany(_UPSERT.format(name=name), bucket_rows)
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                # Keep the samples for the next attempt
+                self._pending = pending + self._pending
+                raise
+
+    def value_at(self, ts):
+        """
+        Equity at a point in time: the last sample before ts, or failing that the
+        first sample at or after it.
+
+        Reads at most two minute-rollup rows plus the unwritten buffer, so it is
+        cheap regardless of how long the series is. ts should be minute-aligned,
+        as hour and day boundaries are.
+
+        Args:
+            ts: Epoch seconds
+
+        Returns:
+            float: The equity, or None if there are no samples at all
+        """
+        with self._lock:
+            if ts in self._anchors:
+                return self._anchors[ts]
+
+            # Unwritten samples are newer than anything in the database
+            before = [equity for sample_ts, equity in self._pending if sample_ts < ts]
+            value = before[-1] if before else None
+            if value is None:
+                row = self._conn.execute(
+                    'SELECT close FROM equity_minute WHERE bucket < ? ORDER BY bucket DESC LIMIT 1', (ts,)).fetchone()
+                if row is None:
+                    row = self._conn.execute(
+                        'SELECT open FROM equity_minute WHERE bucket >= ? ORDER BY bucket LIMIT 1', (ts,)).fetchone()
+                if row is not None:
+                    value = row[0]
+                elif self._pending:
+                    value = self._pending[0][1]
+
+            # Samples arrive in time order, so once one exists past ts the answer is final
+            if value is not None and self._latest_ts is not None and self._latest_ts >= ts:
+                self._anchors[ts] = value
+                if len(self._anchors) > 16:
+                    self._anchors.pop(next(iter(self._anchors)))
+            return value
+
+    def history(self, resolution='hour', start=None, end=None):
+        """
+        Rollup bars for a time range.
+
+        Args:
+            resolution: 'minute', 'hour' or 'day'
+            start: Earliest bucket start in epoch seconds, or None
+            end: Latest bucket start in epoch seconds, or None
+
+        Returns:
+            list: Dicts with bucket, open, high, low, close and samples, oldest first
+        """
+        if resolution not in ROLLUPS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        self.flush()
+        with self._lock:
+            cursor = self._conn.execute(
+                f'SELECT bucket, open, high, low, close, samples FROM equity_{resolution} '
+                'WHERE bucket >= ? AND bucket <= ? ORDER BY bucket',
+                (start if start is not None else 0, end if end is not None else 2 ** 62))
+            return [dict(zip(('bucket', 'open', 'high', 'low', 'close', 'samples'), row)) for row in cursor]
+
+    def close(self):
+        """Write any buffered samples and close the database"""
+        self.flush()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,116 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from indicators import TechnicalIndicators
+from ohlcv_buffer import OHLCVRingBuffer
+
+
+class IndicatorCache:
+    """
+    Bounded LRU memoization layer in front of TechnicalIndicators.
+
+    Entries are keyed by symbol, indicator name, parameters and the timestamp of the
+    last bar the result was computed on, so a new bar never hits a stale entry. When
+    a result for a newer bar is stored, the entry for the previous bar of the same
+    symbol, indicator and parameters is dropped right away instead of waiting to age
+    out of the LRU.
+
+    Cached results are shared between callers and must be treated as read-only.
+    """
+    def __init__(self, max_entries: int = 4096):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._latest: Dict[tuple, Hashable] = {}
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compute(self, symbol: str, indicator: str, last_timestamp: Hashable,
+                       compute: Callable[[], Any], **params) -> Any:
+        """Return the cached result, computing and storing it on a miss.
+
+        Args:
+            symbol (str): The symbol the result belongs to.
+            indicator (str): Name of the indicator, e.g. "calculate_rsi".
+            last_timestamp (Hashable): Timestamp of the last bar the result covers.
+            compute (Callable[[], Any]): Computes the result on a miss.
+            **params: Indicator parameters; part of the key.
+
+        Returns:
+            Any: The indicator result.
+        """
+        series_key = (symbol, indicator, tuple(sorted(params.items())))
+        key = series_key + (last_timestamp,)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Compute outside the lock so slow indicators do not serialize other callers
+        result = compute()
+
+        with self._lock:
+            previous = self._latest.get(series_key)
+            if previous is not None and previous != last_timestamp:
+                if self._entries.pop(series_key + (previous,), None) is not None:
+                    self.invalidations += 1
+            self._latest[series_key] = last_timestamp
+
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted_key, _ = self._entries.popitem(last=False)
+                evicted_series = evicted_key[:3]
+                if self._latest.get(evicted_series) == evicted_key[3]:
+                    del self._latest[evicted_series]
+                self.evictions += 1
+        return result
+
+    def calculate(self, indicator: str, buffer: OHLCVRingBuffer, symbol: Optional[str] = None, **params) -> Any:
+        """Call a TechnicalIndicators method on a buffer through the cache.
+
+        Args:
+            indicator (str): Method name, e.g. "calculate_rsi" or "calculate_bollinger_bands".
+            buffer (OHLCVRingBuffer): The bars to compute on.
+            symbol (str, optional): Cache key symbol. Defaults to ``buffer.symbol``.
+            **params: Keyword arguments for the indicator; part of the key.
+
+        Returns:
+            Any: The indicator result.
+        """
+        method = getattr(TechnicalIndicators, indicator)
+        symbol = buffer.symbol if symbol is None else symbol
+        return self.get_or_compute(symbol, indicator, (len(buffer), buffer.last_timestamp),
+                                   lambda: method(buffer, **params), **params)
+
+    def clear(self) -> None:
+        """Drop every entry; the counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._latest.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss/eviction counters for sizing the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
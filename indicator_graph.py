@@ -0,0 +1,295 @@
+import re
+from collections import namedtuple
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+
+from indicators import (
+    _as_matrix, _bar_age, _cumulative_sum, _ema_kernel, _lag, _rolling_std, _true_range, _window_mean
+)
+from ohlcv_buffer import OHLCVStore
+
+# A computed node: a (symbols x bars) matrix and the first valid bar of each row
+_Value = namedtuple('_Value', ['matrix', 'first'])
+
+
+class Node:
+    """
+    One step of a FeaturePlan. Nodes are hash-consed on ``(op, inputs, params)``,
+    so asking for the same computation twice returns the same node.
+    """
+    __slots__ = ('op', 'inputs', 'params', 'key')
+
+    def __init__(self, op: str, inputs: tuple, params: tuple):
+        self.op = op
+        self.inputs = inputs
+        self.params = params
+        self.key = (op, tuple(node.key for node in inputs), params)
+
+    def __repr__(self) -> str:
+        params = ', '.join(f"{name}={value}" for name, value in self.params)
+        return f"Node({self.op}{', ' + params if params else ''})"
+
+
+def _padded(value: np.ndarray, age: np.ndarray) -> np.ndarray:
+    """Restore NaN on the padding bars of a result."""
+    return np.where(age < 0, np.nan, value)
+
+
+def _op_column(data, name):
+    matrix, first = _as_matrix(data[name])
+    return _Value(matrix, first)
+
+
+def _op_lag(x):
+    return _Value(_lag(x.matrix), x.first + 1)
+
+
+def _op_sub(a, b):
+    return _Value(a.matrix - b.matrix, np.maximum(a.first, b.first))
+
+
+def _op_div(a, b):
+    return _Value(a.matrix / b.matrix, np.maximum(a.first, b.first))
+
+
+def _op_gains(x):
+    return _Value(np.clip(x.matrix, 0, None), x.first)
+
+
+def _op_losses(x):
+    return _Value(np.clip(-x.matrix, 0, None), x.first)
+
+
+def _op_cumsum(x):
+    return _Value(_cumulative_sum(x.matrix), x.first)
+
+
+def _op_window_mean(cumsum, window):
+    return _Value(_window_mean(cumsum.matrix, window, cumsum.first), cumsum.first)
+
+
+def _op_rolling_std(x, window):
+    return _Value(_rolling_std(x.matrix, window, x.first), x.first)
+
+
+def _op_ema(x, alpha):
+    return _Value(_ema_kernel(x.matrix, alpha), x.first)
+
+
+def _op_true_range(high, low, close):
+    return _Value(_true_range(high.matrix, low.matrix, close.matrix), close.first + 1)
+
+
+def _op_sma(price, mean, window):
+    age = _bar_age(price.first, price.matrix.shape[1])
+    return _Value(np.where(age < window - 1, price.matrix, mean.matrix), price.first)
+
+
+def _op_band_width(price, std, period):
+    age = _bar_age(price.first, price.matrix.shape[1])
+    return _Value(_padded(np.where(age < period - 1, 0.0, std.matrix), age), price.first)
+
+
+def _op_band(middle, width, num_std):
+    return _Value(middle.matrix + width.matrix * num_std, middle.first)
+
+
+def _op_volatility(price, std, window):
+    age = _bar_age(price.first, price.matrix.shape[1])
+    return _Value(_padded(np.where(age < window - 1, 0.0, std.matrix * np.sqrt(252)), age), price.first)
+
+
+def _op_atr(close, average):
+    age = _bar_age(close.first, close.matrix.shape[1])
+    return _Value(_padded(np.where(age == 0, 0.0, average.matrix), age), close.first)
+
+
+def _op_rsi(price, avg_gain, avg_loss, period):
+    age = _bar_age(price.first, price.matrix.shape[1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - (100 / (1 + avg_gain.matrix / avg_loss.matrix))
+    rsi = np.where(avg_loss.matrix == 0, 100.0, rsi)
+    return _Value(_padded(np.where(age < period, 50.0, rsi), age), price.first)
+
+
+def _op_macd_warmup(price, line, slow_period):
+    age = _bar_age(price.first, price.matrix.shape[1])
+    return _Value(_padded(np.where(age < slow_period - 1, 0.0, line.matrix), age), price.first)
+
+
+_OPS = {
+    'lag': _op_lag,
+    'sub': _op_sub,
+    'div': _op_div,
+    'gains': _op_gains,
+    'losses': _op_losses,
+    'cumsum': _op_cumsum,
+    'window_mean': _op_window_mean,
+    'rolling_std': _op_rolling_std,
+    'ema': _op_ema,
+    'true_range': _op_true_range,
+    'sma': _op_sma,
+    'band_width': _op_band_width,
+    'band': _op_band,
+    'volatility': _op_volatility,
+    'atr': _op_atr,
+    'rsi': _op_rsi,
+    'macd_warmup': _op_macd_warmup,
+}
+
+
+class FeaturePlan:
+    """
+    Plans the computation of a set of named features as a DAG of shared steps.
+
+    Feature names follow ``Config.FEATURE_COLUMNS``:
+
+    - ``open``, ``high``, ``low``, ``close``, ``volume``
+    - ``sma_<window>``, ``ema_<span>``, ``rsi_<period>``, ``atr_<period>``, ``volatility_<window>``
+    - ``macd``, ``signal_line``, ``macd_hist``, optionally suffixed ``_<fast>_<slow>_<signal>``
+    - ``bbands_upper``, ``bbands_middle``, ``bbands_lower``, optionally suffixed
+      ``_<period>`` or ``_<period>_<num_std>``
+
+    Intermediates such as lagged closes, deltas, returns, running sums and EMAs are
+    created once and shared between every feature that needs them, and only the
+    steps reachable from the requested features are planned. Evaluation runs each
+    step once over (symbols x bars) matrices and gives the same values as the
+    ``TechnicalIndicators.*_batch`` methods.
+    """
+    def __init__(self, features: List[str]):
+        self.features = list(features)
+        self.nodes: List[Node] = []
+        self._nodes_by_key: Dict[tuple, Node] = {}
+        self.outputs: Dict[str, Node] = {}
+        for feature in self.features:
+            self.outputs[feature] = self._plan_feature(feature)
+
+    def node(self, op: str, *inputs: Node, **params) -> Node:
+        """Return the node for ``op`` over ``inputs``, creating it if it is new."""
+        node = Node(op, inputs, tuple(sorted(params.items())))
+        existing = self._nodes_by_key.get(node.key)
+        if existing is not None:
+            return existing
+        self._nodes_by_key[node.key] = node
+        self.nodes.append(node)
+        return node
+
+    def column(self, name: str) -> Node:
+        return self.node('column', name=name)
+
+    def _delta(self, price: Node) -> Node:
+        return self.node('sub', price, self.node('lag', price))
+
+    def _mean(self, values: Node, window: int) -> Node:
+        return self.node('window_mean', self.node('cumsum', values), window=window)
+
+    def _sma(self, price: Node, window: int) -> Node:
+        return self.node('sma', price, self._mean(price, window), window=window)
+
+    def _ema(self, values: Node, span: int) -> Node:
+        return self.node('ema', values, alpha=2.0 / (span + 1))
+
+    def _plan_feature(self, feature: str) -> Node:
+        """Add the nodes of one feature and return its output node."""
+        if feature in ('open', 'high', 'low', 'close', 'volume'):
+            return self.column(feature)
+        close = self.column('close')
+
+        match = re.fullmatch(r'sma_(\d+)', feature)
+        if match:
+            return self._sma(close, int(match.group(1)))
+
+        match = re.fullmatch(r'ema_(\d+)', feature)
+        if match:
+            return self._ema(close, int(match.group(1)))
+
+        match = re.fullmatch(r'rsi_(\d+)', feature)
+        if match:
+            period = int(match.group(1))
+            delta = self._delta(close)
+            avg_gain = self._mean(self.node('gains', delta), period)
+            avg_loss = self._mean(self.node('losses', delta), period)
+            return self.node('rsi', close, avg_gain, avg_loss, period=period)
+
+        match = re.fullmatch(r'atr_(\d+)', feature)
+        if match:
+            true_range = self.node('true_range', self.column('high'), self.column('low'), close)
+            return self.node('atr', close, self._mean(true_range, int(match.group(1))))
+
+        match = re.fullmatch(r'volatility_(\d+)', feature)
+        if match:
+            window = int(match.group(1))
+            returns = self.node('div', self._delta(close), self.node('lag', close))
+            return self.node('volatility', close, self.node('rolling_std', returns, window=window), window=window)
+
+        match = re.fullmatch(r'(macd|signal_line|macd_hist)(?:_(\d+)_(\d+)_(\d+))?', feature)
+        if match:
+            fast, slow, signal = (int(value) for value in match.groups()[1:]) if match.group(2) else (12, 26, 9)
+            raw_macd = self.node('sub', self._ema(close, fast), self._ema(close, slow))
+            macd_line = self.node('macd_warmup', close, raw_macd, slow_period=slow)
+            signal_line = self.node('macd_warmup', close, self._ema(raw_macd, signal), slow_period=slow)
+            if match.group(1) == 'macd':
+                return macd_line
+            if match.group(1) == 'signal_line':
+                return signal_line
+            return self.node('sub', macd_line, signal_line)
+
+        match = re.fullmatch(r'bbands_(upper|middle|lower)(?:_(\d+)(?:_(\d+(?:\.\d+)?))?)?', feature)
+        if match:
+            period = int(match.group(2)) if match.group(2) else 20
+            num_std = float(match.group(3)) if match.group(3) else 2.0
+            middle = self._sma(close, period)
+            if match.group(1) == 'middle':
+                return middle
+            width = self.node('band_width', close, self.node('rolling_std', close, window=period), period=period)
+            return self.node('band', middle, width, num_std=num_std if match.group(1) == 'upper' else -num_std)
+
+        raise ValueError(f"Unknown feature: {feature}")
+
+    def evaluate(self, data: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Evaluate the plan over (symbols x bars) matrices.
+
+        Args:
+            data (Mapping[str, np.ndarray]): Matrices by column name ("open", "high", "low",
+                "close", "volume"), right-aligned and NaN-padded on the left. Only the
+                columns the plan uses are read.
+
+        Returns:
+            Dict[str, np.ndarray]: A (symbols x bars) matrix per requested feature.
+        """
+        # Drop each intermediate as soon as its last consumer has run
+        last_use = {}
+        for index, node in enumerate(self.nodes):
+            for input_node in node.inputs:
+                last_use[input_node.key] = index
+        keep = {node.key for node in self.outputs.values()}
+
+        values = {}
+        for index, node in enumerate(self.nodes):
+            params = dict(node.params)
+            if node.op == 'column':
+                values[node.key] = _op_column(data, params['name'])
+            else:
+                values[node.key] = _OPS[node.op](*(values[input_node.key] for input_node in node.inputs), **params)
+            for input_node in node.inputs:
+                if last_use[input_node.key] == index and input_node.key not in keep:
+                    del values[input_node.key]
+
+        return {feature: values[node.key].matrix for feature, node in self.outputs.items()}
+
+    def evaluate_store(self, store: OHLCVStore, symbols: Optional[List[str]] = None,
+                       n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Evaluate the plan over the buffers of an OHLCVStore.
+
+        Args:
+            store (OHLCVStore): The per-symbol bars.
+            symbols (List[str], optional): Row order. Defaults to every stored symbol.
+            n (int, optional): Number of bars. Defaults to the longest stored history.
+
+        Returns:
+            Dict[str, np.ndarray]: A (symbols x bars) matrix per requested feature.
+        """
+        symbols = list(store.buffers) if symbols is None else symbols
+        columns = {dict(node.params)['name'] for node in self.nodes if node.op == 'column'}
+        return self.evaluate({name: store.matrix(name, n, symbols) for name in columns})
@@ -1,27 +1,39 @@
+import hashlib
+import math
+from collections import deque
 import numpy as np
-from typing import List, Dict, Union
+from typing import List, Dict, Optional, Tuple, Union
 import pandas as pd
+from market_calendar import CALENDAR
+from ohlcv_buffer import OHLCVRingBuffer
+
+# Share of the volume the value area of a volume profile holds
+VALUE_AREA_FRACTION = 0.7
+
+# Prices may be given as a list, an array, or an OHLCVRingBuffer whose closes are used
+PriceInput = Union[List[float], np.ndarray, OHLCVRingBuffer]
 
 class TechnicalIndicators:
     """
     A class that calculates various technical indicators.
     """
     @staticmethod
-    def calculate_moving_averages(prices: List[float], short_window: int = 5, long_window: int = 20) -> Dict[str, float]:
+    def calculate_moving_averages(prices: PriceInput, short_window: int = 5, long_window: int = 20) -> Dict[str, float]:
         """Calculate short and long-term moving averages.
 
         Args:
-            prices (List[float]): A list of prices.
+            prices (PriceInput): A list or array of prices, or an OHLCVRingBuffer.
             short_window (int, optional): The short-term window. Defaults to 5.
             long_window (int, optional): The long-term window. Defaults to 20.
 
         Returns:
             Dict[str, float]: A dictionary containing the short and long-term moving averages.
         """
+        prices = _closes(prices)
         if len(prices) < long_window:
             return {"sma_short": prices[-1], "sma_long": prices[-1]}
         
-        prices_array = np.array(prices)
+        prices_array = np.asarray(prices[-max(short_window, long_window):], dtype=float)
         sma_short = np.mean(prices_array[-short_window:])
         sma_long = np.mean(prices_array[-long_window:])
         
@@ -31,70 +43,68 @@ class TechnicalIndicators:
         }
 
     @staticmethod
-    def calculate_volatility(prices: List[float], window: int = 20) -> float:
+    def calculate_volatility(prices: PriceInput, window: int = 20) -> float:
         """Calculate price volatility using standard deviation.
 
         Args:
-            prices (List[float]): A list of prices.
+            prices (PriceInput): A list or array of prices, or an OHLCVRingBuffer.
             window (int, optional): The window for calculating volatility. Defaults to 20.
 
         Returns:
             float: The calculated volatility.
         """
+        prices = _closes(prices)
         if len(prices) < window:
             return 0.0
         
-        returns = np.diff(prices) / prices[:-1]
+        # Only the last window returns are used
+        prices_array = np.asarray(prices[-(window + 1):], dtype=float)
+        returns = np.diff(prices_array) / prices_array[:-1]
         volatility = np.std(returns[-window:]) * np.sqrt(252)  # Annualized volatility
         return volatility
 
     @staticmethod
-    def calculate_atr(high: List[float], low: List[float], close: List[float], period: int = 14) -> float:
+    def calculate_atr(high: Union[List[float], OHLCVRingBuffer], low: Optional[List[float]] = None,
+                      close: Optional[List[float]] = None, period: int = 14) -> float:
         """Calculate Average True Range (ATR).
 
         Args:
-            high (List[float]): A list of high prices.
-            low (List[float]): A list of low prices.
-            close (List[float]): A list of close prices.
+            high (List[float]): A list of high prices, or an OHLCVRingBuffer to take
+                the high, low and close prices from.
+            low (List[float], optional): A list of low prices.
+            close (List[float], optional): A list of close prices.
             period (int, optional): The period for calculating ATR. Defaults to 14.
 
         Returns:
             float: The calculated ATR.
         """
+        high, low, close = _high_low_close(high, low, close)
         if len(high) < 2:
             return 0.0
         
-        tr_list = []
-        for i in range(1, len(high)):
-            tr = max(
-                high[i] - low[i],  # Current high - current low
-                abs(high[i] - close[i-1]),  # Current high - previous close
-                abs(low[i] - close[i-1])  # Current low - previous close
-            )
-            tr_list.append(tr)
-        
-        if not tr_list:
-            return 0.0
-            
-        atr = np.mean(tr_list[-period:])
+        # Only the last period true ranges are used
+        bars = period + 1
+        true_range = _true_range(_as_row(high[-bars:]), _as_row(low[-bars:]), _as_row(close[-bars:]))[0, 1:]
+        atr = np.mean(true_range)
         return atr
 
     @staticmethod
-    def calculate_rsi(prices: List[float], period: int = 14) -> float:
+    def calculate_rsi(prices: PriceInput, period: int = 14) -> float:
         """Calculate Relative Strength Index (RSI).
 
         Args:
-            prices (List[float]): A list of prices.
+            prices (PriceInput): A list or array of prices, or an OHLCVRingBuffer.
             period (int, optional): The period for calculating RSI. Defaults to 14.
 
         Returns:
             float: The calculated RSI.
         """
+        prices = _closes(prices)
         if len(prices) < period + 1:
             return 50.0
         
-        # Calculate price changes
-        delta = np.diff(prices)
+        # Calculate price changes over the last period
+        delta = np.diff(np.asarray(prices[-(period + 1):], dtype=float))
         
         # Separate gains and losses
         gains = np.where(delta > 0, delta, 0)
@@ -113,32 +123,30 @@ class TechnicalIndicators:
         return rsi
 
     @staticmethod
-    def calculate_macd(prices: List[float], fast_period: int = 12, slow_period: int = 26, signal_period: int = 9) -> Dict[str, float]:
+    def calculate_macd(prices: PriceInput, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9,
+                       cache: Optional[dict] = None) -> Dict[str, float]:
         """Calculate MACD (Moving Average Convergence Divergence).
 
         Args:
-            prices (List[float]): A list of prices.
+            prices (PriceInput): A list or array of prices, or an OHLCVRingBuffer.
             fast_period (int, optional): The fast period for MACD. Defaults to 12.
             slow_period (int, optional): The slow period for MACD. Defaults to 26.
             signal_period (int, optional): The signal period for MACD. Defaults to 9.
+            cache (dict, optional): Scratch dictionary shared by EMA-based calls on the same
+                ``prices`` so each EMA is computed once. Defaults to None.
 
         Returns:
             Dict[str, float]: A dictionary containing the MACD line, signal line, and histogram.
         """
+        prices = _closes(prices)
         if len(prices) < slow_period:
             return {"macd": 0.0, "signal": 0.0, "histogram": 0.0}
         
-        # Calculate EMAs
-        ema_fast = pd.Series(prices).ewm(span=fast_period, adjust=False).mean().iloc[-1]
-        ema_slow = pd.Series(prices).ewm(span=slow_period, adjust=False).mean().iloc[-1]
-        
-        # Calculate MACD line
-        macd_line = ema_fast - ema_slow
-        
-        # Calculate signal line
-        macd_series = pd.Series(prices).ewm(span=fast_period, adjust=False).mean() - \
-                     pd.Series(prices).ewm(span=slow_period, adjust=False).mean()
-        signal_line = macd_series.ewm(span=signal_period, adjust=False).mean().iloc[-1]
+        # The fast and slow EMAs feed both the MACD line and the signal line
+        macd_series, signal_series = _macd_lines(
+            _as_row(prices), fast_period, slow_period, signal_period, cache)
+        macd_line = macd_series[0, -1]
+        signal_line = signal_series[0, -1]
         
         # Calculate histogram
         histogram = macd_line - signal_line
@@ -150,21 +158,40 @@ class TechnicalIndicators:
         }
 
     @staticmethod
-    def calculate_bollinger_bands(prices: List[float], period: int = 20, num_std: float = 2.0) -> Dict[str, float]:
+    def calculate_ema(prices: PriceInput, span: int = 20, cache: Optional[dict] = None) -> float:
+        """Calculate Exponential Moving Average (EMA).
+
+        Args:
+            prices (PriceInput): A list or array of prices, or an OHLCVRingBuffer.
+            span (int, optional): The span of the EMA. Defaults to 20.
+            cache (dict, optional): Scratch dictionary shared by EMA-based calls on the same
+                ``prices`` so each EMA is computed once. Defaults to None.
+
+        Returns:
+            float: The EMA of the last price.
+        """
+        prices = _closes(prices)
+        if len(prices) == 0:
+            return 0.0
+        return _ema(_as_row(prices), span, cache)[0, -1]
+
+    @staticmethod
+    def calculate_bollinger_bands(prices: PriceInput, period: int = 20, num_std: float = 2.0) -> Dict[str, float]:
         """Calculate Bollinger Bands.
 
         Args:
-            prices (List[float]): A list of prices.
+            prices (PriceInput): A list or array of prices, or an OHLCVRingBuffer.
             period (int, optional): The period for calculating Bollinger Bands. Defaults to 20.
             num_std (float, optional): The number of standard deviations for Bollinger Bands. Defaults to 2.0.
 
         Returns:
             Dict[str, float]: A dictionary containing the upper, middle, and lower Bollinger Bands.
         """
+        prices = _closes(prices)
         if len(prices) < period:
             return {"upper": prices[-1], "middle": prices[-1], "lower": prices[-1]}
         
-        prices_array = np.array(prices[-period:])
+        prices_array = np.asarray(prices[-period:], dtype=float)
         middle_band = np.mean(prices_array)
         std_dev = np.std(prices_array)
         
@@ -178,37 +205,36 @@ class TechnicalIndicators:
         }
 
     @staticmethod
-    def calculate_volume_profile(prices: List[float], volumes: List[float], num_bins: int = 10) -> Dict[str, float]:
+    def calculate_volume_profile(prices: PriceInput, volumes: Optional[List[float]] = None, num_bins: int = 10) -> Dict[str, float]:
         """Calculate Volume Profile.
 
         Args:
-            prices (List[float]): A list of prices.
-            volumes (List[float]): A list of volumes.
+            prices (PriceInput): A list or array of prices, or an OHLCVRingBuffer to take
+                the close prices and volumes from.
+            volumes (List[float], optional): A list of volumes.
             num_bins (int, optional): The number of bins for the volume profile. Defaults to 10.
 
         Returns:
             Dict[str, float]: A dictionary containing the Point of Control (POC), Value Area High, and Value Area Low.
+                The value area spans the bins holding ``VALUE_AREA_FRACTION`` of the volume around the POC.
         """
-        if not prices or not volumes:
+        prices, volumes = _closes_volumes(prices, volumes)
+        if len(prices) == 0 or len(volumes) == 0:
             return {"poc": 0.0, "va_high": 0.0, "va_low": 0.0}
         
         # Create price bins
-        price_bins = np.linspace(min(prices), max(prices), num_bins)
+        prices = np.asarray(prices, dtype=float)
+        price_bins = np.linspace(prices.min(), prices.max(), num_bins)
         volume_per_bin, _ = np.histogram(prices, bins=price_bins, weights=volumes)
         
         # Find Point of Control (price level with highest volume)
         poc_index = np.argmax(volume_per_bin)
         poc = (price_bins[poc_index] + price_bins[poc_index + 1]) / 2
         
-        # Calculate Value Area (70% of volume)
-        total_volume = np.sum(volume_per_bin)
-        target_volume = total_volume * 0.7
-        
-        cumsum_volume = np.cumsum(sorted(volume_per_bin, reverse=True))
-        value_area_threshold = np.searchsorted(cumsum_volume, target_volume)
-        
-        va_high = np.percentile(prices, 85)
-        va_low = np.percentile(prices, 15)
+        # Value Area: expand from the POC until it holds 70% of the volume
+        va_low_index, va_high_index = _value_area(volume_per_bin[None, :], np.array([poc_index]))
+        va_high = price_bins[va_high_index[0] + 1]
+        va_low = price_bins[va_low_index[0]]
         
         return {
             "poc": poc,  # Point of Control
@@ -220,25 +246,1094 @@ class TechnicalIndicators:
     def get_market_session(timestamp: pd.Timestamp) -> str:
         """Determine market session based on time.
 
+        Uses the exchange calendar, so weekends, holidays, the 9:30 open and half days
+        are taken into account. Naive timestamps are taken as America/New_York time.
+        Use ``market_calendar.CALENDAR.label_sessions`` to label many timestamps at once.
+
         Args:
             timestamp (pd.Timestamp): The timestamp to determine the market session for.
 
         Returns:
             str: The market session ("closed", "pre_market", "opening", "mid_day", "closing", "after_hours").
         """
-        hour = timestamp.hour
-        
-        if hour < 4:
-            return "closed"
-        elif 4 <= hour < 9:
-            return "pre_market"
-        elif 9 <= hour < 10:
-            return "opening"
-        elif 10 <= hour < 15:
-            return "mid_day"
-        elif 15 <= hour < 16:
-            return "closing"
-        elif 16 <= hour < 20:
-            return "after_hours"
+        return CALENDAR.session(timestamp)
+
+    @staticmethod
+    def calculate_moving_averages_series(prices: PriceInput, short_window: int = 5, long_window: int = 20) -> Dict[str, np.ndarray]:
+        """Calculate short and long-term moving averages for every bar.
+
+        Element ``t`` of each array equals ``calculate_moving_averages(prices[:t + 1])``.
+
+        Args:
+            prices (PriceInput): A list or array of prices, or an OHLCVRingBuffer.
+            short_window (int, optional): The short-term window. Defaults to 5.
+            long_window (int, optional): The long-term window. Defaults to 20.
+
+        Returns:
+            Dict[str, np.ndarray]: Arrays of the short and long-term moving averages.
+        """
+        result = TechnicalIndicators.calculate_moving_averages_batch(_as_row(prices), short_window, long_window)
+        return {key: value[0] for key, value in result.items()}
+
+    @staticmethod
+    def calculate_volatility_series(prices: PriceInput, window: int = 20) -> np.ndarray:
+        """Calculate annualized volatility for every bar.
+
+        Element ``t`` equals ``calculate_volatility(prices[:t + 1], window)``.
+
+        Args:
+            prices (PriceInput): A list or array of prices, or an OHLCVRingBuffer.
+            window (int, optional): The window for calculating volatility. Defaults to 20.
+
+        Returns:
+            np.ndarray: The volatility at each bar.
+        """
+        return TechnicalIndicators.calculate_volatility_batch(_as_row(prices), window)[0]
+
+    @staticmethod
+    def calculate_atr_series(high: Union[List[float], OHLCVRingBuffer], low: Optional[List[float]] = None,
+                             close: Optional[List[float]] = None, period: int = 14,
+                             smoothing: str = "simple") -> np.ndarray:
+        """Calculate Average True Range (ATR) for every bar.
+
+        With ``smoothing="simple"`` element ``t`` equals
+        ``calculate_atr(high[:t + 1], low[:t + 1], close[:t + 1], period)``. With
+        ``smoothing="wilder"`` the true range is smoothed recursively from bar ``period`` on.
+
+        Args:
+            high (List[float]): A list of high prices, or an OHLCVRingBuffer to take
+                the high, low and close prices from.
+            low (List[float], optional): A list of low prices.
+            close (List[float], optional): A list of close prices.
+            period (int, optional): The period for calculating ATR. Defaults to 14.
+            smoothing (str, optional): "simple" or "wilder". Defaults to "simple".
+
+        Returns:
+            np.ndarray: The ATR at each bar.
+        """
+        high, low, close = _high_low_close(high, low, close)
+        return TechnicalIndicators.calculate_atr_batch(
+            _as_row(high), _as_row(low), _as_row(close), period, smoothing)[0]
+
+    @staticmethod
+    def calculate_rsi_series(prices: PriceInput, period: int = 14, smoothing: str = "simple") -> np.ndarray:
+        """Calculate Relative Strength Index (RSI) for every bar.
+
+        With ``smoothing="simple"`` element ``t`` equals ``calculate_rsi(prices[:t + 1], period)``.
+        With ``smoothing="wilder"`` the average gains and losses are smoothed recursively
+        from bar ``period`` on.
+
+        Args:
+            prices (PriceInput): A list or array of prices, or an OHLCVRingBuffer.
+            period (int, optional): The period for calculating RSI. Defaults to 14.
+            smoothing (str, optional): "simple" or "wilder". Defaults to "simple".
+
+        Returns:
+            np.ndarray: The RSI at each bar.
+        """
+        return TechnicalIndicators.calculate_rsi_batch(_as_row(prices), period, smoothing)[0]
+
+    @staticmethod
+    def calculate_macd_series(prices: PriceInput, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9,
+                              cache: Optional[dict] = None) -> Dict[str, np.ndarray]:
+        """Calculate MACD (Moving Average Convergence Divergence) for every bar.
+
+        Element ``t`` of each array equals the matching value of ``calculate_macd(prices[:t + 1])``.
+
+        Args:
+            prices (PriceInput): A list or array of prices, or an OHLCVRingBuffer.
+            fast_period (int, optional): The fast period for MACD. Defaults to 12.
+            slow_period (int, optional): The slow period for MACD. Defaults to 26.
+            signal_period (int, optional): The signal period for MACD. Defaults to 9.
+            cache (dict, optional): Scratch dictionary shared by EMA-based calls on the same
+                ``prices`` so each EMA is computed once. Defaults to None.
+
+        Returns:
+            Dict[str, np.ndarray]: Arrays of the MACD line, signal line, and histogram.
+        """
+        prices = _closes(prices)
+        result = _macd_batch(_as_row(prices), fast_period, slow_period, signal_period, cache)
+        return {key: value[0] for key, value in result.items()}
+
+    @staticmethod
+    def calculate_ema_series(prices: PriceInput, span: int = 20, cache: Optional[dict] = None) -> np.ndarray:
+        """Calculate Exponential Moving Average (EMA) for every bar.
+
+        Args:
+            prices (PriceInput): A list or array of prices, or an OHLCVRingBuffer.
+            span (int, optional): The span of the EMA. Defaults to 20.
+            cache (dict, optional): Scratch dictionary shared by EMA-based calls on the same
+                ``prices`` so each EMA is computed once. Defaults to None.
+
+        Returns:
+            np.ndarray: The EMA at each bar.
+        """
+        prices = _closes(prices)
+        return _ema(_as_row(prices), span, cache)[0]
+
+    @staticmethod
+    def calculate_bollinger_bands_series(prices: PriceInput, period: int = 20, num_std: float = 2.0) -> Dict[str, np.ndarray]:
+        """Calculate Bollinger Bands for every bar.
+
+        Element ``t`` of each array equals the matching value of
+        ``calculate_bollinger_bands(prices[:t + 1], period, num_std)``.
+
+        Args:
+            prices (PriceInput): A list or array of prices, or an OHLCVRingBuffer.
+            period (int, optional): The period for calculating Bollinger Bands. Defaults to 20.
+            num_std (float, optional): The number of standard deviations for Bollinger Bands. Defaults to 2.0.
+
+        Returns:
+            Dict[str, np.ndarray]: Arrays of the upper, middle, and lower Bollinger Bands.
+        """
+        result = TechnicalIndicators.calculate_bollinger_bands_batch(_as_row(prices), period, num_std)
+        return {key: value[0] for key, value in result.items()}
+
+    @staticmethod
+    def calculate_volume_profile_series(prices: PriceInput, volumes: Optional[List[float]] = None, num_bins: int = 10,
+                                        window: int = 20) -> Dict[str, np.ndarray]:
+        """Calculate a rolling Volume Profile for every bar.
+
+        Element ``t`` of each array equals the matching value of
+        ``calculate_volume_profile`` over the last ``window`` prices and volumes up to bar ``t``.
+
+        Args:
+            prices (PriceInput): A list or array of prices, or an OHLCVRingBuffer to take
+                the close prices and volumes from.
+            volumes (List[float], optional): A list of volumes.
+            num_bins (int, optional): The number of bins for the volume profile. Defaults to 10.
+            window (int, optional): The number of bars in each profile. Defaults to 20.
+
+        Returns:
+            Dict[str, np.ndarray]: Arrays of the Point of Control (POC), Value Area High, and Value Area Low.
+        """
+        prices, volumes = _closes_volumes(prices, volumes)
+        prices_array = np.asarray(prices, dtype=float)
+        volumes_array = np.asarray(volumes, dtype=float)
+        n = len(prices_array)
+        result = {key: np.zeros(n) for key in ("poc", "va_high", "va_low")}
+
+        # Partial windows at the start are few; take them one at a time
+        for t in range(min(window - 1, n)):
+            profile = TechnicalIndicators.calculate_volume_profile(
+                prices_array[:t + 1], volumes_array[:t + 1], num_bins)
+            for key, value in profile.items():
+                result[key][t] = value
+
+        if n >= window:
+            price_windows = np.lib.stride_tricks.sliding_window_view(prices_array, window)
+            volume_windows = np.lib.stride_tricks.sliding_window_view(volumes_array, window)
+            for start, stop in _chunks(len(price_windows), window * num_bins):
+                profile = _volume_profile_windows(price_windows[start:stop], volume_windows[start:stop], num_bins)
+                for key, value in profile.items():
+                    result[key][window - 1 + start:window - 1 + stop] = value
+
+        return result
+
+    @staticmethod
+    def calculate_moving_averages_batch(prices: np.ndarray, short_window: int = 5, long_window: int = 20) -> Dict[str, np.ndarray]:
+        """Calculate short and long-term moving averages for a matrix of symbols.
+
+        Args:
+            prices (np.ndarray): A (symbols x bars) price matrix. Shorter histories are
+                right-aligned and padded with NaN on the left.
+            short_window (int, optional): The short-term window. Defaults to 5.
+            long_window (int, optional): The long-term window. Defaults to 20.
+
+        Returns:
+            Dict[str, np.ndarray]: (symbols x bars) matrices of the short and long-term moving
+            averages, NaN where the input is padding.
+        """
+        prices_matrix, first = _as_matrix(prices)
+        age = _bar_age(first, prices_matrix.shape[1])
+        warmup = age < long_window - 1
+
+        sma_short = np.where(warmup, prices_matrix, _rolling_mean(prices_matrix, short_window, first))
+        sma_long = np.where(warmup, prices_matrix, _rolling_mean(prices_matrix, long_window, first))
+
+        return {
+            "sma_short": sma_short,
+            "sma_long": sma_long
+        }
+
+    @staticmethod
+    def calculate_volatility_batch(prices: np.ndarray, window: int = 20) -> np.ndarray:
+        """Calculate annualized volatility for a matrix of symbols.
+
+        Args:
+            prices (np.ndarray): A (symbols x bars) price matrix. Shorter histories are
+                right-aligned and padded with NaN on the left.
+            window (int, optional): The window for calculating volatility. Defaults to 20.
+
+        Returns:
+            np.ndarray: A (symbols x bars) volatility matrix, NaN where the input is padding.
+        """
+        prices_matrix, first = _as_matrix(prices)
+        age = _bar_age(first, prices_matrix.shape[1])
+
+        returns = _lagged_change(prices_matrix) / _lag(prices_matrix)
+        volatility = _rolling_std(returns, window, first + 1) * np.sqrt(252)
+        volatility = np.where(age < window - 1, 0.0, volatility)
+        return np.where(age < 0, np.nan, volatility)
+
+    @staticmethod
+    def calculate_atr_batch(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14,
+                            smoothing: str = "simple") -> np.ndarray:
+        """Calculate Average True Range (ATR) for a matrix of symbols.
+
+        Args:
+            high (np.ndarray): A (symbols x bars) matrix of high prices.
+            low (np.ndarray): A (symbols x bars) matrix of low prices.
+            close (np.ndarray): A (symbols x bars) matrix of close prices. Shorter histories
+                are right-aligned and padded with NaN on the left in all three matrices.
+            period (int, optional): The period for calculating ATR. Defaults to 14.
+            smoothing (str, optional): "simple" or "wilder". Defaults to "simple".
+
+        Returns:
+            np.ndarray: A (symbols x bars) ATR matrix, NaN where the input is padding.
+        """
+        close_matrix, first = _as_matrix(close)
+        high_matrix = np.asarray(high, dtype=float)
+        low_matrix = np.asarray(low, dtype=float)
+        age = _bar_age(first, close_matrix.shape[1])
+
+        true_range = _true_range(high_matrix, low_matrix, close_matrix)
+        atr = _smooth(true_range, period, smoothing, first + 1)
+        atr = np.where(age == 0, 0.0, atr)
+        return np.where(age < 0, np.nan, atr)
+
+    @staticmethod
+    def calculate_rsi_batch(prices: np.ndarray, period: int = 14, smoothing: str = "simple") -> np.ndarray:
+        """Calculate Relative Strength Index (RSI) for a matrix of symbols.
+
+        Args:
+            prices (np.ndarray): A (symbols x bars) price matrix. Shorter histories are
+                right-aligned and padded with NaN on the left.
+            period (int, optional): The period for calculating RSI. Defaults to 14.
+            smoothing (str, optional): "simple" or "wilder". Defaults to "simple".
+
+        Returns:
+            np.ndarray: A (symbols x bars) RSI matrix, NaN where the input is padding.
+        """
+        prices_matrix, first = _as_matrix(prices)
+        age = _bar_age(first, prices_matrix.shape[1])
+
+        delta = _lagged_change(prices_matrix)
+        avg_gain = _smooth(np.clip(delta, 0, None), period, smoothing, first + 1)
+        avg_loss = _smooth(np.clip(-delta, 0, None), period, smoothing, first + 1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+        rsi = np.where(avg_loss == 0, 100.0, rsi)
+        rsi = np.where(age < period, 50.0, rsi)
+        return np.where(age < 0, np.nan, rsi)
+
+    @staticmethod
+    def calculate_macd_batch(prices: np.ndarray, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9,
+                             cache: Optional[dict] = None) -> Dict[str, np.ndarray]:
+        """Calculate MACD (Moving Average Convergence Divergence) for a matrix of symbols.
+
+        Args:
+            prices (np.ndarray): A (symbols x bars) price matrix. Shorter histories are
+                right-aligned and padded with NaN on the left.
+            fast_period (int, optional): The fast period for MACD. Defaults to 12.
+            slow_period (int, optional): The slow period for MACD. Defaults to 26.
+            signal_period (int, optional): The signal period for MACD. Defaults to 9.
+            cache (dict, optional): Scratch dictionary shared by EMA-based calls on the same
+                ``prices`` so each EMA is computed once. Defaults to None.
+
+        Returns:
+            Dict[str, np.ndarray]: (symbols x bars) matrices of the MACD line, signal line, and
+            histogram, NaN where the input is padding.
+        """
+        return _macd_batch(prices, fast_period, slow_period, signal_period, cache)
+
+    @staticmethod
+    def calculate_ema_batch(prices: np.ndarray, span: int = 20, cache: Optional[dict] = None) -> np.ndarray:
+        """Calculate Exponential Moving Average (EMA) for a matrix of symbols.
+
+        Args:
+            prices (np.ndarray): A (symbols x bars) price matrix. Shorter histories are
+                right-aligned and padded with NaN on the left.
+            span (int, optional): The span of the EMA. Defaults to 20.
+            cache (dict, optional): Scratch dictionary shared by EMA-based calls on the same
+                ``prices`` so each EMA is computed once. Defaults to None.
+
+        Returns:
+            np.ndarray: A (symbols x bars) EMA matrix, NaN where the input is padding.
+        """
+        prices_matrix, _ = _as_matrix(prices)
+        return _ema(prices_matrix, span, cache)
+
+    @staticmethod
+    def calculate_bollinger_bands_batch(prices: np.ndarray, period: int = 20, num_std: float = 2.0) -> Dict[str, np.ndarray]:
+        """Calculate Bollinger Bands for a matrix of symbols.
+
+        Args:
+            prices (np.ndarray): A (symbols x bars) price matrix. Shorter histories are
+                right-aligned and padded with NaN on the left.
+            period (int, optional): The period for calculating Bollinger Bands. Defaults to 20.
+            num_std (float, optional): The number of standard deviations for Bollinger Bands. Defaults to 2.0.
+
+        Returns:
+            Dict[str, np.ndarray]: (symbols x bars) matrices of the upper, middle, and lower
+            Bollinger Bands, NaN where the input is padding.
+        """
+        prices_matrix, first = _as_matrix(prices)
+        age = _bar_age(first, prices_matrix.shape[1])
+        warmup = age < period - 1
+
+        middle_band = np.where(warmup, prices_matrix, _rolling_mean(prices_matrix, period, first))
+        std_dev = np.where(warmup, 0.0, _rolling_std(prices_matrix, period, first))
+
+        return {
+            "upper": middle_band + (std_dev * num_std),
+            "middle": middle_band,
+            "lower": middle_band - (std_dev * num_std)
+        }
+
+
+# Sliding windows are processed in chunks of roughly this many elements to
+# keep temporaries of the vectorized kernels bounded.
+_CHUNK_ELEMENTS = 1 << 22
+
+
+def _chunks(length: int, row_size: int):
+    """Yield ``(start, stop)`` ranges that split ``length`` rows into bounded chunks."""
+    step = max(1, _CHUNK_ELEMENTS // max(1, row_size))
+    for start in range(0, length, step):
+        yield start, min(start + step, length)
+
+
+def _closes(prices: PriceInput):
+    """Close prices of an OHLCVRingBuffer, or ``prices`` unchanged."""
+    if isinstance(prices, OHLCVRingBuffer):
+        return prices.close
+    return prices
+
+
+def _closes_volumes(prices: PriceInput, volumes):
+    """Close prices and volumes of an OHLCVRingBuffer, or the arguments unchanged."""
+    if isinstance(prices, OHLCVRingBuffer):
+        return prices.close, prices.volume
+    return prices, volumes
+
+
+def _high_low_close(high, low, close):
+    """High, low and close prices of an OHLCVRingBuffer, or the arguments unchanged."""
+    if isinstance(high, OHLCVRingBuffer):
+        return high.high, high.low, high.close
+    return high, low, close
+
+
+def _as_row(values: PriceInput) -> np.ndarray:
+    """View a single price history as a one-row matrix without copying arrays."""
+    return np.asarray(_closes(values), dtype=float).reshape(1, -1)
+
+
+def _as_matrix(values: np.ndarray):
+    """Validate a (symbols x bars) matrix and locate each row's first valid bar.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The float matrix and the column of the first
+        non-NaN value in each row (the number of bars for empty rows).
+    """
+    matrix = np.asarray(values, dtype=float)
+    if matrix.ndim != 2:
+        raise ValueError("Expected a (symbols x bars) matrix")
+    if matrix.shape[1] == 0:
+        return matrix, np.zeros(matrix.shape[0], dtype=int)
+
+    valid = ~np.isnan(matrix)
+    first = np.where(valid.any(axis=1), valid.argmax(axis=1), matrix.shape[1])
+    if np.any(valid.sum(axis=1) != matrix.shape[1] - first):
+        raise ValueError("Price histories must be contiguous and padded with NaN on the left")
+    return matrix, first
+
+
+def _bar_age(first: np.ndarray, length: int) -> np.ndarray:
+    """Index of each bar relative to its row's first valid bar; negative on padding."""
+    return np.arange(length)[None, :] - first[:, None]
+
+
+def _lag(values: np.ndarray) -> np.ndarray:
+    """Shift each row one bar to the right, filling the first column with NaN."""
+    lagged = np.full_like(values, np.nan)
+    lagged[:, 1:] = values[:, :-1]
+    return lagged
+
+
+def _lagged_change(values: np.ndarray) -> np.ndarray:
+    """Bar-over-bar change aligned with the later bar; NaN on the first valid bar."""
+    return values - _lag(values)
+
+
+def _cumulative_sum(values: np.ndarray) -> np.ndarray:
+    """Running sum of each row with a leading zero column; NaN padding counts as zero."""
+    rows, length = values.shape
+    cumsum = np.zeros((rows, length + 1))
+    np.cumsum(np.nan_to_num(values), axis=1, out=cumsum[:, 1:])
+    return cumsum
+
+
+def _window_mean(cumsum: np.ndarray, window: int, first: np.ndarray) -> np.ndarray:
+    """Trailing mean over ``window`` values from a ``_cumulative_sum`` matrix.
+
+    Bars closer than ``window`` to the row's first valid bar average the values
+    available so far.
+    """
+    length = cumsum.shape[1] - 1
+    index = np.arange(1, length + 1)[None, :]
+    lower = np.minimum(np.maximum(index - window, first[:, None]), length)
+    count = index - lower
+    sums = cumsum[:, 1:] - np.take_along_axis(cumsum, lower, axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(count > 0, sums / count, np.nan)
+
+
+def _rolling_mean(values: np.ndarray, window: int, first: np.ndarray) -> np.ndarray:
+    """Trailing mean over ``window`` values of each row using cumulative sums."""
+    return _window_mean(_cumulative_sum(values), window, first)
+
+
+def _rolling_std(values: np.ndarray, window: int, first: np.ndarray) -> np.ndarray:
+    """Trailing population standard deviation over ``window`` values of each row.
+
+    Computed over sliding window views of the left-padded matrix; bars closer
+    than ``window`` to the row's first valid bar use the values available so far.
+    """
+    rows, length = values.shape
+    if length == 0:
+        return np.empty((rows, 0))
+    padded = np.concatenate([np.full((rows, window - 1), np.nan), values], axis=1)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=1)
+
+    std = np.empty((rows, length))
+    for start, stop in _chunks(length, rows * window):
+        std[:, start:stop] = np.std(windows[:, start:stop], axis=2)
+
+    age = _bar_age(first, length)
+    partial = (age >= 0) & (age < window - 1)
+    if partial.any():
+        std[partial] = np.nanstd(windows[partial], axis=1)
+    return std
+
+
+def _fingerprint(values: np.ndarray) -> tuple:
+    """Shape and digest of a matrix's contents, so equal prices match however they are held."""
+    digest = hashlib.blake2b(np.ascontiguousarray(values, dtype=float).tobytes(), digest_size=16)
+    return values.shape, digest.digest()
+
+
+def _memoized(cache: Optional[dict], key: tuple, values: np.ndarray, compute):
+    """Return ``compute()``, memoized in ``cache`` for the current contents of ``values``.
+
+    Each key keeps one entry, replaced when the contents change, so a cache
+    reused while prices are appended to stays one entry per indicator.
+    """
+    if cache is None:
+        return compute()
+    fingerprint = _fingerprint(values)
+    entry = cache.get(key)
+    if entry is not None and entry[0] == fingerprint:
+        return entry[1]
+    result = compute()
+    cache[key] = (fingerprint, result)
+    return result
+
+
+def _ema_kernel(values: np.ndarray, alpha: float) -> np.ndarray:
+    """Recursive EMA ``y[t] = y[t-1] + alpha * (x[t] - y[t-1])`` along each row.
+
+    Each row is seeded with its first valid value, so the result matches
+    ``ewm(alpha=alpha, adjust=False)``; leading NaN padding stays NaN.
+
+    The recursion is evaluated in closed form over blocks short enough that the
+    decay factors stay within three orders of magnitude, so every block is a
+    vectorized cumulative sum. The carries between blocks decay by at least a
+    factor of 1000 per block and are summed over the few blocks that still
+    contribute at double precision.
+    """
+    result = np.array(values, dtype=float)
+    rows, length = result.shape
+    padding = None
+    if length and np.isnan(result).any():
+        # Backfill padding with the first valid value; the EMA of that constant
+        # prefix is the seed itself
+        valid = ~np.isnan(result)
+        first = np.where(valid.any(axis=1), valid.argmax(axis=1), length)
+        padding = np.arange(length)[None, :] < first[:, None]
+        backfill = padding & (first < length)[:, None]
+        backfill_rows = np.nonzero(backfill)[0]
+        result[backfill] = result[backfill_rows, first[backfill_rows]]
+
+    decay = 1.0 - alpha
+    if length == 0 or decay <= 0:
+        return result
+
+    block = min(length, max(1, int(math.log(1e-3) / math.log(decay))))
+    blocks = -(-length // block)
+    if blocks * block != length:
+        padded = np.zeros((rows, blocks * block))
+        padded[:, :length] = result
+    else:
+        padded = result
+    padded = padded.reshape(rows, blocks, block)
+
+    # Response of each block to its own inputs, starting from zero
+    powers = decay ** np.arange(1, block + 1)
+    response = np.cumsum(padded / powers, axis=2)
+    response *= alpha * powers
+
+    # Value carried into each block: carry[b] = block_decay * carry[b - 1] + end of block b - 1
+    block_decay = decay ** block
+    carry = result[:, :1] * block_decay ** np.arange(blocks)[None, :]
+    if blocks > 1:
+        ends = response[:, :-1, -1]
+        terms = blocks - 1
+        if block_decay > 0:
+            terms = min(terms, math.ceil(math.log(1e-18) / math.log(block_decay)))
+        for lag in range(terms):
+            carry[:, lag + 1:] += block_decay ** lag * ends[:, :blocks - 1 - lag]
+
+    response += powers * carry[:, :, None]
+    ema = response.reshape(rows, -1)[:, :length]
+    if padding is not None:
+        ema[padding] = np.nan
+    return ema
+
+
+def _ema(values: np.ndarray, span: int, cache: Optional[dict] = None) -> np.ndarray:
+    """Exponential moving average of each row, matching ``ewm(span, adjust=False)``.
+
+    Memoized in ``cache`` for the contents of ``values``.
+    """
+    return _memoized(cache, ("ema", span), values, lambda: _ema_kernel(values, 2.0 / (span + 1)))
+
+
+def _macd_lines(prices: np.ndarray, fast_period: int, slow_period: int, signal_period: int,
+                cache: Optional[dict]):
+    """MACD and signal line matrices sharing one pass of each EMA."""
+    def compute():
+        macd_matrix = _ema(prices, fast_period, cache) - _ema(prices, slow_period, cache)
+        return macd_matrix, _ema(macd_matrix, signal_period)
+
+    return _memoized(cache, ("macd", fast_period, slow_period, signal_period), prices, compute)
+
+
+def _macd_batch(prices: np.ndarray, fast_period: int, slow_period: int, signal_period: int,
+                cache: Optional[dict]) -> Dict[str, np.ndarray]:
+    """MACD result matrices for a (symbols x bars) price matrix."""
+    prices_matrix, first = _as_matrix(prices)
+    age = _bar_age(first, prices_matrix.shape[1])
+    macd_matrix, signal_matrix = _macd_lines(prices_matrix, fast_period, slow_period, signal_period, cache)
+
+    warmup = age < slow_period - 1
+    macd_line = np.where(warmup, 0.0, macd_matrix)
+    signal_line = np.where(warmup, 0.0, signal_matrix)
+    padding = age < 0
+
+    return {
+        "macd": np.where(padding, np.nan, macd_line),
+        "signal": np.where(padding, np.nan, signal_line),
+        "histogram": np.where(padding, np.nan, macd_line - signal_line)
+    }
+
+
+def _wilder(values: np.ndarray, period: int, first: np.ndarray) -> np.ndarray:
+    """Wilder smoothing of each row seeded with the mean of its first ``period`` values.
+
+    Bars before the seed are NaN.
+    """
+    rows, length = values.shape
+    seeded = np.full((rows, length), np.nan)
+    seed_column = first + period - 1
+    seeded_rows = np.nonzero(seed_column < length)[0]
+    if len(seeded_rows) == 0:
+        return seeded
+
+    seed_index = first[seeded_rows, None] + np.arange(period)
+    seeded[seeded_rows, seed_column[seeded_rows]] = values[seeded_rows[:, None], seed_index].mean(axis=1)
+    after_seed = _bar_age(first, length) >= period
+    seeded[after_seed] = values[after_seed]
+    return _ema_kernel(seeded, 1.0 / period)
+
+
+def _smooth(values: np.ndarray, period: int, smoothing: str, first: np.ndarray) -> np.ndarray:
+    """Average each row of ``values`` over ``period`` with simple or Wilder smoothing.
+
+    Wilder smoothing falls back to the simple trailing mean before its seed.
+    """
+    simple = _rolling_mean(values, period, first)
+    if smoothing == "simple":
+        return simple
+    if smoothing == "wilder":
+        warmup = _bar_age(first, values.shape[1]) < period - 1
+        return np.where(warmup, simple, _wilder(values, period, first))
+    raise ValueError(f"Unknown smoothing: {smoothing}")
+
+
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True range of each bar; NaN on each row's first valid bar."""
+    previous_close = _lag(close)
+    return np.maximum.reduce([
+        high - low,
+        np.abs(high - previous_close),
+        np.abs(low - previous_close)
+    ])
+
+
+def _volume_profile_windows(prices: np.ndarray, volumes: np.ndarray, num_bins: int) -> Dict[str, np.ndarray]:
+    """Volume profile of each row of a (windows x window) price matrix.
+
+    Bins each row exactly like ``np.histogram`` with ``np.linspace`` edges.
+    """
+    rows = len(prices)
+    edges = np.linspace(prices.min(axis=1), prices.max(axis=1), num_bins, axis=1)
+    bin_index = np.clip((prices[:, :, None] >= edges[:, None, :]).sum(axis=2) - 1, 0, num_bins - 2)
+
+    flat_index = (np.arange(rows)[:, None] * (num_bins - 1) + bin_index).ravel()
+    volume_per_bin = np.bincount(flat_index, weights=volumes.ravel(),
+                                 minlength=rows * (num_bins - 1)).reshape(rows, num_bins - 1)
+
+    poc_index = np.argmax(volume_per_bin, axis=1)
+    row_index = np.arange(rows)
+    poc = (edges[row_index, poc_index] + edges[row_index, poc_index + 1]) / 2
+
+    va_low_index, va_high_index = _value_area(volume_per_bin, poc_index)
+    return {
+        "poc": poc,
+        "va_high": edges[row_index, va_high_index + 1],
+        "va_low": edges[row_index, va_low_index]
+    }
+
+
+def _value_area(volume_per_bin: np.ndarray, poc_index: np.ndarray,
+                fraction: float = VALUE_AREA_FRACTION) -> Tuple[np.ndarray, np.ndarray]:
+    """First and last bin of the value area of each row of a (rows x bins) histogram.
+
+    Starting from the POC bin, the neighbouring bin with more volume is added until
+    the area holds ``fraction`` of the row's volume; when both neighbours hold the
+    same volume, both are added. Rows are expanded together, one step per loop.
+    """
+    rows, bins = volume_per_bin.shape
+    row_index = np.arange(rows)
+    low = poc_index.copy()
+    high = poc_index.copy()
+    area_volume = volume_per_bin[row_index, poc_index]
+    target = volume_per_bin.sum(axis=1) * fraction
+
+    for _ in range(bins - 1):
+        active = area_volume < target
+        if not active.any():
+            break
+        below = np.where(low > 0, volume_per_bin[row_index, np.maximum(low - 1, 0)], -1.0)
+        above = np.where(high < bins - 1, volume_per_bin[row_index, np.minimum(high + 1, bins - 1)], -1.0)
+        take_above = active & (high < bins - 1) & (above >= below)
+        take_below = active & (low > 0) & (below >= above)
+        area_volume = area_volume + np.where(take_above, above, 0.0) + np.where(take_below, below, 0.0)
+        high = high + take_above
+        low = low - take_below
+    return low, high
+
+
+class _RollingWindow:
+    """Fixed-size window of floats with O(1) running sum and sum of squares.
+
+    Values are stored relative to a shift so the variance does not suffer from
+    catastrophic cancellation on price-sized inputs, and the sums are rebuilt
+    from the window every ``resync`` pushes to stop floating point drift from
+    accumulating on long-lived streams.
+    """
+
+    def __init__(self, size: int):
+        if size < 1:
+            raise ValueError("Window size must be at least 1")
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.shift = None
+        self.sum = 0.0
+        self.sumsq = 0.0
+        self.nonzero = 0
+        self._resync_interval = max(1024, size)
+        self._pushes = 0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def push(self, value: float) -> None:
+        """Add a value, evicting the oldest one once the window is full."""
+        if self.shift is None:
+            self.shift = value
+        if len(self.values) == self.size:
+            old = self.values[0]
+            shifted = old - self.shift
+            self.sum -= shifted
+            self.sumsq -= shifted * shifted
+            if old != 0:
+                self.nonzero -= 1
+        self.values.append(value)
+        shifted = value - self.shift
+        self.sum += shifted
+        self.sumsq += shifted * shifted
+        if value != 0:
+            self.nonzero += 1
+
+        self._pushes += 1
+        if self._pushes % self._resync_interval == 0:
+            self._resync()
+
+    def _resync(self) -> None:
+        """Recompute the running sums exactly from the stored values."""
+        self.shift = math.fsum(self.values) / len(self.values)
+        self.sum = math.fsum(v - self.shift for v in self.values)
+        self.sumsq = math.fsum((v - self.shift) ** 2 for v in self.values)
+
+    def total(self) -> float:
+        """Sum of the values in the window."""
+        if self.nonzero == 0:
+            return 0.0
+        return self.sum + self.shift * len(self.values)
+
+    def mean(self) -> float:
+        """Mean of the values in the window."""
+        if self.nonzero == 0:
+            return 0.0
+        return self.shift + self.sum / len(self.values)
+
+    def std(self) -> float:
+        """Population standard deviation of the values in the window."""
+        n = len(self.values)
+        if n == 0 or self.nonzero == 0:
+            return 0.0
+        mean_shifted = self.sum / n
+        variance = self.sumsq / n - mean_shifted * mean_shifted
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+
+class StreamingEMA:
+    """Exponential moving average updated one price at a time.
+
+    Matches ``pd.Series(prices).ewm(span=span, adjust=False).mean()``.
+    """
+
+    def __init__(self, span: int):
+        self.span = span
+        self.alpha = 2.0 / (span + 1)
+        self.value = None
+        self.count = 0
+
+    def update(self, price: float) -> float:
+        """Add a price and return the updated EMA.
+
+        Args:
+            price (float): The newest price.
+
+        Returns:
+            float: The exponential moving average including ``price``.
+        """
+        if self.value is None:
+            self.value = float(price)
+        else:
+            self.value += self.alpha * (price - self.value)
+        self.count += 1
+        return self.value
+
+
+class StreamingMovingAverages:
+    """Streaming counterpart of ``TechnicalIndicators.calculate_moving_averages``."""
+
+    def __init__(self, short_window: int = 5, long_window: int = 20):
+        self.short_window = short_window
+        self.long_window = long_window
+        self._short = _RollingWindow(short_window)
+        self._long = _RollingWindow(long_window)
+        self.count = 0
+        self.value = None
+
+    def update(self, price: float) -> Dict[str, float]:
+        """Add a price and return the short and long moving averages.
+
+        Args:
+            price (float): The newest price.
+
+        Returns:
+            Dict[str, float]: The same dictionary ``calculate_moving_averages`` returns
+            for every price seen so far.
+        """
+        self._short.push(price)
+        self._long.push(price)
+        self.count += 1
+
+        if self.count < self.long_window:
+            self.value = {"sma_short": price, "sma_long": price}
+        else:
+            self.value = {
+                "sma_short": self._short.mean(),
+                "sma_long": self._long.mean()
+            }
+        return self.value
+
+
+class StreamingVolatility:
+    """Streaming counterpart of ``TechnicalIndicators.calculate_volatility``."""
+
+    def __init__(self, window: int = 20):
+        self.window = window
+        self._returns = _RollingWindow(window)
+        self._last_price = None
+        self.count = 0
+        self.value = 0.0
+
+    def update(self, price: float) -> float:
+        """Add a price and return the annualized volatility.
+
+        Args:
+            price (float): The newest price.
+
+        Returns:
+            float: The volatility ``calculate_volatility`` returns for every price seen so far.
+        """
+        if self._last_price is not None:
+            self._returns.push((price - self._last_price) / self._last_price)
+        self._last_price = price
+        self.count += 1
+
+        if self.count < self.window:
+            self.value = 0.0
+        else:
+            self.value = self._returns.std() * math.sqrt(252)
+        return self.value
+
+
+class StreamingRSI:
+    """Streaming counterpart of ``TechnicalIndicators.calculate_rsi``.
+
+    Keeps running sums of the gains and losses over the last ``period`` price
+    changes, which is the averaging ``calculate_rsi`` uses.
+    """
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._gains = _RollingWindow(period)
+        self._losses = _RollingWindow(period)
+        self._last_price = None
+        self.count = 0
+        self.value = 50.0
+
+    def update(self, price: float) -> float:
+        """Add a price and return the RSI.
+
+        Args:
+            price (float): The newest price.
+
+        Returns:
+            float: The RSI ``calculate_rsi`` returns for every price seen so far.
+        """
+        if self._last_price is not None:
+            delta = price - self._last_price
+            self._gains.push(delta if delta > 0 else 0.0)
+            self._losses.push(-delta if delta < 0 else 0.0)
+        self._last_price = price
+        self.count += 1
+
+        if self.count < self.period + 1:
+            self.value = 50.0
+            return self.value
+
+        avg_gain = self._gains.mean()
+        avg_loss = self._losses.mean()
+        if avg_loss == 0:
+            self.value = 100.0
+        else:
+            rs = avg_gain / avg_loss
+            self.value = 100 - (100 / (1 + rs))
+        return self.value
+
+
+class StreamingMACD:
+    """Streaming counterpart of ``TechnicalIndicators.calculate_macd``."""
+
+    def __init__(self, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9):
+        self.slow_period = slow_period
+        self._fast = StreamingEMA(fast_period)
+        self._slow = StreamingEMA(slow_period)
+        self._signal = StreamingEMA(signal_period)
+        self.count = 0
+        self.value = {"macd": 0.0, "signal": 0.0, "histogram": 0.0}
+
+    def update(self, price: float) -> Dict[str, float]:
+        """Add a price and return the MACD line, signal line and histogram.
+
+        Args:
+            price (float): The newest price.
+
+        Returns:
+            Dict[str, float]: The same dictionary ``calculate_macd`` returns for every
+            price seen so far.
+        """
+        macd_line = self._fast.update(price) - self._slow.update(price)
+        signal_line = self._signal.update(macd_line)
+        self.count += 1
+
+        if self.count < self.slow_period:
+            self.value = {"macd": 0.0, "signal": 0.0, "histogram": 0.0}
         else:
-            return "closed"
+            self.value = {
+                "macd": macd_line,
+                "signal": signal_line,
+                "histogram": macd_line - signal_line
+            }
+        return self.value
+
+
+class StreamingBollingerBands:
+    """Streaming counterpart of ``TechnicalIndicators.calculate_bollinger_bands``."""
+
+    def __init__(self, period: int = 20, num_std: float = 2.0):
+        self.period = period
+        self.num_std = num_std
+        self._window = _RollingWindow(period)
+        self.count = 0
+        self.value = None
+
+    def update(self, price: float) -> Dict[str, float]:
+        """Add a price and return the upper, middle and lower bands.
+
+        Args:
+            price (float): The newest price.
+
+        Returns:
+            Dict[str, float]: The same dictionary ``calculate_bollinger_bands`` returns
+            for every price seen so far.
+        """
+        self._window.push(price)
+        self.count += 1
+
+        if self.count < self.period:
+            self.value = {"upper": price, "middle": price, "lower": price}
+            return self.value
+
+        middle_band = self._window.mean()
+        std_dev = self._window.std()
+        self.value = {
+            "upper": middle_band + (std_dev * self.num_std),
+            "middle": middle_band,
+            "lower": middle_band - (std_dev * self.num_std)
+        }
+        return self.value
+
+
+class StreamingVolumeProfile:
+    """Incremental volume-at-price profile with one bin per price tick.
+
+    Each trade adds its volume to the bin of its price in O(1), and the Point of
+    Control is kept current on every update, since bin volumes only grow. The value
+    area is expanded from the POC when it is read, walking only the ticks inside it,
+    and is cached until the next trade. Call ``reset`` at the start of each session.
+    """
+
+    def __init__(self, tick_size: float = 0.01, value_area_fraction: float = VALUE_AREA_FRACTION):
+        if tick_size <= 0:
+            raise ValueError("Tick size must be positive")
+        self.tick_size = tick_size
+        self.value_area_fraction = value_area_fraction
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop all volume, e.g. when a new session starts."""
+        self.volumes: Dict[int, float] = {}  # Volume by price level (price / tick_size)
+        self.total_volume = 0.0
+        self.poc_level = None
+        self.low_level = None
+        self.high_level = None
+        self._value_area = None
+
+    def _level(self, price: float) -> int:
+        return int(round(price / self.tick_size))
+
+    def _add(self, level: int, volume: float) -> None:
+        level_volume = self.volumes.get(level, 0.0) + volume
+        self.volumes[level] = level_volume
+        self.total_volume += volume
+        self._value_area = None
+
+        if self.poc_level is None:
+            self.poc_level = self.low_level = self.high_level = level
+            return
+        if level_volume > self.volumes[self.poc_level]:
+            self.poc_level = level
+        if level < self.low_level:
+            self.low_level = level
+        elif level > self.high_level:
+            self.high_level = level
+
+    def update(self, price: float, volume: float) -> float:
+        """Add a trade and return the Point of Control.
+
+        Args:
+            price (float): The trade price.
+            volume (float): The trade volume.
+
+        Returns:
+            float: The price of the bin with the most volume.
+        """
+        self._add(self._level(price), volume)
+        return self.poc
+
+    def extend(self, prices, volumes) -> None:
+        """Add many trades or bars at once.
+
+        Args:
+            prices: A sequence of prices.
+            volumes: A sequence of volumes of the same length.
+        """
+        levels = np.rint(np.asarray(prices, dtype=float) / self.tick_size).astype(np.int64)
+        if len(levels) == 0:
+            return
+        unique_levels, inverse = np.unique(levels, return_inverse=True)
+        level_volumes = np.bincount(inverse, weights=np.asarray(volumes, dtype=float))
+        for level, volume in zip(unique_levels.tolist(), level_volumes.tolist()):
+            self._add(level, volume)
+
+    @property
+    def poc(self) -> float:
+        """Price of the bin with the most volume, or 0.0 when empty."""
+        return 0.0 if self.poc_level is None else self.poc_level * self.tick_size
+
+    def value_area(self) -> Tuple[float, float]:
+        """Return the lowest and highest price of the value area.
+
+        Starting from the POC, the neighbouring tick with more volume is added until the
+        area holds ``value_area_fraction`` of the volume, the same expansion
+        ``calculate_volume_profile`` uses. Ticks without trades count as empty bins.
+
+        Returns:
+            Tuple[float, float]: Value Area Low and Value Area High, or zeros when empty.
+        """
+        if self.poc_level is None:
+            return 0.0, 0.0
+        if self._value_area is not None:
+            return self._value_area
+
+        volumes = self.volumes
+        low = high = self.poc_level
+        area_volume = volumes[self.poc_level]
+        target = self.total_volume * self.value_area_fraction
+        while area_volume < target and (low > self.low_level or high < self.high_level):
+            below = volumes.get(low - 1, 0.0) if low > self.low_level else -1.0
+            above = volumes.get(high + 1, 0.0) if high < self.high_level else -1.0
+            if above >= below:
+                high += 1
+                area_volume += above
+            if below >= above:
+                low -= 1
+                area_volume += below
+        self._value_area = (low * self.tick_size, high * self.tick_size)
+        return self._value_area
+
+    def profile(self) -> Dict[str, float]:
+        """Return the Point of Control (POC), Value Area High, and Value Area Low."""
+        va_low, va_high = self.value_area()
+        return {"poc": self.poc, "va_high": va_high, "va_low": va_low}
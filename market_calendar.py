@@ -0,0 +1,272 @@
+import datetime
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+EXCHANGE_TIMEZONE = 'America/New_York'
+
+# Session labels; session codes index into this array
+SESSIONS = np.array(['closed', 'pre_market', 'opening', 'mid_day', 'closing', 'after_hours'])
+CLOSED, PRE_MARKET, OPENING, MID_DAY, CLOSING, AFTER_HOURS = range(len(SESSIONS))
+
+# Session boundaries in exchange-local minutes after midnight
+PRE_MARKET_OPEN = 4 * 60
+REGULAR_OPEN = 9 * 60 + 30
+OPENING_END = 10 * 60
+REGULAR_CLOSE = 16 * 60
+HALF_DAY_CLOSE = 13 * 60
+CLOSING_LENGTH = 60      # The closing session is the last hour of regular trading
+AFTER_HOURS_LENGTH = 240  # Extended trading runs four hours past the close
+
+# Full-day closures outside the regular holiday rules
+SPECIAL_CLOSURES = (
+    datetime.date(2001, 9, 11), datetime.date(2001, 9, 12), datetime.date(2001, 9, 13),
+    datetime.date(2001, 9, 14),  # September 11
+    datetime.date(2004, 6, 11),  # President Reagan's funeral
+    datetime.date(2007, 1, 2),   # President Ford's funeral
+    datetime.date(2012, 10, 29), datetime.date(2012, 10, 30),  # Hurricane Sandy
+    datetime.date(2018, 12, 5),  # President G. H. W. Bush's funeral
+    datetime.date(2025, 1, 9),   # President Carter's funeral
+)
+
+_NANOS_PER_MINUTE = 60 * 10**9
+_NANOS_PER_DAY = 24 * 60 * _NANOS_PER_MINUTE
+_EPOCH = datetime.date(1970, 1, 1)
+
+TimestampsInput = Union[pd.DatetimeIndex, pd.Series, np.ndarray, list]
+
+
+def _easter(year: int) -> datetime.date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> datetime.date:
+    """The ``n``-th ``weekday`` (Monday is 0) of a month; ``n = -1`` is the last one."""
+    if n > 0:
+        first = datetime.date(year, month, 1)
+        return first + datetime.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = datetime.date(year + month // 12, month % 12 + 1, 1) - datetime.timedelta(days=1)
+    return last - datetime.timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(date: datetime.date) -> datetime.date:
+    """Saturday holidays are observed on Friday, Sunday holidays on Monday."""
+    if date.weekday() == 5:
+        return date - datetime.timedelta(days=1)
+    if date.weekday() == 6:
+        return date + datetime.timedelta(days=1)
+    return date
+
+
+def exchange_holidays(year: int) -> list:
+    """Full-day NYSE holidays of one year under the current holiday rules.
+
+    Args:
+        year (int): The calendar year.
+
+    Returns:
+        list: The dates the exchange is closed, excluding weekends and special closures.
+    """
+    holidays = []
+    new_year = datetime.date(year, 1, 1)
+    # A Saturday New Year's Day is not observed on the Friday before
+    if new_year.weekday() != 5:
+        holidays.append(_observed(new_year))
+    if year >= 1998:
+        holidays.append(_nth_weekday(year, 1, 0, 3))  # Martin Luther King Jr. Day
+    holidays.append(_nth_weekday(year, 2, 0, 3))      # Washington's Birthday
+    holidays.append(_easter(year) - datetime.timedelta(days=2))  # Good Friday
+    holidays.append(_nth_weekday(year, 5, 0, -1))     # Memorial Day
+    if year >= 2022:
+        holidays.append(_observed(datetime.date(year, 6, 19)))  # Juneteenth
+    holidays.append(_observed(datetime.date(year, 7, 4)))
+    holidays.append(_nth_weekday(year, 9, 0, 1))      # Labor Day
+    holidays.append(_nth_weekday(year, 11, 3, 4))     # Thanksgiving
+    holidays.append(_observed(datetime.date(year, 12, 25)))
+    return holidays
+
+
+def exchange_half_days(year: int) -> list:
+    """Early-close (1:00 pm) sessions of one year.
+
+    Args:
+        year (int): The calendar year.
+
+    Returns:
+        list: The dates regular trading ends at 13:00.
+    """
+    half_days = [_nth_weekday(year, 11, 3, 4) + datetime.timedelta(days=1)]  # Day after Thanksgiving
+    # July 3 and Christmas Eve close early when they fall Monday to Thursday
+    for date in (datetime.date(year, 7, 3), datetime.date(year, 12, 24)):
+        if date.weekday() < 4:
+            half_days.append(date)
+    return half_days
+
+
+def _session_table() -> np.ndarray:
+    """Session code of every minute of the day, for each kind of day (shut, half day, full day)."""
+    minutes = np.arange(24 * 60)
+    table = np.zeros((3, len(minutes)), dtype=np.int8)
+    for kind, close in ((1, HALF_DAY_CLOSE), (2, REGULAR_CLOSE)):
+        # The session is the number of boundaries the minute has passed:
+        # pre-market, opening, mid-day, closing, after hours, then closed again
+        codes = sum((minutes >= boundary).astype(np.int8) for boundary in
+                    (PRE_MARKET_OPEN, REGULAR_OPEN, OPENING_END, close - CLOSING_LENGTH, close))
+        codes[minutes >= close + AFTER_HOURS_LENGTH] = CLOSED
+        table[kind] = codes
+    return table
+
+
+_SESSION_TABLE = _session_table()
+_CLOSE_BY_KIND = np.array([0, HALF_DAY_CLOSE, REGULAR_CLOSE])
+
+
+class MarketCalendar:
+    """
+    Exchange calendar backed by per-day lookup tables.
+
+    For every day from ``start_year`` to ``end_year`` the calendar holds the kind of
+    session (shut, half day or full day) and the exchange's UTC offset, so labeling a
+    bar is two table lookups with no per-row Python, vectorized over whole arrays of
+    timestamps. Days outside the tables fall back to the weekday rule and pandas time
+    zone conversion.
+
+    Naive timestamps are taken to be exchange-local (America/New_York) time; aware
+    timestamps and epoch integers are converted.
+    """
+    def __init__(self, start_year: int = 1990, end_year: int = 2100):
+        self.start_year = start_year
+        self.end_year = end_year
+        self._first_day = (datetime.date(start_year, 1, 1) - _EPOCH).days
+        last_day = (datetime.date(end_year, 12, 31) - _EPOCH).days
+
+        days = np.arange(self._first_day, last_day + 1, dtype=np.int64)
+        kinds = self._weekday_kinds(days)
+        for year in range(start_year, end_year + 1):
+            for date in exchange_half_days(year):
+                kinds[(date - _EPOCH).days - self._first_day] = 1
+            for date in exchange_holidays(year):
+                kinds[(date - _EPOCH).days - self._first_day] = 0
+        for date in SPECIAL_CLOSURES:
+            index = (date - _EPOCH).days - self._first_day
+            if 0 <= index < len(kinds):
+                kinds[index] = 0
+        self._kinds = kinds
+
+        # UTC offset at noon UTC of each UTC day. US clocks change at 2:00 on Sunday
+        # mornings, so the hours of a UTC day on the other side of the change are
+        # always Saturday night or Sunday and label as closed either way.
+        noon = days * _NANOS_PER_DAY + _NANOS_PER_DAY // 2
+        local_noon = pd.DatetimeIndex(noon, tz='UTC').tz_convert(EXCHANGE_TIMEZONE).tz_localize(None).asi8
+        self._utc_offsets = local_noon - noon
+
+    @staticmethod
+    def _weekday_kinds(days: np.ndarray) -> np.ndarray:
+        """Full day on weekdays, shut on weekends (1970-01-01 was a Thursday)."""
+        return np.where((days + 3) % 7 < 5, 2, 0).astype(np.int8)
+
+    def _in_table(self, index: np.ndarray) -> bool:
+        return len(index) == 0 or (index.min() >= 0 and index.max() < len(self._kinds))
+
+    def _day_kinds(self, days: np.ndarray) -> np.ndarray:
+        index = days - self._first_day
+        if self._in_table(index):
+            return self._kinds[index]
+        in_table = (index >= 0) & (index < len(self._kinds))
+        return np.where(in_table, self._kinds[np.clip(index, 0, len(self._kinds) - 1)], self._weekday_kinds(days))
+
+    def regular_close(self, days) -> np.ndarray:
+        """Regular close, in local minutes, of each day number since the epoch (0 when shut)."""
+        return _CLOSE_BY_KIND[self._day_kinds(np.asarray(days, dtype=np.int64))]
+
+    def _codes(self, local_nanos: np.ndarray) -> np.ndarray:
+        """Session codes of exchange-local wall-clock nanoseconds since the epoch."""
+        days, nanos = np.divmod(local_nanos, _NANOS_PER_DAY)
+        return _SESSION_TABLE[self._day_kinds(days), nanos // _NANOS_PER_MINUTE]
+
+    def _utc_to_local(self, utc_nanos: np.ndarray) -> np.ndarray:
+        """Exchange-local wall-clock nanoseconds of UTC epoch nanoseconds."""
+        index = utc_nanos // _NANOS_PER_DAY - self._first_day
+        if self._in_table(index):
+            return utc_nanos + self._utc_offsets[index]
+        return pd.DatetimeIndex(utc_nanos, tz='UTC').tz_convert(EXCHANGE_TIMEZONE).tz_localize(None).asi8
+
+    def _local_nanos(self, timestamps: TimestampsInput, unit: str) -> np.ndarray:
+        """Exchange-local wall-clock time of each timestamp, as nanoseconds since the epoch."""
+        if isinstance(timestamps, pd.Series):
+            timestamps = pd.DatetimeIndex(timestamps)
+        if isinstance(timestamps, (np.ndarray, list)):
+            array = np.asarray(timestamps)
+            if np.issubdtype(array.dtype, np.integer):
+                if unit != 'ns':
+                    array = array * (pd.Timedelta(1, unit=unit).value)
+                return self._utc_to_local(array.astype(np.int64))
+            timestamps = pd.DatetimeIndex(array)
+        # Aware indexes hold UTC, naive ones exchange-local wall-clock time
+        nanos = timestamps.values.astype('datetime64[ns]').view(np.int64)
+        return nanos if timestamps.tz is None else self._utc_to_local(nanos)
+
+    def session_codes(self, timestamps: TimestampsInput, unit: str = 'ns') -> np.ndarray:
+        """Label many timestamps with integer session codes.
+
+        Args:
+            timestamps (TimestampsInput): A DatetimeIndex or Series (naive ones are exchange-local),
+                or an array of epoch integers (UTC).
+            unit (str, optional): Unit of epoch integers ("s", "ms", "us" or "ns"). Defaults to "ns".
+
+        Returns:
+            np.ndarray: int8 codes indexing ``SESSIONS``.
+        """
+        return self._codes(self._local_nanos(timestamps, unit))
+
+    def label_sessions(self, timestamps: TimestampsInput, unit: str = 'ns') -> np.ndarray:
+        """Label many timestamps with their market session.
+
+        Args:
+            timestamps (TimestampsInput): A DatetimeIndex or Series (naive ones are exchange-local),
+                or an array of epoch integers (UTC).
+            unit (str, optional): Unit of epoch integers ("s", "ms", "us" or "ns"). Defaults to "ns".
+
+        Returns:
+            np.ndarray: The session name of every timestamp.
+        """
+        return SESSIONS[self.session_codes(timestamps, unit)]
+
+    def session(self, timestamp) -> str:
+        """Return the market session of a single timestamp.
+
+        Args:
+            timestamp: A datetime or pd.Timestamp; naive ones are exchange-local.
+
+        Returns:
+            str: The market session ("closed", "pre_market", "opening", "mid_day", "closing", "after_hours").
+        """
+        timestamp = pd.Timestamp(timestamp).as_unit('ns')
+        nanos = np.array([timestamp.value], dtype=np.int64)
+        if timestamp.tz is not None:
+            nanos = self._utc_to_local(nanos)
+        return str(SESSIONS[self._codes(nanos)[0]])
+
+    def is_trading_day(self, date) -> bool:
+        """Return True if the exchange holds a regular session on ``date``."""
+        return bool(self.regular_close([(pd.Timestamp(date).date() - _EPOCH).days])[0] > 0)
+
+    def is_half_day(self, date) -> bool:
+        """Return True if regular trading closes early on ``date``."""
+        return bool(self.regular_close([(pd.Timestamp(date).date() - _EPOCH).days])[0] == HALF_DAY_CLOSE)
+
+
+# Shared default calendar
+CALENDAR = MarketCalendar()
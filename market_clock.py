@@ -0,0 +1,182 @@
+import bisect
+import datetime
+import logging
+import threading
+import time
+
+import pandas as pd
+
+from market_calendar import AFTER_HOURS_LENGTH, CALENDAR, EXCHANGE_TIMEZONE, PRE_MARKET_OPEN, REGULAR_OPEN
+
+logger = logging.getLogger(__name__)
+
+# Market states reported to the dashboard
+REGULAR = "REGULAR"
+EXTENDED = "EXTENDED"
+CLOSED = "CLOSED"
+
+_EPOCH = datetime.date(1970, 1, 1)
+
+def _local_epoch(date, minutes):
+    """UTC epoch seconds of an exchange-local date and minutes after midnight"""
+    local = pd.Timestamp(date) + pd.Timedelta(minutes=minutes)
+    return local.tz_localize(EXCHANGE_TIMEZONE).timestamp()
+
+def _minutes(value):
+    """Minutes after midnight of a datetime.time"""
+    return value.hour * 60 + value.minute
+
+class MarketClock:
+    """
+    Market state from a calendar fetched once a day, answered locally.
+
+    refresh() pulls the trading calendar for the coming days and turns each
+    session into four transitions: pre-market open (EXTENDED), regular open
+    (REGULAR), regular close (EXTENDED) and after-hours close (CLOSED). status()
+    is then a binary search over those times, with no API call. run() sleeps
+    until the next transition and calls on_change with the new state as it
+    happens, and refreshes the calendar every refresh_interval.
+
+    Without an API client, or when the calendar request fails, the sessions
+    come from market_calendar's exchange rules instead.
+
+    Usage:
+        clock = MarketClock(api)
+        clock.refresh()
+        clock.status()  # "REGULAR", "EXTENDED" or "CLOSED"
+        threading.Thread(target=clock.run, args=(on_change,), daemon=True).start()
+    """
+    def __init__(self, api=None, calendar=CALENDAR, lookahead_days=7, refresh_interval=24 * 3600):
+        """
+        Initialize the clock.
+
+        Args:
+            api: tradeapi.REST client for the calendar, or None to use the exchange rules only
+            calendar: MarketCalendar used when the API is unavailable
+            lookahead_days: Days of sessions fetched at each refresh
+            refresh_interval: Seconds between calendar refreshes
+        """
+        self.api = api
+        self.calendar = calendar
+        self.lookahead_days = lookahead_days
+        self.refresh_interval = refresh_interval
+
+        # (transition times in UTC epoch seconds, state from each on), swapped whole on refresh
+        self._table = ([], [])
+        self.last_refresh = None
+        self._stop = threading.Event()
+
+    def _api_sessions(self, start, end):
+        """(date, pre-market open, open, close, after-hours close) in local minutes, from the API calendar"""
+        sessions = []
+        for day in self.api.get_calendar(start=start.isoformat(), end=end.isoformat()):
+            open_minutes, close_minutes = _minutes(day.open), _minutes(day.close)
+            raw = day._raw
+            pre_open = _minutes(day.session_open) if 'session_open' in raw else PRE_MARKET_OPEN
+            post_close = _minutes(day.session_close) if 'session_close' in raw else close_minutes + AFTER_HOURS_LENGTH
+            sessions.append((day.date.date(), pre_open, open_minutes, close_minutes, post_close))
+        return sessions
+
+    def _rule_sessions(self, start, end):
+        """The same sessions from the exchange holiday and half-day rules"""
+        days = range((start - _EPOCH).days, (end - _EPOCH).days + 1)
+        sessions = []
+        for day, close in zip(days, self.calendar.regular_close(list(days))):
+            if close:
+                sessions.append((_EPOCH + datetime.timedelta(days=day), PRE_MARKET_OPEN, REGULAR_OPEN,
+                                 int(close), int(close) + AFTER_HOURS_LENGTH))
+        return sessions
+
+    def refresh(self, start=None):
+        """
+        Fetch the calendar for lookahead_days and rebuild the transitions.
+
+        Args:
+            start: First date to fetch; defaults to today in exchange time
+        """
+        start = start or pd.Timestamp.now(tz=EXCHANGE_TIMEZONE).date()
+        end = start + datetime.timedelta(days=self.lookahead_days)
+        sessions = None
+        if self.api is not None:
+            try:
+                sessions = self._api_sessions(start, end)
+            except Exception as e:
+                logger.warning(f"Error fetching market calendar, using exchange rules: {str(e)}")
+        if sessions is None:
+            sessions = self._rule_sessions(start, end)
+
+        times, states = [], []
+        for date, pre_open, open_minutes, close_minutes, post_close in sorted(sessions):
+            for minutes, state in ((pre_open, EXTENDED), (open_minutes, REGULAR),
+                                   (close_minutes, EXTENDED), (post_close, CLOSED)):
+                times.append(_local_epoch(date, minutes))
+                states.append(state)
+        self._table = (times, states)
+        self.last_refresh = time.time()
+
+    def status(self, now=None):
+        """
+        Market state at a time, from the cached transitions.
+
+        Args:
+            now: UTC epoch seconds; defaults to the current time
+
+        Returns:
+            str: REGULAR, EXTENDED or CLOSED
+        """
+        times, states = self._table
+        index = bisect.bisect_right(times, time.time() if now is None else now) - 1
+        return states[index] if index >= 0 else CLOSED
+
+    def next_transition(self, now=None):
+        """
+        The next change of state after a time.
+
+        Args:
+            now: UTC epoch seconds; defaults to the current time
+
+        Returns:
+            tuple: (UTC epoch seconds, new state), or (None, None) past the cached calendar
+        """
+        times, states = self._table
+        index = bisect.bisect_right(times, time.time() if now is None else now)
+        if index == len(times):
+            return None, None
+        return times[index], states[index]
+
+    def run(self, on_change):
+        """
+        Call on_change(state) at every transition until stop() is called.
+
+        The calendar is refreshed on start, unless refresh() was already called,
+        and every refresh_interval. on_change is also called once on start with
+        the current state.
+
+        Args:
+            on_change: Callable taking the new state
+        """
+        if self.last_refresh is None:
+            self.refresh()
+        state = self.status()
+        on_change(state)
+        while not self._stop.is_set():
+            now = time.time()
+            if now - self.last_refresh >= self.refresh_interval:
+                self.refresh()
+            at, _ = self.next_transition(now)
+            refresh_at = self.last_refresh + self.refresh_interval
+            wake = refresh_at if at is None else min(at, refresh_at)
+            if self._stop.wait(max(wake - now, 0)):
+                break
+            # A wait can end a little early; the loop waits again until the transition has passed
+            new_state = self.status()
+            if new_state != state:
+                state = new_state
+                try:
+                    on_change(state)
+                except Exception as e:
+                    logger.error(f"Error handling market state change: {str(e)}")
+
+    def stop(self):
+        """Stop run() at its next wake-up"""
+        self._stop.set()
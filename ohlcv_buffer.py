@@ -0,0 +1,197 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+
+class OHLCVRingBuffer:
+    """
+    A fixed-capacity, preallocated columnar buffer of the most recent bars of one symbol.
+
+    Every bar is written twice, at ``slot`` and ``slot + capacity`` of arrays twice the
+    capacity long, so the last ``n`` bars are always one contiguous slice. Reading them
+    returns NumPy views into the buffer rather than copies, and appending never allocates.
+
+    Views share memory with the buffer: they see later appends that reuse their slots,
+    so copy them if they have to outlive the next append.
+    """
+    COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, capacity: int, symbol: Optional[str] = None):
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1")
+        self.symbol = symbol
+        self.capacity = capacity
+        self._columns = np.full((len(self.COLUMNS), 2 * capacity), np.nan)
+        self._timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self._head = 0  # Slot the next bar is written to
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _to_nanoseconds(timestamp) -> int:
+        """Convert a timestamp to integer nanoseconds since the epoch."""
+        if isinstance(timestamp, (int, np.integer)):
+            return int(timestamp)
+        return pd.Timestamp(timestamp).value
+
+    def append(self, timestamp, open: float, high: float, low: float, close: float, volume: float) -> None:
+        """Append one bar, overwriting the oldest once the buffer is full.
+
+        Args:
+            timestamp: Bar time as nanoseconds since the epoch, a datetime or a pd.Timestamp.
+            open (float): Open price.
+            high (float): High price.
+            low (float): Low price.
+            close (float): Close price.
+            volume (float): Volume.
+        """
+        slot = self._head
+        mirror = slot + self.capacity
+        timestamp = self._to_nanoseconds(timestamp)
+        columns = self._columns
+
+        self._timestamps[slot] = self._timestamps[mirror] = timestamp
+        columns[0, slot] = columns[0, mirror] = open
+        columns[1, slot] = columns[1, mirror] = high
+        columns[2, slot] = columns[2, mirror] = low
+        columns[3, slot] = columns[3, mirror] = close
+        columns[4, slot] = columns[4, mirror] = volume
+
+        self._head = slot + 1 if slot + 1 < self.capacity else 0
+        if self._size < self.capacity:
+            self._size += 1
+
+    def extend(self, timestamps, open, high, low, close, volume) -> None:
+        """Append many bars at once; only the last ``capacity`` of them are kept.
+
+        Args:
+            timestamps: Bar times, as accepted by ``pd.to_datetime`` or int64 nanoseconds.
+            open, high, low, close, volume: Equal-length sequences of bar values.
+        """
+        timestamps = np.asarray(timestamps)
+        if timestamps.dtype != np.int64:
+            timestamps = pd.to_datetime(timestamps).asi8
+        values = np.vstack([np.asarray(column, dtype=float) for column in (open, high, low, close, volume)])
+        count = len(timestamps)
+        keep = min(count, self.capacity)
+
+        slots = (self._head + count - keep + np.arange(keep)) % self.capacity
+        for offset in (0, self.capacity):
+            self._timestamps[slots + offset] = timestamps[count - keep:]
+            self._columns[:, slots + offset] = values[:, count - keep:]
+
+        self._head = (self._head + count) % self.capacity
+        self._size = min(self.capacity, self._size + count)
+
+    def _window(self, n: Optional[int]) -> slice:
+        """Slice of the mirrored arrays holding the last ``n`` bars."""
+        n = self._size if n is None else min(n, self._size)
+        end = self._head + self.capacity
+        return slice(end - n, end)
+
+    def column(self, name: str, n: Optional[int] = None) -> np.ndarray:
+        """Return a zero-copy view of one column over the last ``n`` bars.
+
+        Args:
+            name (str): One of "open", "high", "low", "close", "volume" or "timestamp".
+            n (int, optional): Number of bars. Defaults to every stored bar.
+
+        Returns:
+            np.ndarray: A read-only contiguous view, oldest bar first.
+        """
+        if name == 'timestamp':
+            view = self._timestamps[self._window(n)]
+        else:
+            view = self._columns[self.COLUMNS.index(name), self._window(n)]
+        view.flags.writeable = False
+        return view
+
+    def last(self, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Return zero-copy views of every column over the last ``n`` bars."""
+        return {name: self.column(name, n) for name in ('timestamp',) + self.COLUMNS}
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.column('open')
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.column('high')
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.column('low')
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.column('close')
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.column('volume')
+
+    @property
+    def timestamp(self) -> np.ndarray:
+        return self.column('timestamp')
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        """Nanosecond timestamp of the newest bar, or None when empty."""
+        if self._size == 0:
+            return None
+        return int(self._timestamps[self._head + self.capacity - 1])
+
+
+class OHLCVStore:
+    """
+    Per-symbol OHLCV ring buffers sharing one capacity.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.buffers: Dict[str, OHLCVRingBuffer] = {}
+
+    def __getitem__(self, symbol: str) -> OHLCVRingBuffer:
+        return self.buffers[symbol]
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.buffers
+
+    def buffer(self, symbol: str) -> OHLCVRingBuffer:
+        """Return the buffer of ``symbol``, creating it on first use."""
+        buffer = self.buffers.get(symbol)
+        if buffer is None:
+            buffer = self.buffers[symbol] = OHLCVRingBuffer(self.capacity, symbol)
+        return buffer
+
+    def append(self, symbol: str, timestamp, open: float, high: float, low: float, close: float, volume: float) -> None:
+        """Append one bar to the buffer of ``symbol``."""
+        self.buffer(symbol).append(timestamp, open, high, low, close, volume)
+
+    def matrix(self, name: str, n: Optional[int] = None, symbols: Optional[List[str]] = None) -> np.ndarray:
+        """Stack one column of several symbols into a (symbols x bars) matrix.
+
+        Shorter histories are right-aligned and padded with NaN on the left, the layout
+        the ``TechnicalIndicators.*_batch`` methods expect.
+
+        Args:
+            name (str): Column name, as accepted by ``OHLCVRingBuffer.column``.
+            n (int, optional): Number of bars. Defaults to the longest stored history.
+            symbols (List[str], optional): Row order. Defaults to every stored symbol.
+
+        Returns:
+            np.ndarray: The stacked matrix.
+        """
+        symbols = list(self.buffers) if symbols is None else symbols
+        if n is None:
+            n = max((len(self.buffers[symbol]) for symbol in symbols if symbol in self.buffers), default=0)
+
+        matrix = np.full((len(symbols), n), np.nan)
+        for row, symbol in enumerate(symbols):
+            buffer = self.buffers.get(symbol)
+            if buffer is None or len(buffer) == 0 or n == 0:
+                continue
+            values = buffer.column(name, n)
+            matrix[row, n - len(values):] = values
+        return matrix
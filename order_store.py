@@ -0,0 +1,227 @@
+import threading
+import logging
+import time
+from collections import defaultdict
+
+import pandas as pd
+
+from utils.retry_executor import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+# Order statuses after which an order is no longer open
+CLOSED_ORDER_STATUSES = ('filled', 'canceled', 'expired', 'rejected', 'replaced', 'done_for_day', 'stopped')
+
+# Largest page the orders endpoint will return
+MAX_PAGE_SIZE = 500
+
+def _submitted_at(order):
+    return pd.Timestamp(order._raw['submitted_at'])
+
+def _cursor(ts):
+    """Format a timestamp as an after/until parameter"""
+    return ts.isoformat()
+
+class OrderStore:
+    """
+    Local copy of the account's orders, open and closed, synced incrementally.
+
+    The orders endpoint filters its after and until cursors by submission
+    time, not by last update, so a sync is three steps:
+
+    1. Orders submitted since the last one seen, paged forward with after and
+       bounded by until at the sync's start time. The first sync also reads
+       the open list once, for open orders older than lookback_days.
+    2. Closures of the open orders submitted within closed_window_hours: at
+       most max_closed_pages of closed orders, starting at the oldest of them.
+    3. Open orders older than that window are re-read with get_order, at most
+       max_lookups per sync, the longest unchecked first.
+
+    The open orders a sync returns come from the store, so a poll usually
+    costs one request, plus one closed page while recent orders are open and
+    a few lookups while older ones are. A closure is picked up by the first
+    sync that checks the order. Orders are indexed by status and by symbol.
+
+    Usage:
+        store = OrderStore(api, request=tracker._make_api_request)
+        open_orders = store.sync()
+        fills = store.query(status='filled', symbol='AAPL')
+    """
+    def __init__(self, api, request=None, page_size=MAX_PAGE_SIZE, lookback_days=1, request_timeout=3.0,
+                 closed_window_hours=24, max_closed_pages=1, max_lookups=2):
+        """
+        Initialize the store.
+
+        Args:
+            api: tradeapi.REST client
+            request: Callable (endpoint, func, *args, timeout=..., **kwargs) that makes
+                the call, e.g. BalanceTracker._make_api_request; by default func is called directly
+            page_size: Orders per page, at most 500
+            lookback_days: How far back the first sync reaches
+            request_timeout: Longest any one request may take
+            closed_window_hours: How far back closures are looked for in the closed list
+            max_closed_pages: Most pages of closed orders read per sync
+            max_lookups: Most get_order calls per sync, for open orders older than the window
+        """
+        self.api = api
+        self.request = request or (lambda endpoint, func, *args, timeout=None, **kwargs: func(*args, **kwargs))
+        self.page_size = min(page_size, MAX_PAGE_SIZE)
+        self.request_timeout = request_timeout
+        self.closed_window = pd.Timedelta(hours=closed_window_hours)
+        self.max_closed_pages = max_closed_pages
+        self.max_lookups = max_lookups
+
+        self.orders = {}  # order id -> Order entity
+        self.by_status = defaultdict(set)
+        self.by_symbol = defaultdict(set)
+        self.cursor = pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=lookback_days)
+        self.last_sync = None
+        self._checked = {}  # order id -> time.monotonic() of its last get_order
+        self._lock = threading.Lock()
+
+    def upsert(self, order):
+        """
+        Add or replace an order and re-index it.
+
+        Args:
+            order: Order entity
+
+        Returns:
+            bool: True if the order was new or its status changed
+        """
+        with self._lock:
+            old = self.orders.get(order.id)
+            if old is not None:
+                self.by_status[old.status].discard(order.id)
+                self.by_symbol[old.symbol].discard(order.id)
+            self.orders[order.id] = order
+            self.by_status[order.status].add(order.id)
+            self.by_symbol[order.symbol].add(order.id)
+            if order.status in CLOSED_ORDER_STATUSES:
+                self._checked.pop(order.id, None)
+            return old is None or old.status != order.status
+
+    def _timeout(self, deadline):
+        """Timeout for the next request of a sync that must finish by deadline"""
+        if deadline is None:
+            return self.request_timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded("Order sync ran past its deadline")
+        return min(self.request_timeout, remaining)
+
+    def _page(self, status, after, until, deadline=None, max_pages=None):
+        """
+        Page forward through orders submitted between after and until.
+
+        Args:
+            status: 'open', 'closed' or 'all'
+            after: Timestamp to start from, or None for the beginning
+            until: Timestamp to stop at
+            deadline: time.monotonic() value by which paging must finish, or None
+            max_pages: Most pages to read, or None to read to the end
+
+        Returns:
+            list: Order entities, oldest first, each once
+        """
+        orders = []
+        seen = set()
+        pages = 0
+        while True:
+            # after is exclusive, so step back a microsecond to keep orders sharing the cursor's timestamp
+            page = self.request('orders', self.api.list_orders, status=status, limit=self.page_size,
+                                after=_cursor(after - pd.Timedelta(microseconds=1)) if after is not None else None,
+                                until=_cursor(until), direction='asc', timeout=self._timeout(deadline))
+            # Each page starts with the orders at the last one's timestamp, which are already in
+            for order in page:
+                if order.id not in seen:
+                    seen.add(order.id)
+                    orders.append(order)
+            pages += 1
+            if len(page) < self.page_size or (max_pages is not None and pages >= max_pages):
+                return orders
+            last = _submitted_at(page[-1])
+            if after is not None and last <= after:
+                # A full page at a single instant; the cursor cannot move past it
+                logger.warning(f"More than {self.page_size} {status} orders at {last}; some may be missing")
+                return orders
+            after = last
+
+    def sync(self, timeout=None):
+        """
+        Bring the store up to date with the API.
+
+        Args:
+            timeout: Seconds the whole sync may take, or None for no limit; once
+                it runs out, DeadlineExceeded is raised instead of the next request
+
+        Returns:
+            list: Open Order entities, newest first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        until = pd.Timestamp.now(tz='UTC')
+        fresh = set()
+        for order in self._page('all', self.cursor, until, deadline):
+            self.upsert(order)
+            fresh.add(order.id)
+            self.cursor = max(self.cursor, _submitted_at(order))
+
+        if self.last_sync is None:
+            # Open orders from before the lookback are only in the open list; everything is current after this
+            for order in self._page('open', None, until, deadline):
+                self.upsert(order)
+            self.last_sync = until
+            return self.query(status='open')[::-1]
+        self.last_sync = until
+
+        # Open orders this sync did not just download may have closed since the last one
+        window_start = until - self.closed_window
+        recent, older = [], []
+        for order in self.query(status='open'):
+            if order.id not in fresh:
+                (recent if _submitted_at(order) >= window_start else older).append(order)
+
+        if recent:
+            recent_ids = {order.id for order in recent}
+            for order in self._page('closed', _submitted_at(recent[0]), until, deadline,
+                                    max_pages=self.max_closed_pages):
+                if order.id in recent_ids:
+                    self.upsert(order)
+
+        older.sort(key=lambda order: self._checked.get(order.id, 0))
+        for order in older[:self.max_lookups]:
+            self._checked[order.id] = time.monotonic()
+            self.upsert(self.request('orders', self.api.get_order, order.id, timeout=self._timeout(deadline)))
+
+        return self.query(status='open')[::-1]
+
+    def get(self, order_id):
+        """Get an order by id, or None"""
+        with self._lock:
+            return self.orders.get(order_id)
+
+    def query(self, status=None, symbol=None):
+        """
+        Orders matching a status and/or symbol, from the in-memory indexes.
+
+        Args:
+            status: An order status, 'open' or 'closed', or None for any
+            symbol: A symbol, or None for any
+
+        Returns:
+            list: Order entities, oldest submission first
+        """
+        with self._lock:
+            if status == 'open':
+                ids = set().union(*(ids for name, ids in self.by_status.items()
+                                    if name not in CLOSED_ORDER_STATUSES))
+            elif status == 'closed':
+                ids = set().union(*(self.by_status.get(name, ()) for name in CLOSED_ORDER_STATUSES))
+            elif status is not None:
+                ids = set(self.by_status.get(status, ()))
+            else:
+                ids = set(self.orders)
+            if symbol is not None:
+                ids &= self.by_symbol.get(symbol, set())
+            orders = [self.orders[order_id] for order_id in ids]
+        return sorted(orders, key=_submitted_at)
@@ -0,0 +1,117 @@
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Field names in balance, delta and symbol payloads. The msgpack format sends
+# each as its index here instead of its name; clients get the table on connect.
+# Append only, so clients holding an older table still decode the fields they know.
+FIELDS = (
+    'total_equity', 'cash_balance', 'buying_power', 'daily_change', 'daily_change_pct',
+    'hourly_change', 'hourly_change_pct', 'positions', 'orders', 'stale', 'timestamp',
+    'seq', 'base_seq', 'account', 'add', 'update', 'remove',
+    'symbol', 'qty', 'side', 'avg_entry_price', 'current_price', 'unrealized_pl', 'unrealized_plpc',
+    'id', 'type', 'limit_price', 'submitted_at', 'status', 'position', 'current_balance', 'last_update'
+)
+
+DEFAULT_PRECISION = 4
+
+class PayloadCodec:
+    """
+    Encodes dashboard payloads once per format, for every client of that format.
+
+    Formats:
+        json: The payload as a dict, which Socket.IO encodes as JSON text.
+        msgpack: One binary msgpack frame. Field names from FIELDS are sent as
+            their index, and floats with no fractional part are sent as integers.
+            This format is only offered when the msgpack package is installed.
+
+    Both formats round floats to a fixed number of decimals, so unchanging
+    noise in the last digits does not cost bytes on the wire.
+
+    Usage:
+        codec = PayloadCodec()
+        fmt = codec.negotiate(auth.get('format'))
+        frame = codec.encode(snapshot, fmt)
+    """
+    def __init__(self, precision=DEFAULT_PRECISION, fields=FIELDS):
+        """
+        Initialize the codec.
+
+        Args:
+            precision: Decimals floats are rounded to
+            fields: Field name table for the msgpack format
+        """
+        self.precision = precision
+        self.fields = tuple(fields)
+        self.field_ids = {name: index for index, name in enumerate(self.fields)}
+        self.formats = ('json', 'msgpack') if msgpack is not None else ('json',)
+
+    def negotiate(self, requested):
+        """
+        Pick the format for a client.
+
+        Args:
+            requested: Format the client asked for, or None
+
+        Returns:
+            str: requested if this server offers it, otherwise 'json'
+        """
+        return requested if requested in self.formats else 'json'
+
+    def describe(self, fmt):
+        """What a client needs to decode a format, sent to it as 'payload_format'"""
+        description = {'format': fmt, 'precision': self.precision}
+        if fmt == 'msgpack':
+            description['fields'] = list(self.fields)
+        return description
+
+    def _compact(self, value, keys, integral):
+        if isinstance(value, dict):
+            return {keys.get(key, key): self._compact(item, keys, integral) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._compact(item, keys, integral) for item in value]
+        if isinstance(value, float):
+            value = round(value, self.precision)
+            if integral and value.is_integer():
+                return int(value)
+            return value
+        return value
+
+    def encode(self, data, fmt='json'):
+        """
+        Encode a payload for the clients of one format.
+
+        Args:
+            data: Payload of dicts, lists and scalars
+            fmt: 'json' or 'msgpack'
+
+        Returns:
+            dict or bytes: The rounded payload for 'json', a msgpack frame for 'msgpack'
+        """
+        if fmt == 'msgpack':
+            return msgpack.packb(self._compact(data, self.field_ids, True), use_bin_type=True)
+        return self._compact(data, {}, False)
+
+    def decode(self, frame, fmt='json'):
+        """
+        Decode a frame from encode(), restoring field names; used by tests and benchmarks.
+
+        Args:
+            frame: Output of encode()
+            fmt: Format it was encoded in
+
+        Returns:
+            The payload
+        """
+        if fmt != 'msgpack':
+            return frame
+        return self._restore(msgpack.unpackb(frame, raw=False, strict_map_key=False))
+
+    def _restore(self, value):
+        if isinstance(value, dict):
+            return {self.fields[key] if isinstance(key, int) else key: self._restore(item)
+                    for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._restore(item) for item in value]
+        return value
@@ -1,11 +1,23 @@
 import numpy as np
 import logging
+from alpaca_trade_api.common import get_data_url
 from config import Config
+from utils.retry_executor import API_EXECUTOR, endpoint_key
 
 class RiskManager:
-    def __init__(self, api_client):
+    def __init__(self, api_client, balance_tracker=None, call_timeout=2.0, executor=None):
         self.api = api_client
+        # Optional BalanceTracker whose shared, cached snapshot replaces a get_account call per check
+        self.balance_tracker = balance_tracker
+        # API calls go through the shared retry executor, so a check never outlasts call_timeout per call
+        self.call_timeout = call_timeout
+        self.executor = executor or API_EXECUTOR
         self.portfolio_risk = 0.0
+
+    def _call(self, endpoint, func, *args, data_api=False, **kwargs):
+        """Make an API call with deadline-bounded retries, on the same circuit the trackers use for endpoint"""
+        base_url = get_data_url() if data_api else getattr(self.api, '_base_url', '')
+        return self.executor.call(endpoint_key(base_url, endpoint), func, args, kwargs, timeout=self.call_timeout)
     
     def calculate_portfolio_correlation(self, symbols):
         """Calculate correlation between trading symbols"""
@@ -13,10 +25,13 @@ class RiskManager:
             # Fetch historical data for symbols
             historical_data = {}
             for symbol in symbols:
-                bars = self.api.get_bars(
+                bars = self._call(
+                    'stocks/bars',
+                    self.api.get_bars,
                     symbol, 
                     '1D', 
-                    limit=30
+                    limit=30,
+                    data_api=True
                 ).df['close']
                 historical_data[symbol] = bars
             
@@ -34,7 +49,12 @@ class RiskManager:
         """Check if it's safe to trade a symbol"""
         try:
             # Check portfolio risk
-            account = self.api.get_account()
+            if self.balance_tracker is not None:
+                account = self.balance_tracker.get_account()
+                if account is None:
+                    raise ValueError("no account data available")
+            else:
+                account = self._call('account', self.api.get_account)
             current_risk = float(account.non_marginable_buying_power) / float(account.equity)
             
             if current_risk > Config.MAX_TOTAL_RISK_PERCENT:
@@ -52,8 +72,8 @@ class RiskManager:
         """Perform detailed health check on a symbol"""
         try:
             # Get last trade price and volume
-            last_trade = self.api.get_last_trade(symbol)
-            asset = self.api.get_asset(symbol)
+            last_trade = self._call('stocks/trades/latest', self.api.get_last_trade, symbol, data_api=True)
+            asset = self._call('assets', self.api.get_asset, symbol)
             
             # Basic health checks
             checks = [
@@ -0,0 +1,123 @@
+import threading
+
+# Row collections in a balance snapshot and the field that identifies each row
+SNAPSHOT_COLLECTIONS = {'positions': 'symbol', 'orders': 'id'}
+
+# Top-level fields that change on every poll; they are sent only along with another change
+POLL_FIELDS = ('last_update',)
+
+def diff_rows(previous, current, key):
+    """
+    Diff two lists of row dicts by their key field.
+
+    Args:
+        previous: Rows from the last snapshot
+        current: Rows from the new snapshot
+        key: Field that identifies a row, e.g. 'symbol'
+
+    Returns:
+        dict: Any of 'add' (full rows), 'update' (key plus changed fields) and
+            'remove' (keys), or an empty dict if nothing changed
+    """
+    before = {row[key]: row for row in previous or []}
+    after = {row[key]: row for row in current or []}
+
+    added = [row for row_key, row in after.items() if row_key not in before]
+    removed = [row_key for row_key in before if row_key not in after]
+    updated = []
+    for row_key, row in after.items():
+        old = before.get(row_key)
+        # Unchanged rows are usually the same dict, reused from the last snapshot
+        if old is None or old is row or old == row:
+            continue
+        changes = {field: value for field, value in row.items() if old.get(field) != value}
+        changes[key] = row_key
+        updated.append(changes)
+
+    change = {}
+    if added:
+        change['add'] = added
+    if updated:
+        change['update'] = updated
+    if removed:
+        change['remove'] = removed
+    return change
+
+def diff_snapshots(previous, current):
+    """
+    Diff two balance snapshots.
+
+    Args:
+        previous: The last snapshot sent
+        current: The new snapshot
+
+    Returns:
+        dict: 'account' with the changed top-level fields, plus 'positions' and
+            'orders' row changes for the collections that changed. POLL_FIELDS
+            are only included when something else changed, so a poll that
+            found the account as it was gives an empty 'account' and no rows
+    """
+    account = {field: value for field, value in current.items()
+               if field not in SNAPSHOT_COLLECTIONS and previous.get(field) != value}
+    delta = {'account': {field: value for field, value in account.items() if field not in POLL_FIELDS}}
+    for collection, key in SNAPSHOT_COLLECTIONS.items():
+        change = diff_rows(previous.get(collection), current.get(collection), key)
+        if change:
+            delta[collection] = change
+    if delta['account'] or len(delta) > 1:
+        delta['account'] = account
+    return delta
+
+class SnapshotDiffer:
+    """
+    Turns consecutive balance snapshots into sequence-numbered deltas.
+
+    Every snapshot passed to update gets the next sequence number. A delta
+    carries 'seq' and 'base_seq' (the snapshot it applies on top of), so a
+    client that sees a base_seq other than its own has missed an update and
+    should ask for full_snapshot() instead.
+    """
+    def __init__(self):
+        self.seq = 0
+        self.snapshot = None
+        self._lock = threading.Lock()
+
+    def update(self, snapshot):
+        """
+        Record a new snapshot.
+
+        Args:
+            snapshot: Balance snapshot as returned by get_account_info
+
+        Returns:
+            dict: The delta from the previous snapshot, an empty dict if nothing
+                changed, or None for the first snapshot, which clients can only
+                receive in full
+        """
+        with self._lock:
+            previous = self.snapshot
+            if previous is None:
+                self.seq += 1
+                self.snapshot = snapshot
+                return None
+            delta = diff_snapshots(previous, snapshot)
+            if not delta['account'] and len(delta) == 1:
+                # Nothing changed (e.g. the same cached snapshot); keep the sequence
+                return {}
+            self.seq += 1
+            self.snapshot = snapshot
+            delta['seq'] = self.seq
+            delta['base_seq'] = self.seq - 1
+            return delta
+
+    def full_snapshot(self):
+        """
+        Get the latest snapshot with its sequence number.
+
+        Returns:
+            dict: The snapshot plus 'seq', or None before the first update
+        """
+        with self._lock:
+            if self.snapshot is None:
+                return None
+            return dict(self.snapshot, seq=self.seq)
@@ -7,7 +7,30 @@ const socket = io({
 });
 
 document.addEventListener('DOMContentLoaded', () => {
-    const socket = io();
+    // Ask for compact binary frames when the msgpack decoder is loaded
+    const socket = io({ auth: window.MessagePack ? { format: 'msgpack' } : {} });
+
+    // Field table of the msgpack format: binary frames carry a field's index instead of its name
+    let payloadFields = [];
+
+    const restoreFields = (value) => {
+        if (Array.isArray(value)) return value.map(restoreFields);
+        if (value === null || typeof value !== 'object') return value;
+        const restored = {};
+        Object.entries(value).forEach(([key, item]) => {
+            const name = /^\d+$/.test(key) ? payloadFields[Number(key)] : key;
+            restored[name === undefined ? key : name] = restoreFields(item);
+        });
+        return restored;
+    };
+
+    // Dashboard events arrive as objects (json) or as binary msgpack frames
+    const decodePayload = (handler) => (data) => {
+        if (data instanceof ArrayBuffer || ArrayBuffer.isView(data)) {
+            data = restoreFields(MessagePack.decode(data instanceof ArrayBuffer ? new Uint8Array(data) : data));
+        }
+        handler(data);
+    };
     
     // UI Elements
     const marketStatus = document.getElementById('market-status');
@@ -112,8 +135,63 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     };
 
-    // Add log entry
-    const addLogEntry = (data) => {
+    // Client copy of the server's balance snapshot, kept current by deltas
+    let balanceSeq = null;
+    let balanceAccount = null;
+    let snapshotRequested = false;
+    const positionsBySymbol = new Map();
+    const ordersById = new Map();
+
+    // Replace the local copy with a full snapshot
+    const applyBalanceSnapshot = (data) => {
+        if (!data) return;
+        const { positions, orders, seq, ...account } = data;
+        balanceSeq = seq;
+        balanceAccount = account;
+        snapshotRequested = false;
+
+        positionsBySymbol.clear();
+        (positions || []).forEach(pos => positionsBySymbol.set(pos.symbol, pos));
+        ordersById.clear();
+        (orders || []).forEach(order => ordersById.set(order.id, order));
+
+        updateBalance(balanceAccount);
+        updatePositions(Array.from(positionsBySymbol.values()));
+        updateOrders(Array.from(ordersById.values()));
+    };
+
+    // Apply add/update/remove changes to a keyed row collection
+    const applyRowChanges = (rows, change, key) => {
+        if (!change) return false;
+        (change.remove || []).forEach(rowKey => rows.delete(rowKey));
+        (change.add || []).forEach(row => rows.set(row[key], row));
+        (change.update || []).forEach(row => rows.set(row[key], { ...rows.get(row[key]), ...row }));
+        return true;
+    };
+
+    // Apply a delta on top of the local copy, or ask for a full snapshot on a gap
+    const applyBalanceDelta = (delta) => {
+        if (balanceSeq !== null && delta.seq <= balanceSeq) return;  // Already covered by a snapshot
+        if (balanceAccount === null || delta.base_seq !== balanceSeq) {
+            if (!snapshotRequested) {
+                snapshotRequested = true;
+                socket.emit('request_snapshot');
+            }
+            return;
+        }
+        balanceSeq = delta.seq;
+        Object.assign(balanceAccount, delta.account);
+
+        updateBalance(balanceAccount);
+        if (applyRowChanges(positionsBySymbol, delta.positions, 'symbol')) {
+            updatePositions(Array.from(positionsBySymbol.values()));
+        }
+        if (applyRowChanges(ordersById, delta.orders, 'id')) {
+            updateOrders(Array.from(ordersById.values()));
+        }
+    };
+
+    const createLogEntry = (data) => {
         const entry = document.createElement('div');
         entry.className = `log-entry ${data.level.toLowerCase()}`;
         
@@ -126,8 +204,14 @@ document.addEventListener('DOMContentLoaded', () => {
         
         entry.appendChild(timestamp);
         entry.appendChild(message);
-        
-        logContainer.appendChild(entry);
+        return entry;
+    };
+
+    // Append log entries in one DOM update
+    const appendLogEntries = (entries) => {
+        const fragment = document.createDocumentFragment();
+        entries.forEach((data) => fragment.appendChild(createLogEntry(data)));
+        logContainer.appendChild(fragment);
         logContainer.scrollTop = logContainer.scrollHeight;
         
         // Keep only the last 100 log entries
@@ -136,6 +220,23 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     };
 
+    // Add log entry
+    const addLogEntry = (data) => appendLogEntries([data]);
+
+    // Render a log_batch: its records, plus a summary line for anything dropped
+    const addLogBatch = (batch) => {
+        const entries = batch.records.slice();
+        const dropped = Object.entries(batch.dropped || {});
+        if (dropped.length) {
+            entries.push({
+                timestamp: new Date().toISOString(),
+                level: 'warning',
+                message: `Dropped ${dropped.map(([level, count]) => `${count} ${level}`).join(', ')} log records`
+            });
+        }
+        appendLogEntries(entries);
+    };
+
     // Socket event handlers
     socket.on('connect', () => {
         addLogEntry({
@@ -153,19 +254,19 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     });
 
-    socket.on('market_status', (data) => {
-        updateMarketStatus(data.status);
+    socket.on('payload_format', (data) => {
+        payloadFields = data.fields || [];
     });
 
-    socket.on('balance_update', (data) => {
-        updateBalance(data);
-        updatePositions(data.positions);
-        updateOrders(data.orders);
-    });
+    socket.on('market_status', decodePayload((data) => {
+        updateMarketStatus(data.status);
+    }));
 
-    socket.on('log_message', (data) => {
-        addLogEntry(data);
-    });
+    socket.on('balance_update', decodePayload(applyBalanceSnapshot));
+
+    socket.on('balance_delta', decodePayload(applyBalanceDelta));
+
+    socket.on('log_batch', addLogBatch);
 });
 
 // Handle connection events
@@ -179,9 +280,9 @@ socket.on('disconnect', function() {
     console.log('Disconnected from server');
 });
 
-// Handle log messages
-socket.on('log_message', function(data) {
-    console.log(`[${data.timestamp}] ${data.message}`);
+// Handle log batches
+socket.on('log_batch', function(batch) {
+    batch.records.forEach(data => console.log(`[${data.timestamp}] ${data.message}`));
 });
 
 // Filter trading activity
@@ -358,34 +459,6 @@ function updateBalance(data) {
     }
 }
 
-function addLogEntry(data) {
-    console.log('[Client] Received log message:', data);
-    try {
-        const logContainer = document.getElementById('log-container');
-        if (!logContainer) {
-            console.error('[Client] Log container not found');
-            return;
-        }
-        
-        const entry = document.createElement('div');
-        entry.className = 'log-entry';
-        entry.innerHTML = `
-            <span class="timestamp">[${formatTimestamp(data.timestamp)}]</span>
-            <span class="message">${data.message}</span>
-        `;
-        
-        logContainer.appendChild(entry);
-        logContainer.scrollTop = logContainer.scrollHeight;
-        
-        // Keep only last 100 log entries
-        while (logContainer.children.length > 100) {
-            logContainer.removeChild(logContainer.firstChild);
-        }
-    } catch (error) {
-        console.error('[Client] Error adding log entry:', error);
-    }
-}
-
 function updateTrade(data) {
     console.log('[Client] Received trade update:', data);
     try {
@@ -471,4 +544,3 @@ socket.on('connect_error', (error) => {
 
 socket.on('balance_update', updateBalance);
 socket.on('trade_update', updateTrade);
-socket.on('log_message', addLogEntry);
@@ -0,0 +1,239 @@
+import asyncio
+import threading
+import time
+import logging
+from alpaca_trade_api.entity import Account, Order, Position
+from alpaca_trade_api.stream import TradingStream
+import config
+from balance_tracker import BalanceTracker
+from order_store import CLOSED_ORDER_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# trade_updates events that carry an execution (price, qty and position_qty)
+FILL_EVENTS = ('fill', 'partial_fill')
+
+def _format_number(value):
+    """Format a quantity or amount the way the REST API does: '10', '0.5'"""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class TradeBook:
+    """
+    Local copy of the account, open positions and open orders.
+
+    Reset from REST responses and then kept current by applying trade_updates
+    events: order events upsert or drop the order, and fills move the position
+    and cash. Positions are marked at the last fill price, and equity only
+    changes on reconcile, since there is no market data feed behind the book.
+    """
+    def __init__(self):
+        self.account = None
+        self.positions = {}  # symbol -> raw position dict
+        self.orders = {}  # order id -> raw order dict
+        self.updates_applied = 0
+
+    def reset(self, sections, stale=()):
+        """
+        Replace the book with fresh REST sections.
+
+        Args:
+            sections: Dict of 'account', 'positions' and 'orders' entities
+            stale: Sections that failed to load; their local copy is kept
+        """
+        if 'account' not in stale and sections.get('account') is not None:
+            self.account = dict(sections['account']._raw)
+        if 'positions' not in stale and sections.get('positions') is not None:
+            self.positions = {pos.symbol: dict(pos._raw) for pos in sections['positions']}
+        if 'orders' not in stale and sections.get('orders') is not None:
+            self.orders = {order.id: dict(order._raw) for order in sections['orders']}
+
+    def apply(self, update, adjust_cash=True):
+        """
+        Apply one trade_updates event.
+
+        Args:
+            update: The event's 'data' dict: 'event', 'order', and for fills
+                'price', 'qty' and 'position_qty'
+            adjust_cash: Whether a fill also moves cash and buying power
+
+        Returns:
+            str: The event name
+        """
+        event = update.get('event')
+        order = update.get('order') or {}
+        order_id = order.get('id')
+        if order_id is not None:
+            if order.get('status') in CLOSED_ORDER_STATUSES:
+                self.orders.pop(order_id, None)
+            else:
+                self.orders[order_id] = order
+
+        if event in FILL_EVENTS and order.get('symbol'):
+            self._apply_fill(order['symbol'], order.get('side'), float(update['qty']),
+                             float(update['price']), update.get('position_qty'), adjust_cash)
+        self.updates_applied += 1
+        return event
+
+    def _apply_fill(self, symbol, side, qty, price, position_qty, adjust_cash):
+        signed_qty = qty if side == 'buy' else -qty
+        if adjust_cash and self.account is not None:
+            for field in ('cash', 'buying_power'):
+                if field in self.account:
+                    self.account[field] = _format_number(float(self.account[field]) - signed_qty * price)
+
+        position = self.positions.get(symbol)
+        old_qty = float(position['qty']) if position else 0.0
+        # position_qty is the broker's own figure after the fill, so prefer it
+        new_qty = float(position_qty) if position_qty is not None else old_qty + signed_qty
+        if new_qty == 0:
+            self.positions.pop(symbol, None)
+            return
+
+        old_avg = float(position['avg_entry_price']) if position else price
+        if old_qty == 0 or (old_qty > 0) != (new_qty > 0):
+            avg_entry = price  # Opened, or flipped through zero
+        elif abs(new_qty) > abs(old_qty):
+            avg_entry = (abs(old_qty) * old_avg + (abs(new_qty) - abs(old_qty)) * price) / abs(new_qty)
+        else:
+            avg_entry = old_avg  # Reducing keeps the entry price
+
+        direction = 1 if new_qty > 0 else -1
+        self.positions[symbol] = dict(
+            position or {},
+            symbol=symbol,
+            qty=_format_number(new_qty),
+            side='long' if new_qty > 0 else 'short',
+            avg_entry_price=str(avg_entry),
+            current_price=str(price),
+            market_value=str(new_qty * price),
+            unrealized_pl=str((price - avg_entry) * new_qty),
+            unrealized_plpc=str((price / avg_entry - 1) * direction)
+        )
+
+    def sections(self):
+        """
+        Get the book as REST-style entities.
+
+        Returns:
+            dict: 'account', 'positions' and 'orders' as tradeapi entities
+        """
+        return {
+            'account': Account(dict(self.account)) if self.account is not None else None,
+            'positions': [Position(dict(pos)) for pos in self.positions.values()],
+            'orders': [Order(dict(order)) for order in self.orders.values()]
+        }
+
+class StreamingBalanceTracker(BalanceTracker):
+    """
+    BalanceTracker fed by the trade_updates WebSocket instead of polling.
+
+    Fills and order events are applied to a local TradeBook as they arrive,
+    so snapshots are built without API calls. REST is only used to seed the
+    book and to reconcile it every reconcile_interval seconds.
+
+    Usage:
+        tracker = StreamingBalanceTracker(key, secret, base_url)
+        tracker.start()
+        while tracker.wait_for_update(timeout=30):
+            info = tracker.get_account_info()
+    """
+    def __init__(self, api_key, api_secret, base_url, stream_url=None, reconcile_interval=None, **kwargs):
+        super().__init__(api_key, api_secret, base_url, **kwargs)
+        if reconcile_interval is None:
+            reconcile_interval = config.Config.STREAM_RECONCILE_INTERVAL
+        self.reconcile_interval = reconcile_interval
+        self.last_reconcile = None
+
+        self.book = TradeBook()
+        self._book_lock = threading.Lock()
+        self._reconciling = False
+        self._replay = []  # Updates that arrive while a reconcile is in flight
+        self._updated = threading.Event()
+
+        self.stream = TradingStream(api_key, api_secret, (stream_url or self.base_url).rstrip('/'), raw_data=True)
+        self.stream.subscribe_trade_updates(self._on_trade_update)
+        self._stream_thread = None
+
+    async def _on_trade_update(self, message):
+        """Apply a trade_updates message from the stream"""
+        update = message.get('data') or {}
+        with self._book_lock:
+            event = self.book.apply(update)
+            if self._reconciling:
+                self._replay.append(update)
+        if self.order_store is not None and update.get('order'):
+            self.order_store.upsert(Order(dict(update['order'])))
+        logger.info(f"Trade update: {event} {(update.get('order') or {}).get('symbol', '')}")
+        self._snapshot_cache.invalidate()
+        self._updated.set()
+
+    def _reconcile_due(self):
+        return self.last_reconcile is None or time.monotonic() - self.last_reconcile >= self.reconcile_interval
+
+    def _fetch_sections(self):
+        """Serve sections from the local book, reconciling with REST when due"""
+        if not self._reconcile_due():
+            with self._book_lock:
+                return self.book.sections(), []
+
+        with self._book_lock:
+            self._reconciling = True
+            self._replay = []
+        try:
+            sections, stale = super()._fetch_sections()
+        finally:
+            with self._book_lock:
+                self._reconciling = False
+                replay, self._replay = self._replay, []
+        with self._book_lock:
+            self.book.reset(sections, stale)
+            # Orders and positions from updates that raced the REST calls are absolute,
+            # so re-applying them is safe; cash is left to the REST figures
+            for update in replay:
+                self.book.apply(update, adjust_cash=False)
+            if 'account' not in stale:
+                self.last_reconcile = time.monotonic()
+            return self.book.sections(), stale
+
+    def reconcile(self):
+        """Force the next snapshot to reconcile the local book with REST"""
+        self.last_reconcile = None
+        self._snapshot_cache.invalidate()
+
+    def wait_for_update(self, timeout=None):
+        """
+        Block until a trade update arrives or the timeout passes.
+        :param timeout: Seconds to wait
+        :return: True if an update arrived, False on timeout
+        """
+        updated = self._updated.wait(timeout)
+        self._updated.clear()
+        return updated
+
+    def _run_stream(self):
+        # TradingStream has no run() of its own; it reconnects inside _run_forever
+        asyncio.run(self.stream._run_forever())
+
+    def start(self):
+        """Connect the trade_updates stream in a background thread"""
+        if self._stream_thread is None or not self._stream_thread.is_alive():
+            self._stream_thread = threading.Thread(target=self._run_stream, name='trade-updates', daemon=True)
+            self._stream_thread.start()
+
+    def stop(self):
+        """Disconnect the stream"""
+        if self._stream_thread is not None and self._stream_thread.is_alive():
+            try:
+                self.stream.stop()
+            except Exception as e:
+                logger.warning(f"Error stopping trade stream: {str(e)}")
+
+    def close(self):
+        self.stop()
+        super().close()
+
+    def run(self):
+        self.start()
+        while True:
+            self.wait_for_update(timeout=self.reconcile_interval)
+            self.get_account_info()
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import websockets
+
+
+class _Server(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections when many clients connect at once
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class FakeAlpacaServer:
+    """
+    Local stand-in for the Alpaca trading REST API.
+
+    Serves /v2/account, /v2/positions, /v2/orders and /v2/clock from in-memory
+    data, with a configurable delay and HTTP status per path, and records when
+    each request started and finished so tests can check for concurrency, and
+    which client connections they came in on so tests can check for keep-alive.
+
+    Usage:
+        with FakeAlpacaServer(latency={'/v2/orders': 0.5}) as server:
+            tracker = BalanceTracker('key', 'secret', server.base_url)
+    """
+    def __init__(self, latency=None, status=None):
+        self.latency = dict(latency or {})
+        self.status = dict(status or {})
+        self.account = {
+            'id': 'fake-account',
+            'status': 'ACTIVE',
+            'portfolio_value': '10000.00',
+            'equity': '10000.00',
+            'cash': '5000.00',
+            'buying_power': '5000.00'
+        }
+        self.positions = [{
+            'symbol': 'AAPL',
+            'qty': '10',
+            'side': 'long',
+            'avg_entry_price': '150.00',
+            'current_price': '160.00',
+            'unrealized_pl': '100.00',
+            'unrealized_plpc': '0.0667'
+        }]
+        self.orders = [{
+            'id': 'order-1',
+            'symbol': 'GOOGL',
+            'qty': '5',
+            'side': 'buy',
+            'type': 'limit',
+            'status': 'new',
+            'limit_price': '2500.00',
+            'submitted_at': '2024-01-02T15:30:00Z'
+        }]
+        self.clock = {
+            'timestamp': '2024-01-02T10:00:00-05:00',
+            'is_open': True,
+            'next_open': '2024-01-03T09:30:00-05:00',
+            'next_close': '2024-01-02T16:00:00-05:00'
+        }
+        self.requests = []  # (path, started, finished) in time.monotonic() seconds
+        self.connections = set()  # client (host, port) pairs seen
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def routes(self):
+        return {
+            '/v2/account': self.account,
+            '/v2/positions': self.positions,
+            '/v2/orders': self.orders,
+            '/v2/clock': self.clock
+        }
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                started = time.monotonic()
+                path = urlparse(self.path).path
+                time.sleep(server.latency.get(path, 0.0))
+
+                body = server.routes().get(path)
+                status = server.status.get(path, 200 if body is not None else 404)
+                if status != 200:
+                    body = {'code': status, 'message': 'fake error'}
+                payload = json.dumps(body).encode()
+
+                # Record before responding, so a client never sees a reply that is not counted yet
+                with server._lock:
+                    server.requests.append((path, started, time.monotonic()))
+                    server.connections.add(self.client_address)
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._server = _Server(('127.0.0.1', 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class FakeTradeStream:
+    """
+    Local stand-in for the Alpaca trade_updates WebSocket at /stream.
+
+    Accepts any credentials, acknowledges the listen request, and then sends
+    whatever is passed to push() to every listening client.
+
+    Usage:
+        with FakeTradeStream() as stream:
+            tracker = StreamingBalanceTracker('key', 'secret', rest_url, stream_url=stream.base_url)
+            stream.push({'event': 'fill', 'order': {...}, 'price': '150', 'qty': '1', 'position_qty': '11'})
+    """
+    def __init__(self):
+        self.received = []  # Messages sent by clients
+        self.listening = threading.Event()
+        self._clients = set()
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._started = threading.Event()
+
+    @property
+    def base_url(self):
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def _handler(self, websocket, path=None):
+        async for raw in websocket:
+            message = json.loads(raw)
+            self.received.append(message)
+            if message.get('action') == 'authenticate':
+                await websocket.send(json.dumps({'stream': 'authorization',
+                                                 'data': {'action': 'authenticate', 'status': 'authorized'}}))
+            elif message.get('action') == 'listen':
+                self._clients.add(websocket)
+                await websocket.send(json.dumps({'stream': 'listening', 'data': message.get('data', {})}))
+                self.listening.set()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(websockets.serve(self._handler, '127.0.0.1', 0))
+        self._started.set()
+        self._loop.run_forever()
+
+    def push(self, update):
+        """Send a trade_updates event to every listening client"""
+        message = json.dumps({'stream': 'trade_updates', 'data': update})
+
+        async def send():
+            for websocket in list(self._clients):
+                await websocket.send(message)
+        asyncio.run_coroutine_threadsafe(send(), self._loop).result(timeout=5)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._started.wait(5)
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            async def shutdown():
+                self._server.close()
+                for websocket in list(self._clients):
+                    await websocket.close()
+                await self._server.wait_closed()
+            asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(timeout=5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(5)
+            self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,52 @@
+import unittest
+import os
+import sys
+
+from alpaca_trade_api.entity import Order, Position
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from account_records import OrderRecord, PositionRecord, RecordSet
+
+def make_position(symbol, qty='10', current_price='160.00'):
+    return Position({'symbol': symbol, 'qty': qty, 'avg_entry_price': '150.00', 'current_price': current_price,
+                     'unrealized_pl': '100.00', 'unrealized_plpc': '0.0667'})
+
+def make_order(order_id, submitted_at='2024-01-02T15:30:00.123456789Z'):
+    return Order({'id': order_id, 'symbol': 'GOOGL', 'qty': '5', 'side': 'buy', 'type': 'limit',
+                  'limit_price': '2500.00', 'submitted_at': submitted_at})
+
+class TestAccountRecords(unittest.TestCase):
+    def test_unchanged_rows_are_reused(self):
+        """Test unchanged positions return the same row and changed ones are re-parsed"""
+        positions = RecordSet(PositionRecord, 'symbol')
+        first = positions.update([make_position('AAPL'), make_position('MSFT')])
+        self.assertEqual(first[0], {'symbol': 'AAPL', 'qty': '10', 'side': 'buy', 'avg_entry_price': 150.0,
+                                    'current_price': 160.0, 'unrealized_pl': 100.0,
+                                    'unrealized_plpc': float('0.0667') * 100})
+
+        second = positions.update([make_position('AAPL'), make_position('MSFT', current_price='170.00')])
+        self.assertIs(second[0], first[0])
+        self.assertIsNot(second[1], first[1])
+        self.assertEqual(second[1]['current_price'], 170.0)
+
+        self.assertEqual([row['symbol'] for row in positions.update([make_position('MSFT')])], ['MSFT'])
+        self.assertEqual(list(positions.records), ['MSFT'])
+
+    def test_order_timestamps_match_entity_formatting(self):
+        """Test submitted_at is formatted from the raw string as the Timestamp would be"""
+        for submitted_at in ('2024-01-02T15:30:00Z', '2024-01-02T15:30:00.123456789Z',
+                             '2024-01-02T10:30:00.5-05:00'):
+            order = make_order('o1', submitted_at)
+            record = OrderRecord('o1')
+            record.update(order)
+            self.assertEqual(record.to_dict()['submitted_at'], order.submitted_at.strftime('%Y-%m-%d %H:%M:%S'))
+        self.assertEqual(record.to_dict()['limit_price'], 2500.0)
+
+    def test_records_have_no_instance_dict(self):
+        """Test records are slot-based"""
+        self.assertFalse(hasattr(PositionRecord('AAPL'), '__dict__'))
+        self.assertFalse(hasattr(OrderRecord('o1'), '__dict__'))
+
+if __name__ == '__main__':
+    unittest.main()
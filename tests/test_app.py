@@ -1,12 +1,18 @@
 import unittest
+import logging
 from unittest.mock import Mock, patch
 import os
 import sys
-from datetime import datetime
+from datetime import datetime, timedelta
+
+import pandas as pd
+from alpaca_trade_api.entity import Clock
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app import app, get_market_status
+import app as app_module
+from app import app, get_market_status, publish_balance, socketio
+from balance_tracker import BalanceSnapshotBuilder
 
 class TestFlaskApp(unittest.TestCase):
     def setUp(self):
@@ -50,6 +56,14 @@ class TestFlaskApp(unittest.TestCase):
         status = get_market_status(mock_api.return_value)
         self.assertEqual(status, 'EXTENDED')
 
+    def test_market_status_aware_clock(self):
+        """Test market status from an API clock, whose times are timezone-aware"""
+        now = pd.Timestamp.now(tz='America/New_York')
+        clock = Clock({'is_open': True, 'timestamp': now.isoformat(),
+                       'next_open': (now - timedelta(hours=2)).isoformat(),
+                       'next_close': (now + timedelta(hours=4)).isoformat()})
+        self.assertEqual(get_market_status(Mock(get_clock=Mock(return_value=clock))), 'REGULAR')
+
     @patch('alpaca_trade_api.REST')
     def test_market_status_closed(self, mock_api):
         """Test market status detection for closed market"""
@@ -71,5 +85,43 @@ class TestFlaskApp(unittest.TestCase):
         status = get_market_status(mock_api.return_value)
         self.assertEqual(status, 'UNKNOWN')
 
+    def test_balance_deltas_over_socketio(self):
+        """Test clients get a full snapshot on connect and deltas afterwards"""
+        tracker = BalanceSnapshotBuilder()
+        snapshot = {'total_equity': 10000.0, 'positions': [{'symbol': 'AAPL', 'qty': '10'}], 'orders': []}
+        self.addCleanup(setattr, app_module, 'published_tracker', None)
+        publish_balance(tracker, snapshot, 'CLOSED')
+
+        client = socketio.test_client(app)
+        received = client.get_received()
+        full = [message['args'][0] for message in received if message['name'] == 'balance_update']
+        self.assertEqual(full, [dict(snapshot, seq=1)])
+
+        publish_balance(tracker, dict(snapshot, total_equity=10050.0), 'CLOSED')
+        deltas = [message['args'][0] for message in client.get_received() if message['name'] == 'balance_delta']
+        self.assertEqual(deltas, [{'account': {'total_equity': 10050.0}, 'seq': 2, 'base_seq': 1}])
+
+        # A client that missed a delta asks for the snapshot again
+        client.emit('request_snapshot')
+        full = [message['args'][0] for message in client.get_received() if message['name'] == 'balance_update']
+        self.assertEqual(full[0]['seq'], 2)
+        self.assertEqual(full[0]['total_equity'], 10050.0)
+        client.disconnect()
+
+    def test_logs_are_shipped_in_batches(self):
+        """Test log records reach clients as log_batch events"""
+        client = socketio.test_client(app)
+        client.get_received()
+        logging.getLogger('test_app').warning('first')
+        logging.getLogger('test_app').warning('second')
+        app_module.log_handler.flush()
+
+        batches = [message['args'][0] for message in client.get_received() if message['name'] == 'log_batch']
+        messages = [record['message'] for batch in batches for record in batch['records']]
+        self.assertIn('first', messages)
+        self.assertIn('second', messages)
+        self.assertFalse(any(message['name'] == 'log_message' for message in client.get_received()))
+        client.disconnect()
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+from unittest.mock import patch
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_balance_tracker import AsyncBalanceTracker, create_session
+from tests.fake_alpaca import FakeAlpacaServer
+from utils.rate_limiter import RATE_LIMITERS, RateLimiter
+
+class TestAsyncBalanceTracker(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        """Start a local fake API with injected latency"""
+        # Keep the shared account limiter out of the timings
+        limiter_patch = patch.dict(RATE_LIMITERS, {'account': RateLimiter(max_tokens=1000, refill_rate=1000)})
+        limiter_patch.start()
+        self.addCleanup(limiter_patch.stop)
+        self.server = FakeAlpacaServer(latency={'/v2/account': 0.3, '/v2/positions': 0.3, '/v2/orders': 0.3}).start()
+        self.addCleanup(self.server.stop)
+
+    def make_tracker(self, **kwargs):
+        kwargs.setdefault('snapshot_ttl', 0)
+        tracker = AsyncBalanceTracker('test_key', 'test_secret', self.server.base_url + '/v2', **kwargs)
+        tracker.max_retries = 1
+        return tracker
+
+    async def test_snapshot_matches_blocking_tracker(self):
+        """Test the snapshot has the BalanceTracker shape and takes one round trip"""
+        async with self.make_tracker(latency_budget=1.0) as tracker:
+            start = time.monotonic()
+            info = await tracker.get_account_info()
+            elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 0.6)
+        self.assertEqual(info['stale'], [])
+        self.assertEqual(info['total_equity'], 10000.0)
+        self.assertEqual(info['positions'][0]['symbol'], 'AAPL')
+        self.assertEqual(info['positions'][0]['unrealized_plpc'], 6.67)
+        self.assertEqual(info['orders'][0]['submitted_at'], '2024-01-02 15:30:00')
+        self.assertEqual(info['orders'][0]['limit_price'], 2500.0)
+
+    async def test_many_trackers_share_one_loop_and_pool(self):
+        """Test one loop drives many trackers concurrently over reused connections"""
+        async with create_session(limit=100) as session:
+            trackers = [self.make_tracker(session=session) for _ in range(20)]
+            start = time.monotonic()
+            snapshots = await asyncio.gather(*(tracker.get_account_info() for tracker in trackers))
+            elapsed = time.monotonic() - start
+            connections = len(self.server.connections)
+
+            await asyncio.gather(*(tracker.get_account_info() for tracker in trackers))
+            for tracker in trackers:
+                await tracker.close()
+            self.assertFalse(session.closed)
+
+        print(f"\n20 trackers x 3 requests of 300 ms took {elapsed * 1000:.0f} ms on one loop")
+        # Serially this would take 20 x 300 ms
+        self.assertLess(elapsed, 3.0)
+        self.assertTrue(all(snapshot['stale'] == [] for snapshot in snapshots))
+        self.assertEqual(len(self.server.requests), 120)
+        # The second round went over the connections opened by the first
+        self.assertEqual(len(self.server.connections), connections)
+
+    async def test_latency_budget_marks_stale(self):
+        """Test a slow section is marked stale and the next call waits on the same request"""
+        self.server.latency['/v2/orders'] = 1.5
+        async with self.make_tracker(latency_budget=0.8) as tracker:
+            info = await tracker.get_account_info()
+            self.assertEqual(info['stale'], ['orders'])
+            self.assertEqual(info['orders'], [])
+
+            tracker.latency_budget = 3.0
+            info = await tracker.get_account_info()
+            self.assertEqual(info['stale'], [])
+            self.assertEqual(len(info['orders']), 1)
+        self.assertEqual(sum(1 for path, _, _ in self.server.requests if path == '/v2/orders'), 1)
+
+    async def test_failed_section_serves_last_good_copy(self):
+        """Test a failing section keeps its last good data and is marked stale"""
+        async with self.make_tracker() as tracker:
+            await tracker.get_account_info()
+            self.server.status['/v2/positions'] = 500
+            info = await tracker.get_account_info()
+
+            self.assertEqual(info['stale'], ['positions'])
+            self.assertEqual(info['positions'][0]['symbol'], 'AAPL')
+
+            self.server.status['/v2/account'] = 500
+            fresh = self.make_tracker()
+            self.assertIsNone(await fresh.get_account_info())
+            await fresh.close()
+
+    async def test_backoff_does_not_block_loop(self):
+        """Test retry back-off yields to other coroutines on the loop"""
+        self.server.latency.clear()
+        self.server.status['/v2/account'] = 500
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        async with self.make_tracker() as tracker:
+            tracker.max_retries = 2
+            tracker.base_delay = 0.2
+            beat = asyncio.create_task(heartbeat())
+            info = await tracker.get_account_info()
+            beat.cancel()
+
+        self.assertIsNone(info)
+        self.assertEqual(sum(1 for path, _, _ in self.server.requests if path == '/v2/account'), 2)
+        self.assertGreater(ticks, 10)
+
+    async def test_concurrent_callers_share_one_fetch(self):
+        """Test concurrent callers on the loop share one snapshot fetch and its cache"""
+        async with self.make_tracker(snapshot_ttl=5.0) as tracker:
+            snapshots = await asyncio.gather(*(tracker.get_account_info() for _ in range(10)))
+            self.assertTrue(all(info is snapshots[0] for info in snapshots))
+            self.assertIs(await tracker.get_account_info(), snapshots[0])
+            self.assertEqual((await tracker.get_account()).equity, '10000.00')
+        self.assertEqual(len(self.server.requests), 3)
+
+    async def test_get_clock(self):
+        """Test the market clock is returned as a tradeapi Clock entity"""
+        async with self.make_tracker() as tracker:
+            clock = await tracker.get_clock()
+        self.assertTrue(clock.is_open)
+        self.assertEqual(clock.next_close.hour, 16)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,11 +2,15 @@ import unittest
 from unittest.mock import Mock, patch
 import os
 import sys
+import threading
+import time
 from datetime import datetime, timedelta
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from balance_tracker import BalanceTracker
+from tests.fake_alpaca import FakeAlpacaServer
+from utils.rate_limiter import RATE_LIMITERS, RateLimiter
 
 class TestBalanceTracker(unittest.TestCase):
     def setUp(self):
@@ -104,5 +108,101 @@ class TestBalanceTracker(unittest.TestCase):
                 mock_sleep.assert_called()
                 self.assertIsNotNone(info)
 
+class TestConcurrentSnapshot(unittest.TestCase):
+    def setUp(self):
+        """Start a local fake API with injected latency"""
+        # Keep the shared account limiter out of the timings
+        limiter_patch = patch.dict(RATE_LIMITERS, {'account': RateLimiter(max_tokens=1000, refill_rate=1000)})
+        limiter_patch.start()
+        self.addCleanup(limiter_patch.stop)
+        self.server = FakeAlpacaServer(latency={'/v2/account': 0.3, '/v2/positions': 0.3, '/v2/orders': 0.3}).start()
+        self.tracker = BalanceTracker('test_key', 'test_secret', self.server.base_url,
+                                      latency_budget=1.0, snapshot_ttl=0)
+        self.tracker.max_retries = 1
+
+    def tearDown(self):
+        self.tracker.close()
+        self.server.stop()
+
+    def test_base_url_suffix(self):
+        """Test only a trailing /v2 path is stripped from the base URL"""
+        self.assertEqual(BalanceTracker('k', 's', 'http://127.0.0.1:8082/v2/').base_url, 'http://127.0.0.1:8082')
+        self.assertEqual(BalanceTracker('k', 's', 'http://127.0.0.1:8082').base_url, 'http://127.0.0.1:8082')
+
+    def test_requests_run_concurrently(self):
+        """Test the snapshot takes one round trip, not the sum of three"""
+        start = time.monotonic()
+        info = self.tracker.get_account_info()
+        elapsed = time.monotonic() - start
+
+        print(f"\nSnapshot with three 300 ms requests took {elapsed * 1000:.0f} ms")
+        self.assertLess(elapsed, 0.6)
+        self.assertEqual(info['stale'], [])
+        self.assertEqual(info['total_equity'], 10000.0)
+        self.assertEqual(info['positions'][0]['symbol'], 'AAPL')
+        self.assertEqual(info['orders'][0]['submitted_at'], '2024-01-02 15:30:00')
+
+        # Every request started before any of them finished
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertLess(max(started for _, started, _ in self.server.requests),
+                        min(finished for _, _, finished in self.server.requests))
+
+    def test_latency_budget_marks_stale(self):
+        """Test a slow section is marked stale once the latency budget runs out"""
+        self.server.latency['/v2/orders'] = 2.0
+        start = time.monotonic()
+        info = self.tracker.get_account_info()
+        elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 1.5)
+        self.assertEqual(info['stale'], ['orders'])
+        self.assertEqual(info['orders'], [])
+        self.assertEqual(len(info['positions']), 1)
+
+        # The next snapshot waits on the same request rather than sending another
+        self.tracker.latency_budget = 3.0
+        info = self.tracker.get_account_info()
+        self.assertEqual(info['stale'], [])
+        self.assertEqual(len(info['orders']), 1)
+        self.assertEqual(sum(1 for path, _, _ in self.server.requests if path == '/v2/orders'), 1)
+
+    def test_failed_section_serves_last_good_copy(self):
+        """Test a failing section keeps its last good data and is marked stale"""
+        self.tracker.get_account_info()
+        self.server.status['/v2/positions'] = 500
+        info = self.tracker.get_account_info()
+
+        self.assertEqual(info['stale'], ['positions'])
+        self.assertEqual(info['positions'][0]['symbol'], 'AAPL')
+
+    def test_concurrent_callers_share_one_fetch(self):
+        """Test ten threads asking at once send one request per section"""
+        self.tracker._snapshot_cache.ttl = 5.0
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.tracker.get_account_info()))
+                   for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(info is results[0] for info in results))
+        self.assertEqual(len(self.server.requests), 3)
+
+        # Within the TTL the snapshot is served from the cache, including the raw account
+        self.assertIs(self.tracker.get_account_info(), results[0])
+        self.assertEqual(self.tracker.get_account().equity, '10000.00')
+        self.assertEqual(len(self.server.requests), 3)
+
+        # A caller that needs fresher data than the TTL gets it
+        self.tracker.get_account_info(max_age=0)
+        self.assertEqual(len(self.server.requests), 6)
+
+    def test_no_account_data(self):
+        """Test the snapshot is None when the account was never fetched"""
+        self.server.status['/v2/account'] = 500
+        self.assertIsNone(self.tracker.get_account_info())
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import os
+import sys
+import json
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import benchmark_indicators
+from benchmark_indicators import CASES, compare, load_baseline, run_benchmarks, save_baseline
+
+class TestIndicatorBenchmarks(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Run every case once at the smallest sizes"""
+        cls.results = run_benchmarks(lengths=[100], universes=[1, 3], batch_bars=50, repeat=1,
+                                     min_time=0, log=lambda line: None)
+
+    def test_every_case_runs(self):
+        """Test every form of every indicator produces a result"""
+        expected = set()
+        for case in CASES:
+            if case.form == 'batch':
+                expected.update({f"batch/{case.name}/symbols=1", f"batch/{case.name}/symbols=3"})
+            else:
+                expected.add(f"{case.form}/{case.name}/n=100")
+        self.assertEqual(set(self.results), expected)
+        for result in self.results.values():
+            self.assertGreater(result['bars_per_second'], 0)
+            self.assertGreaterEqual(result['peak_bytes'], 0)
+        self.assertEqual(self.results['batch/rsi/symbols=3']['bars'], 150)
+
+    def test_compare_flags_regressions(self):
+        """Test throughput drops and memory growth beyond the tolerance are reported"""
+        baseline = {
+            'series/rsi/n=100': {'bars_per_second': 1000.0, 'peak_bytes': 1_000_000},
+            'batch/rsi/symbols=3': {'bars_per_second': 1000.0, 'peak_bytes': 1_000_000},
+        }
+        results = {
+            'series/rsi/n=100': {'bars_per_second': 700.0, 'peak_bytes': 1_000_000},
+            'batch/rsi/symbols=3': {'bars_per_second': 900.0, 'peak_bytes': 2_000_000},
+            'series/macd/n=100': {'bars_per_second': 1.0, 'peak_bytes': 1},  # Not in the baseline
+        }
+        regressions = compare(results, baseline, tolerance=0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith('series/rsi/n=100: throughput'))
+        self.assertTrue(regressions[1].startswith('batch/rsi/symbols=3: peak memory'))
+        self.assertEqual(compare(results, baseline, tolerance=1.5), [])
+
+    def test_small_memory_changes_are_noise(self):
+        """Test peak memory growth under the noise floor is not a regression"""
+        baseline = {'scalar/rsi/n=100': {'bars_per_second': 1000.0, 'peak_bytes': 1000}}
+        results = {'scalar/rsi/n=100': {'bars_per_second': 1000.0, 'peak_bytes': 5000}}
+        self.assertEqual(compare(results, baseline), [])
+
+    def test_baseline_round_trip_and_exit_code(self):
+        """Test saving a baseline and failing the run on a regression"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            save_baseline(self.results, path)
+            self.assertEqual(load_baseline(path), self.results)
+            with open(path) as f:
+                self.assertIn('numpy', json.load(f)['environment'])
+
+            argv = ['--lengths', '1e2', '--universes', '2', '--batch-bars', '50', '--repeat', '1',
+                    '--indicators', 'ema', '--baseline', path]
+            inflated = {key: dict(result, bars_per_second=result['bars_per_second'] * 1000)
+                        for key, result in self.results.items()}
+            save_baseline(inflated, path)
+            self.assertEqual(benchmark_indicators.main(argv), 1)
+            self.assertEqual(benchmark_indicators.main(argv + ['--tolerance', '1.0']), 0)
+
+if __name__ == '__main__':
+    unittest.main()
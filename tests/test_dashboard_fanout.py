@@ -0,0 +1,95 @@
+import unittest
+from unittest.mock import Mock, patch
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from app import app, fanout, publish_balance, socketio
+from balance_tracker import BalanceSnapshotBuilder
+
+SNAPSHOT = {'total_equity': 10000.0,
+            'positions': [{'symbol': 'AAPL', 'qty': '10'}, {'symbol': 'MSFT', 'qty': '5'}],
+            'orders': [{'id': 'o1', 'symbol': 'AAPL', 'qty': '1'}]}
+
+def received(client, event):
+    return [message['args'][0] for message in client.get_received() if message['name'] == event]
+
+class TestDashboardFanout(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.tracker = BalanceSnapshotBuilder()
+        self.addCleanup(setattr, app_module, 'published_tracker', None)
+        self.addCleanup(setattr, app_module, 'published_account_info', None)
+
+    def connect(self, **auth):
+        client = socketio.test_client(app, auth=auth)
+        self.addCleanup(client.disconnect)
+        return client
+
+    def test_empty_rooms_build_nothing(self):
+        """Test an event for a room without clients is skipped before its payload is built"""
+        payload = Mock(return_value={})
+        self.assertEqual(fanout.publish(fanout.account_room('nobody'), 'balance_update', payload), 0)
+        payload.assert_not_called()
+
+        with patch.object(self.tracker.snapshot_deltas, 'full_snapshot') as full_snapshot:
+            publish_balance(self.tracker, SNAPSHOT, 'CLOSED', account='nobody')
+        full_snapshot.assert_not_called()
+
+    def test_clients_only_get_what_they_view(self):
+        """Test account and symbol subscriptions decide which events a client receives"""
+        account_client = self.connect(accounts=['default'])
+        symbol_client = self.connect(accounts=[], symbols=['aapl'])
+        account_client.get_received()
+        symbol_client.get_received()
+
+        publish_balance(self.tracker, SNAPSHOT, 'CLOSED')
+        self.assertEqual(len(received(account_client, 'balance_update')), 1)
+        updates = symbol_client.get_received()
+        self.assertEqual([message['name'] for message in updates], ['symbol_update'])
+        self.assertEqual(updates[0]['args'][0], {'symbol': 'AAPL', 'position': {'symbol': 'AAPL', 'qty': '10'},
+                                                 'orders': [{'id': 'o1', 'symbol': 'AAPL', 'qty': '1'}]})
+
+        # Joining a symbol later sends its current state straight away
+        symbol_client.emit('subscribe', {'symbols': ['MSFT']})
+        self.assertEqual([update['symbol'] for update in received(symbol_client, 'symbol_update')], ['MSFT'])
+
+        symbol_client.emit('unsubscribe', {'symbols': ['AAPL', 'MSFT']})
+        publish_balance(self.tracker, dict(SNAPSHOT, total_equity=10050.0), 'CLOSED')
+        self.assertEqual(symbol_client.get_received(), [])
+        self.assertEqual(len(received(account_client, 'balance_delta')), 1)
+
+    def test_slow_clients_are_skipped(self):
+        """Test a client with a full outbound queue misses frames while others still get them"""
+        fast = self.connect()
+        slow = self.connect()
+        fast.get_received()
+        slow.get_received()
+
+        queued = lambda eio_sid: fanout.max_queued if eio_sid == slow.eio_sid else 0
+        dropped = fanout.dropped
+        with patch.object(fanout, '_queued', side_effect=queued):
+            publish_balance(self.tracker, SNAPSHOT, 'CLOSED')
+        self.assertEqual(len(received(fast, 'balance_update')), 1)
+        self.assertEqual(received(slow, 'balance_update'), [])
+        self.assertEqual(fanout.dropped - dropped, 2)  # market_status and balance_update
+
+    def test_each_format_is_encoded_once(self):
+        """Test json and msgpack clients in one room each get the update in their own format"""
+        json_client = self.connect()
+        msgpack_client = self.connect(format='msgpack')
+        self.assertEqual(received(msgpack_client, 'payload_format')[0]['format'], 'msgpack')
+        json_client.get_received()
+
+        payload = Mock(return_value=SNAPSHOT)
+        self.assertEqual(fanout.publish(fanout.account_room('default'), 'balance_update', payload), 2)
+        payload.assert_called_once()
+        self.assertEqual(received(json_client, 'balance_update'), [SNAPSHOT])
+        frame = received(msgpack_client, 'balance_update')[0]
+        self.assertIsInstance(frame, bytes)
+        self.assertEqual(fanout.codec.decode(frame, 'msgpack'), SNAPSHOT)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from balance_tracker import BalanceSnapshotBuilder
+from equity_store import EquityStore
+
+# 2024-01-02 09:00 in New York
+START = datetime(2024, 1, 2, 9, 0, tzinfo=ZoneInfo('America/New_York')).timestamp()
+
+class TestEquityStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'equity.db')
+        self.store = EquityStore(self.path, batch_size=50, flush_interval=3600)
+        self.addCleanup(self.store.close)
+
+    def test_wal_mode_and_batched_writes(self):
+        """Test the database is in WAL mode and samples are written in batches"""
+        self.assertEqual(self.store._conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        for i in range(49):
+            self.store.record(START + i, 10000.0)
+        self.assertEqual(self.store._conn.execute('SELECT COUNT(*) FROM equity_samples').fetchone()[0], 0)
+        self.store.record(START + 49, 10000.0)
+        self.assertEqual(self.store._conn.execute('SELECT COUNT(*) FROM equity_samples').fetchone()[0], 50)
+
+    def test_rollups_match_raw_samples(self):
+        """Test minute, hour and day rollups across several batches agree with the raw series"""
+        samples = [(START + i * 7.0, 10000.0 + ((i * 37) % 101) - 50) for i in range(2000)]
+        for ts, equity in samples:
+            self.store.record(ts, equity)
+
+        for resolution, width in (('minute', 60), ('hour', 3600)):
+            expected = {}
+            for ts, equity in samples:
+                expected.setdefault(int(ts // width * width), []).append(equity)
+            bars = self.store.history(resolution)
+            self.assertEqual([bar['bucket'] for bar in bars], sorted(expected))
+            for bar in bars:
+                values = expected[bar['bucket']]
+                self.assertEqual((bar['open'], bar['high'], bar['low'], bar['close'], bar['samples']),
+                                 (values[0], max(values), min(values), values[-1], len(values)))
+
+        day = self.store.history('day')
+        self.assertEqual(len(day), 1)
+        self.assertEqual(day[0]['bucket'], int(START - 9 * 3600))
+        self.assertEqual(day[0]['samples'], 2000)
+
+    def test_value_at_boundaries(self):
+        """Test the value at a boundary is the last sample before it, else the first after"""
+        self.store.record(START + 3000, 100.0)
+        self.store.record(START + 3590, 110.0)
+        self.store.record(START + 3610, 120.0)
+        self.assertEqual(self.store.value_at(START + 3600), 110.0)
+        self.store.flush()
+        self.assertEqual(self.store.value_at(START + 3600), 110.0)
+        self.assertEqual(self.store.value_at(START), 100.0)
+        self.assertIsNone(EquityStore(os.path.join(self.tmpdir.name, 'empty.db')).value_at(START))
+
+    def test_anchors_survive_restart(self):
+        """Test hourly and daily changes come from the stored series after a restart"""
+        now = START + 1800  # 09:30, so the hour and the day start apart
+        hour_start = self.store.hour_start(now)
+        day_start = self.store.day_start(now)
+        # History from before this process started
+        self.store.record(day_start - 60, 9000.0)
+        self.store.record(hour_start - 60, 9500.0)
+        self.store.close()
+
+        store = EquityStore(self.path, batch_size=50, flush_interval=3600)
+        self.addCleanup(store.close)
+        builder = BalanceSnapshotBuilder(store)
+        account = SimpleNamespace(portfolio_value='10000', cash='5000', buying_power='5000')
+        with patch('balance_tracker.time.time', return_value=now):
+            info = builder._build_snapshot(account, [], [])
+
+        self.assertEqual(info['daily_change'], 1000.0)
+        self.assertEqual(info['hourly_change'], 500.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from unittest.mock import Mock, patch
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicator_cache import IndicatorCache
+from indicators import TechnicalIndicators
+from ohlcv_buffer import OHLCVRingBuffer
+
+class TestIndicatorCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = IndicatorCache(max_entries=3)
+        self.buffer = OHLCVRingBuffer(capacity=50, symbol='AAPL')
+        for i, price in enumerate(100 + np.random.default_rng(1).standard_normal(30).cumsum()):
+            self.buffer.append(i, price, price + 1, price - 1, price, 1000.0)
+
+    def test_hit_and_miss(self):
+        """Test repeated requests on the same bar hit the cache"""
+        first = self.cache.calculate('calculate_rsi', self.buffer, period=14)
+        second = self.cache.calculate('calculate_rsi', self.buffer, period=14)
+
+        self.assertEqual(first, TechnicalIndicators.calculate_rsi(self.buffer, period=14))
+        self.assertEqual(first, second)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_parameters_are_part_of_key(self):
+        """Test different parameters do not share an entry"""
+        self.cache.calculate('calculate_rsi', self.buffer, period=14)
+        self.cache.calculate('calculate_rsi', self.buffer, period=7)
+        self.assertEqual(self.cache.misses, 2)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_new_bar_invalidates(self):
+        """Test a new bar misses and replaces the entry for the previous bar"""
+        before = self.cache.calculate('calculate_bollinger_bands', self.buffer, period=20)
+        self.buffer.append(30, 500.0, 501.0, 499.0, 500.0, 1000.0)
+        after = self.cache.calculate('calculate_bollinger_bands', self.buffer, period=20)
+
+        self.assertNotEqual(before, after)
+        self.assertEqual(self.cache.misses, 2)
+        self.assertEqual(self.cache.invalidations, 1)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted once full"""
+        compute = Mock(side_effect=lambda: object())
+        for symbol in ('AAPL', 'MSFT', 'GOOGL'):
+            self.cache.get_or_compute(symbol, 'calculate_rsi', 1, compute, period=14)
+        # Touch AAPL so MSFT becomes the oldest entry
+        self.cache.get_or_compute('AAPL', 'calculate_rsi', 1, compute, period=14)
+        self.cache.get_or_compute('AMZN', 'calculate_rsi', 1, compute, period=14)
+
+        self.assertEqual(self.cache.evictions, 1)
+        self.cache.get_or_compute('AAPL', 'calculate_rsi', 1, compute, period=14)
+        self.cache.get_or_compute('MSFT', 'calculate_rsi', 1, compute, period=14)
+        self.assertEqual(compute.call_count, 5)
+
+        stats = self.cache.stats()
+        self.assertEqual(stats['size'], 3)
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 5)
+        self.assertEqual(stats['evictions'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+from unittest.mock import Mock, patch
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicator_graph import FeaturePlan
+from indicators import TechnicalIndicators
+from ohlcv_buffer import OHLCVStore
+
+class TestFeaturePlan(unittest.TestCase):
+    def setUp(self):
+        """Set up a ragged universe of OHLCV matrices"""
+        rng = np.random.default_rng(9)
+        symbols, bars = 6, 150
+        close = 100 + rng.standard_normal((symbols, bars)).cumsum(axis=1)
+        self.data = {
+            'open': close + rng.standard_normal((symbols, bars)) * 0.1,
+            'high': close + rng.uniform(0, 1, (symbols, bars)),
+            'low': close - rng.uniform(0, 1, (symbols, bars)),
+            'close': close,
+            'volume': rng.integers(1000, 10000, (symbols, bars)).astype(float)
+        }
+        for matrix in self.data.values():
+            matrix[1, :60] = np.nan
+            matrix[2, :145] = np.nan
+            matrix[3, :] = np.nan
+
+    def assertFeatureEqual(self, result, expected):
+        np.testing.assert_allclose(result, expected, rtol=1e-12, atol=1e-12, equal_nan=True)
+
+    def test_feature_columns_match_batch(self):
+        """Test Config.FEATURE_COLUMNS-style features equal the batch methods"""
+        features = ['open', 'high', 'low', 'close', 'volume',
+                    'rsi_14', 'macd', 'signal_line', 'bbands_upper', 'bbands_lower']
+        result = FeaturePlan(features).evaluate(self.data)
+
+        close = self.data['close']
+        macd = TechnicalIndicators.calculate_macd_batch(close)
+        bands = TechnicalIndicators.calculate_bollinger_bands_batch(close)
+        for column in ('open', 'high', 'low', 'close', 'volume'):
+            self.assertFeatureEqual(result[column], self.data[column])
+        self.assertFeatureEqual(result['rsi_14'], TechnicalIndicators.calculate_rsi_batch(close, 14))
+        self.assertFeatureEqual(result['macd'], macd['macd'])
+        self.assertFeatureEqual(result['signal_line'], macd['signal'])
+        self.assertFeatureEqual(result['bbands_upper'], bands['upper'])
+        self.assertFeatureEqual(result['bbands_lower'], bands['lower'])
+
+    def test_other_features_match_batch(self):
+        """Test the remaining feature families equal the batch methods"""
+        features = ['sma_5', 'sma_20', 'ema_10', 'atr_14', 'volatility_20',
+                    'macd_hist_5_10_3', 'bbands_middle_10_1.5', 'bbands_upper_10_1.5']
+        result = FeaturePlan(features).evaluate(self.data)
+
+        close = self.data['close']
+        averages = TechnicalIndicators.calculate_moving_averages_batch(close, 5, 20)
+        bands = TechnicalIndicators.calculate_bollinger_bands_batch(close, 10, 1.5)
+        self.assertFeatureEqual(result['sma_20'], averages['sma_long'])
+        self.assertFeatureEqual(result['sma_5'],
+                                TechnicalIndicators.calculate_moving_averages_batch(close, 5, 5)['sma_long'])
+        self.assertFeatureEqual(result['ema_10'], TechnicalIndicators.calculate_ema_batch(close, 10))
+        self.assertFeatureEqual(result['atr_14'], TechnicalIndicators.calculate_atr_batch(
+            self.data['high'], self.data['low'], close, 14))
+        self.assertFeatureEqual(result['volatility_20'], TechnicalIndicators.calculate_volatility_batch(close, 20))
+        self.assertFeatureEqual(result['macd_hist_5_10_3'],
+                                TechnicalIndicators.calculate_macd_batch(close, 5, 10, 3)['histogram'])
+        self.assertFeatureEqual(result['bbands_middle_10_1.5'], bands['middle'])
+        self.assertFeatureEqual(result['bbands_upper_10_1.5'], bands['upper'])
+
+    def test_shared_subexpressions(self):
+        """Test intermediates are planned once and shared between features"""
+        plan = FeaturePlan(['rsi_14', 'rsi_7', 'volatility_20', 'sma_20', 'bbands_middle',
+                            'macd', 'signal_line', 'ema_12'])
+        ops = [node.op for node in plan.nodes]
+
+        self.assertEqual(ops.count('column'), 1)
+        self.assertEqual(ops.count('lag'), 1)
+        # Delta for RSI and returns, and the MACD line
+        self.assertEqual(ops.count('sub'), 2)
+        # Gains, losses and closes each get one running sum
+        self.assertEqual(ops.count('cumsum'), 3)
+        # Fast, slow and signal EMAs; ema_12 reuses the fast EMA
+        self.assertEqual(ops.count('ema'), 3)
+        self.assertIs(plan.outputs['sma_20'], plan.outputs['bbands_middle'])
+
+    def test_only_requested_columns_are_read(self):
+        """Test the plan only reads the columns its features need"""
+        result = FeaturePlan(['rsi_14']).evaluate({'close': self.data['close']})
+        self.assertEqual(list(result), ['rsi_14'])
+
+    def test_unknown_feature(self):
+        """Test unknown feature names are rejected when planning"""
+        with self.assertRaises(ValueError):
+            FeaturePlan(['stochastic_14'])
+
+    def test_evaluate_store(self):
+        """Test evaluating straight from an OHLCVStore"""
+        store = OHLCVStore(capacity=200)
+        for symbol, offset in (('AAPL', 0), ('MSFT', 50)):
+            for i in range(offset, 150):
+                store.append(symbol, i, *(self.data[column][0, i] for column in ('open', 'high', 'low', 'close', 'volume')))
+
+        result = FeaturePlan(['rsi_14']).evaluate_store(store, symbols=['MSFT', 'AAPL'])
+        self.assertFeatureEqual(result['rsi_14'],
+                                TechnicalIndicators.calculate_rsi_batch(store.matrix('close', symbols=['MSFT', 'AAPL'])))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,7 +7,11 @@ import pandas as pd
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from indicators import TechnicalIndicators
+import indicators
+from indicators import (
+    TechnicalIndicators, StreamingEMA, StreamingMovingAverages, StreamingVolatility,
+    StreamingRSI, StreamingMACD, StreamingBollingerBands, StreamingVolumeProfile
+)
 
 class TestTechnicalIndicators(unittest.TestCase):
     def setUp(self):
@@ -113,5 +117,366 @@ class TestTechnicalIndicators(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.indicators.calculate_sma(self.test_data['close'], len(self.test_data) + 1)
 
+class TestStreamingIndicators(unittest.TestCase):
+    def setUp(self):
+        """Set up a price path long enough to exercise window resyncs"""
+        rng = np.random.default_rng(42)
+        self.prices = list(100 + rng.standard_normal(1200).cumsum())
+        # Flat stretch so RSI sees a window with no losses
+        self.prices[300:320] = [self.prices[299] + i for i in range(20)]
+
+    def assertMatchesBatch(self, streaming, batch):
+        """Feed prices one at a time and compare against the batch function"""
+        for i, price in enumerate(self.prices):
+            result = streaming.update(price)
+            expected = batch(self.prices[:i + 1])
+            if isinstance(expected, dict):
+                for key, value in expected.items():
+                    np.testing.assert_allclose(result[key], value, rtol=1e-7, atol=1e-9,
+                                               err_msg=f"{key} at tick {i}")
+            else:
+                np.testing.assert_allclose(result, expected, rtol=1e-7, atol=1e-9,
+                                           err_msg=f"tick {i}")
+
+    def test_streaming_moving_averages(self):
+        """Test streaming moving averages match the batch calculation"""
+        self.assertMatchesBatch(StreamingMovingAverages(5, 20),
+                                TechnicalIndicators.calculate_moving_averages)
+
+    def test_streaming_volatility(self):
+        """Test streaming volatility matches the batch calculation"""
+        self.assertMatchesBatch(StreamingVolatility(20),
+                                TechnicalIndicators.calculate_volatility)
+
+    def test_streaming_rsi(self):
+        """Test streaming RSI matches the batch calculation"""
+        self.assertMatchesBatch(StreamingRSI(14), TechnicalIndicators.calculate_rsi)
+
+    def test_streaming_macd(self):
+        """Test streaming MACD matches the batch calculation"""
+        self.assertMatchesBatch(StreamingMACD(12, 26, 9), TechnicalIndicators.calculate_macd)
+
+    def test_streaming_bollinger_bands(self):
+        """Test streaming Bollinger Bands match the batch calculation"""
+        self.assertMatchesBatch(StreamingBollingerBands(20, 2.0),
+                                TechnicalIndicators.calculate_bollinger_bands)
+
+    def test_streaming_ema(self):
+        """Test streaming EMA matches pandas"""
+        ema = StreamingEMA(10)
+        values = [ema.update(p) for p in self.prices]
+        expected = pd.Series(self.prices).ewm(span=10, adjust=False).mean()
+        np.testing.assert_allclose(values, expected.values, rtol=1e-12)
+
+class TestVolumeProfile(unittest.TestCase):
+    def setUp(self):
+        """Set up a day of random trades"""
+        rng = np.random.default_rng(11)
+        self.prices = np.round(100 + rng.standard_normal(5000).cumsum() * 0.02, 2)
+        self.volumes = rng.uniform(1, 500, 5000)
+
+    def test_value_area_expands_from_poc(self):
+        """Test the value area grows from the POC toward the heavier neighbour"""
+        profile = TechnicalIndicators.calculate_volume_profile([0, 1.5, 2.5, 3.5, 5], [5, 10, 40, 30, 15], 6)
+        self.assertEqual(profile, {"poc": 2.5, "va_high": 4.0, "va_low": 2.0})
+
+        # Equal neighbours are added together
+        profile = TechnicalIndicators.calculate_volume_profile([0, 1.5, 2.5, 3.5, 5], [10, 20, 40, 20, 10], 6)
+        self.assertEqual((profile["va_low"], profile["va_high"]), (1.0, 4.0))
+
+    def test_streaming_matches_full_histogram(self):
+        """Test the incremental profile matches rebuilding the tick histogram"""
+        streaming = StreamingVolumeProfile(tick_size=0.01)
+        for i, (price, volume) in enumerate(zip(self.prices, self.volumes)):
+            poc = streaming.update(price, volume)
+            if i % 500 != 0 and i != len(self.prices) - 1:
+                continue
+            result = streaming.profile()
+            self.assertEqual(poc, result["poc"])
+            levels = np.rint(self.prices[:i + 1] / 0.01).astype(int)
+            histogram = np.bincount(levels - levels.min(), weights=self.volumes[:i + 1])
+            poc_index = np.argmax(histogram)
+            low, high = indicators._value_area(histogram[None, :], np.array([poc_index]))
+            self.assertAlmostEqual(result["poc"], (levels.min() + poc_index) * 0.01)
+            self.assertAlmostEqual(result["va_low"], (levels.min() + low[0]) * 0.01)
+            self.assertAlmostEqual(result["va_high"], (levels.min() + high[0]) * 0.01)
+
+    def test_extend_matches_update(self):
+        """Test bulk loading leaves the same profile as trade-by-trade updates"""
+        streaming = StreamingVolumeProfile(tick_size=0.01)
+        for price, volume in zip(self.prices, self.volumes):
+            streaming.update(price, volume)
+        bulk = StreamingVolumeProfile(tick_size=0.01)
+        bulk.extend(self.prices[:2000], self.volumes[:2000])
+        bulk.extend(self.prices[2000:], self.volumes[2000:])
+
+        self.assertEqual(bulk.profile(), streaming.profile())
+        self.assertAlmostEqual(bulk.total_volume, self.volumes.sum(), places=6)
+
+        bulk.reset()
+        self.assertEqual(bulk.profile(), {"poc": 0.0, "va_high": 0.0, "va_low": 0.0})
+
+class TestIndicatorSeries(unittest.TestCase):
+    def setUp(self):
+        """Set up OHLCV data for the series tests"""
+        rng = np.random.default_rng(7)
+        self.close = 100 + rng.standard_normal(300).cumsum()
+        self.high = self.close + rng.uniform(0, 2, 300)
+        self.low = self.close - rng.uniform(0, 2, 300)
+        self.volume = rng.integers(1000, 10000, 300).astype(float)
+        # Flat stretch so RSI and Bollinger see zero-variance windows
+        self.close[100:130] = self.close[99]
+
+    def assertSeriesMatchesScalar(self, series, scalar):
+        """Element t of the series must equal the scalar function on the first t + 1 bars"""
+        for t in range(len(self.close)):
+            expected = scalar(t + 1)
+            if isinstance(expected, dict):
+                for key, value in expected.items():
+                    np.testing.assert_allclose(series[key][t], value, rtol=1e-9, atol=1e-9,
+                                               err_msg=f"{key} at bar {t}")
+            else:
+                np.testing.assert_allclose(series[t], expected, rtol=1e-9, atol=1e-9,
+                                           err_msg=f"bar {t}")
+
+    def test_moving_averages_series(self):
+        """Test moving averages series matches the scalar calculation"""
+        series = TechnicalIndicators.calculate_moving_averages_series(self.close, 5, 20)
+        self.assertSeriesMatchesScalar(
+            series, lambda n: TechnicalIndicators.calculate_moving_averages(list(self.close[:n]), 5, 20))
+
+    def test_volatility_series(self):
+        """Test volatility series matches the scalar calculation"""
+        series = TechnicalIndicators.calculate_volatility_series(self.close, 20)
+        self.assertSeriesMatchesScalar(
+            series, lambda n: TechnicalIndicators.calculate_volatility(self.close[:n], 20))
+
+    def test_atr_series(self):
+        """Test ATR series matches the scalar calculation"""
+        series = TechnicalIndicators.calculate_atr_series(self.high, self.low, self.close, 14)
+        self.assertSeriesMatchesScalar(
+            series, lambda n: TechnicalIndicators.calculate_atr(
+                list(self.high[:n]), list(self.low[:n]), list(self.close[:n]), 14))
+
+    def test_rsi_series(self):
+        """Test RSI series matches the scalar calculation"""
+        series = TechnicalIndicators.calculate_rsi_series(self.close, 14)
+        self.assertSeriesMatchesScalar(
+            series, lambda n: TechnicalIndicators.calculate_rsi(self.close[:n], 14))
+
+    def test_macd_series(self):
+        """Test MACD series matches the scalar calculation"""
+        series = TechnicalIndicators.calculate_macd_series(self.close, 12, 26, 9)
+        self.assertSeriesMatchesScalar(
+            series, lambda n: TechnicalIndicators.calculate_macd(list(self.close[:n]), 12, 26, 9))
+
+    def test_bollinger_bands_series(self):
+        """Test Bollinger Bands series matches the scalar calculation"""
+        series = TechnicalIndicators.calculate_bollinger_bands_series(self.close, 20, 2.0)
+        self.assertSeriesMatchesScalar(
+            series, lambda n: TechnicalIndicators.calculate_bollinger_bands(list(self.close[:n]), 20, 2.0))
+
+    def test_volume_profile_series(self):
+        """Test rolling volume profile series matches the scalar calculation"""
+        window = 30
+        series = TechnicalIndicators.calculate_volume_profile_series(self.close, self.volume, 10, window)
+        self.assertSeriesMatchesScalar(
+            series, lambda n: TechnicalIndicators.calculate_volume_profile(
+                list(self.close[max(0, n - window):n]), list(self.volume[max(0, n - window):n]), 10))
+
+    def test_wilder_smoothing(self):
+        """Test Wilder-smoothed RSI and ATR against a reference recursion"""
+        period = 14
+
+        def wilder(values):
+            averages = [np.mean(values[:period])]
+            for value in values[period:]:
+                averages.append(averages[-1] + (value - averages[-1]) / period)
+            return np.array(averages)
+
+        delta = np.diff(self.close)
+        avg_gain = wilder(np.where(delta > 0, delta, 0.0))
+        avg_loss = wilder(np.where(delta < 0, -delta, 0.0))
+        with np.errstate(divide='ignore'):
+            expected_rsi = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+        rsi = TechnicalIndicators.calculate_rsi_series(self.close, period, smoothing="wilder")
+        np.testing.assert_allclose(rsi[period:], expected_rsi, rtol=1e-9)
+        self.assertTrue(np.all(rsi[:period] == 50.0))
+
+        true_range = np.maximum.reduce([
+            self.high[1:] - self.low[1:],
+            np.abs(self.high[1:] - self.close[:-1]),
+            np.abs(self.low[1:] - self.close[:-1])
+        ])
+        atr = TechnicalIndicators.calculate_atr_series(self.high, self.low, self.close, period, smoothing="wilder")
+        np.testing.assert_allclose(atr[period:], wilder(true_range), rtol=1e-9)
+
+    def test_unknown_smoothing(self):
+        """Test an unknown smoothing method is rejected"""
+        with self.assertRaises(ValueError):
+            TechnicalIndicators.calculate_rsi_series(self.close, 14, smoothing="hull")
+
+class TestIndicatorBatch(unittest.TestCase):
+    def setUp(self):
+        """Set up a ragged, NaN-padded universe of symbols"""
+        rng = np.random.default_rng(11)
+        self.lengths = [120, 80, 25, 1, 0]
+        self.bars = max(self.lengths)
+        self.histories = []
+        shape = (len(self.lengths), self.bars)
+        self.close = np.full(shape, np.nan)
+        self.high = np.full(shape, np.nan)
+        self.low = np.full(shape, np.nan)
+
+        for row, length in enumerate(self.lengths):
+            close = 50 + rng.standard_normal(length).cumsum()
+            high = close + rng.uniform(0, 1, length)
+            low = close - rng.uniform(0, 1, length)
+            self.histories.append((close, high, low))
+            if length:
+                self.close[row, -length:] = close
+                self.high[row, -length:] = high
+                self.low[row, -length:] = low
+
+    def assertRowsMatchSeries(self, batch, series):
+        """Each row's valid bars must match the series of that row alone; padding stays NaN"""
+        for row, length in enumerate(self.lengths):
+            expected = series(*self.histories[row])
+            if isinstance(expected, dict):
+                for key, value in expected.items():
+                    self.assertTrue(np.all(np.isnan(batch[key][row, :self.bars - length])))
+                    np.testing.assert_allclose(batch[key][row, self.bars - length:], value,
+                                               rtol=1e-9, atol=1e-9, err_msg=f"{key} row {row}")
+            else:
+                self.assertTrue(np.all(np.isnan(batch[row, :self.bars - length])))
+                np.testing.assert_allclose(batch[row, self.bars - length:], expected,
+                                           rtol=1e-9, atol=1e-9, err_msg=f"row {row}")
+
+    def test_moving_averages_batch(self):
+        """Test batch moving averages match the per-symbol series"""
+        self.assertRowsMatchSeries(
+            TechnicalIndicators.calculate_moving_averages_batch(self.close, 5, 20),
+            lambda close, high, low: TechnicalIndicators.calculate_moving_averages_series(close, 5, 20))
+
+    def test_volatility_batch(self):
+        """Test batch volatility matches the per-symbol series"""
+        self.assertRowsMatchSeries(
+            TechnicalIndicators.calculate_volatility_batch(self.close, 20),
+            lambda close, high, low: TechnicalIndicators.calculate_volatility_series(close, 20))
+
+    def test_rsi_batch(self):
+        """Test batch RSI matches the per-symbol series for both smoothings"""
+        for smoothing in ("simple", "wilder"):
+            self.assertRowsMatchSeries(
+                TechnicalIndicators.calculate_rsi_batch(self.close, 14, smoothing),
+                lambda close, high, low: TechnicalIndicators.calculate_rsi_series(close, 14, smoothing))
+
+    def test_atr_batch(self):
+        """Test batch ATR matches the per-symbol series for both smoothings"""
+        for smoothing in ("simple", "wilder"):
+            self.assertRowsMatchSeries(
+                TechnicalIndicators.calculate_atr_batch(self.high, self.low, self.close, 14, smoothing),
+                lambda close, high, low: TechnicalIndicators.calculate_atr_series(high, low, close, 14, smoothing))
+
+    def test_macd_batch(self):
+        """Test batch MACD matches the per-symbol series"""
+        self.assertRowsMatchSeries(
+            TechnicalIndicators.calculate_macd_batch(self.close, 12, 26, 9),
+            lambda close, high, low: TechnicalIndicators.calculate_macd_series(close, 12, 26, 9))
+
+    def test_bollinger_bands_batch(self):
+        """Test batch Bollinger Bands match the per-symbol series"""
+        self.assertRowsMatchSeries(
+            TechnicalIndicators.calculate_bollinger_bands_batch(self.close, 20, 2.0),
+            lambda close, high, low: TechnicalIndicators.calculate_bollinger_bands_series(close, 20, 2.0))
+
+    def test_invalid_matrix(self):
+        """Test gaps inside a history and non-matrix inputs are rejected"""
+        gapped = self.close.copy()
+        gapped[0, 50] = np.nan
+        with self.assertRaises(ValueError):
+            TechnicalIndicators.calculate_rsi_batch(gapped)
+        with self.assertRaises(ValueError):
+            TechnicalIndicators.calculate_rsi_batch(self.close[0])
+
+class TestEMAKernel(unittest.TestCase):
+    def setUp(self):
+        """Set up a price path"""
+        rng = np.random.default_rng(3)
+        self.prices = list(100 + rng.standard_normal(5000).cumsum())
+
+    @staticmethod
+    def pandas_macd(prices, fast_period=12, slow_period=26, signal_period=9):
+        """The pandas implementation calculate_macd used before the NumPy kernel"""
+        ema_fast = pd.Series(prices).ewm(span=fast_period, adjust=False).mean().iloc[-1]
+        ema_slow = pd.Series(prices).ewm(span=slow_period, adjust=False).mean().iloc[-1]
+        macd_line = ema_fast - ema_slow
+        macd_series = pd.Series(prices).ewm(span=fast_period, adjust=False).mean() - \
+            pd.Series(prices).ewm(span=slow_period, adjust=False).mean()
+        signal_line = macd_series.ewm(span=signal_period, adjust=False).mean().iloc[-1]
+        return {"macd": macd_line, "signal": signal_line, "histogram": macd_line - signal_line}
+
+    def test_ema_matches_pandas(self):
+        """Test the NumPy EMA kernel matches pandas ewm across spans and lengths"""
+        for length in (1, 2, 7, 100, 5000):
+            for span in (1, 2, 9, 26, 200):
+                expected = pd.Series(self.prices[:length]).ewm(span=span, adjust=False).mean().to_numpy()
+                result = TechnicalIndicators.calculate_ema_series(self.prices[:length], span)
+                np.testing.assert_allclose(result, expected, rtol=1e-10, err_msg=f"length {length} span {span}")
+
+    def test_ema_batch_padding(self):
+        """Test the EMA kernel starts each padded row at its first valid value"""
+        matrix = np.full((3, 50), np.nan)
+        matrix[0] = self.prices[:50]
+        matrix[1, 20:] = self.prices[:30]
+        result = TechnicalIndicators.calculate_ema_batch(matrix, 10)
+        expected = pd.DataFrame(matrix.T).ewm(span=10, adjust=False).mean().to_numpy().T
+        np.testing.assert_allclose(result, expected, rtol=1e-10)
+        self.assertTrue(np.all(np.isnan(result[1, :20])))
+        self.assertTrue(np.all(np.isnan(result[2])))
+
+    def test_cache_shares_ema_passes(self):
+        """Test EMA-based calls sharing a cache compute each EMA once"""
+        cache = {}
+        with patch('indicators._ema_kernel', wraps=indicators._ema_kernel) as kernel:
+            TechnicalIndicators.calculate_macd(self.prices, 12, 26, 9, cache=cache)
+            TechnicalIndicators.calculate_macd_series(self.prices, 12, 26, 9, cache=cache)
+            TechnicalIndicators.calculate_ema(self.prices, 12, cache=cache)
+            TechnicalIndicators.calculate_ema(self.prices, 26, cache=cache)
+        # Fast EMA, slow EMA and the signal line EMA
+        self.assertEqual(kernel.call_count, 3)
+
+        # A different price list must not reuse the cached entries
+        other = list(self.prices)
+        other[-1] += 1.0
+        result = TechnicalIndicators.calculate_ema(other, 12, cache=cache)
+        self.assertAlmostEqual(result, pd.Series(other).ewm(span=12, adjust=False).mean().iloc[-1])
+
+    def test_cache_follows_appended_prices(self):
+        """Test a cache reused while appending to the same list recomputes EMA and MACD"""
+        cache = {}
+        prices = list(self.prices[:60])
+        TechnicalIndicators.calculate_ema(prices, 12, cache=cache)
+        TechnicalIndicators.calculate_macd(prices, 12, 26, 9, cache=cache)
+
+        prices.append(prices[-1] + 5.0)
+        ema = TechnicalIndicators.calculate_ema(prices, 12, cache=cache)
+        macd = TechnicalIndicators.calculate_macd(prices, 12, 26, 9, cache=cache)
+
+        series = pd.Series(prices)
+        self.assertAlmostEqual(ema, series.ewm(span=12, adjust=False).mean().iloc[-1])
+        macd_line = series.ewm(span=12, adjust=False).mean() - series.ewm(span=26, adjust=False).mean()
+        self.assertAlmostEqual(macd["macd"], macd_line.iloc[-1])
+        self.assertAlmostEqual(macd["signal"], macd_line.ewm(span=9, adjust=False).mean().iloc[-1])
+
+    def test_macd_matches_pandas(self):
+        """Test calculate_macd matches the previous pandas implementation; benchmark_indicators times both"""
+        for length in (50, 500, 5000):
+            prices = self.prices[:length]
+            expected = self.pandas_macd(prices)
+            result = TechnicalIndicators.calculate_macd(prices)
+            for key in expected:
+                self.assertAlmostEqual(result[key], expected[key], places=9)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.log_batcher import BatchingLogHandler
+
+class TestBatchingLogHandler(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+        self.logger = logging.getLogger(f"test_log_batcher.{self.id()}")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+
+    def make_handler(self, send=None, **kwargs):
+        kwargs.setdefault('interval', 3600)
+        handler = BatchingLogHandler(send or self.batches.append, **kwargs)
+        self.logger.addHandler(handler)
+        self.addCleanup(self.logger.removeHandler, handler)
+        self.addCleanup(handler.close)
+        return handler
+
+    def test_records_are_sent_in_one_batch(self):
+        """Test records logged between flushes go out as a single batch"""
+        handler = self.make_handler()
+        for i in range(5):
+            self.logger.error(f"record {i}")
+        handler.flush()
+        handler.flush()
+
+        self.assertEqual(len(self.batches), 1)
+        self.assertEqual([record['message'] for record in self.batches[0]['records']],
+                         [f"record {i}" for i in range(5)])
+        self.assertEqual(self.batches[0]['records'][0]['level'], 'ERROR')
+        self.assertEqual(self.batches[0]['dropped'], {})
+
+    def test_overflow_is_capped_and_summarized(self):
+        """Test records over the level's rate or the batch size are counted, not sent"""
+        handler = self.make_handler(rate_limits={logging.INFO: 10}, max_batch=15)
+        for i in range(100):
+            self.logger.info(f"chatty {i}")
+        for i in range(20):
+            self.logger.error(f"error {i}")
+        handler.flush()
+
+        batch = self.batches[0]
+        self.assertEqual(len(batch['records']), 15)
+        self.assertEqual(batch['records'][-1]['message'], 'error 19')
+        self.assertEqual(batch['dropped'], {'INFO': 90 + 10, 'ERROR': 5})
+
+    def test_slow_transport_does_not_block_logging(self):
+        """Test logging threads do not wait while a batch is being sent"""
+        sending = threading.Event()
+
+        def slow_send(batch):
+            sending.set()
+            time.sleep(0.5)
+            self.batches.append(batch)
+
+        self.make_handler(send=slow_send, interval=0.05, rate_limits={})
+        self.logger.error('first')
+        self.assertTrue(sending.wait(2))
+
+        start = time.monotonic()
+        for i in range(1000):
+            self.logger.error(f"burst {i}")
+        elapsed = time.monotonic() - start
+
+        print(f"\n1000 records logged in {elapsed * 1000:.1f} ms during a 500 ms send")
+        self.assertLess(elapsed, 0.25)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import datetime
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_calendar import CALENDAR, MarketCalendar, exchange_half_days, exchange_holidays
+from indicators import TechnicalIndicators
+
+class TestExchangeCalendar(unittest.TestCase):
+    def test_holidays(self):
+        """Test the holiday rules against the published NYSE calendar"""
+        expected_2024 = ['2024-01-01', '2024-01-15', '2024-02-19', '2024-03-29', '2024-05-27',
+                         '2024-06-19', '2024-07-04', '2024-09-02', '2024-11-28', '2024-12-25']
+        self.assertEqual(sorted(str(date) for date in exchange_holidays(2024)), expected_2024)
+        self.assertEqual(sorted(str(date) for date in exchange_half_days(2024)),
+                         ['2024-07-03', '2024-11-29', '2024-12-24'])
+
+    def test_observed_holidays(self):
+        """Test weekend holidays move to the nearest weekday"""
+        self.assertFalse(CALENDAR.is_trading_day('2022-06-20'))  # Juneteenth on a Sunday
+        self.assertTrue(CALENDAR.is_trading_day('2021-06-18'))   # Before Juneteenth was a holiday
+        self.assertFalse(CALENDAR.is_trading_day('2021-12-24'))  # Christmas on a Saturday
+        self.assertTrue(CALENDAR.is_trading_day('2021-12-31'))   # Saturday New Year is not observed
+        self.assertFalse(CALENDAR.is_trading_day('2026-07-03'))  # July 4 on a Saturday
+        self.assertFalse(CALENDAR.is_half_day('2026-07-02'))
+        self.assertFalse(CALENDAR.is_trading_day('2025-01-09'))  # Special closure
+        self.assertFalse(CALENDAR.is_trading_day('2024-03-30'))  # Weekend
+
+    def test_session_boundaries(self):
+        """Test minutes, half days and holidays decide the session"""
+        cases = {
+            '2024-03-28 03:59': 'closed',
+            '2024-03-28 04:00': 'pre_market',
+            '2024-03-28 09:29': 'pre_market',
+            '2024-03-28 09:30': 'opening',
+            '2024-03-28 10:00': 'mid_day',
+            '2024-03-28 15:00': 'closing',
+            '2024-03-28 16:00': 'after_hours',
+            '2024-03-28 20:00': 'closed',
+            '2024-03-29 12:00': 'closed',       # Good Friday
+            '2024-03-30 12:00': 'closed',       # Saturday
+            '2024-11-29 11:59': 'mid_day',      # Day after Thanksgiving closes at 13:00
+            '2024-11-29 12:00': 'closing',
+            '2024-11-29 13:00': 'after_hours',
+            '2024-11-29 17:00': 'closed',
+        }
+        for timestamp, session in cases.items():
+            self.assertEqual(TechnicalIndicators.get_market_session(pd.Timestamp(timestamp)), session, timestamp)
+
+    def test_time_zones(self):
+        """Test aware timestamps and epoch integers are converted to exchange time"""
+        # 13:45 UTC is 9:45 in summer (EDT) and 8:45 in winter (EST)
+        self.assertEqual(CALENDAR.session(pd.Timestamp('2024-07-01 13:45', tz='UTC')), 'opening')
+        self.assertEqual(CALENDAR.session(pd.Timestamp('2024-01-03 13:45', tz='UTC')), 'pre_market')
+        self.assertEqual(CALENDAR.session(datetime.datetime(2024, 1, 3, 9, 45, tzinfo=datetime.timezone.utc)),
+                         'pre_market')
+
+        index = pd.DatetimeIndex(['2024-07-01 13:45', '2024-01-03 13:45'], tz='UTC')
+        expected = ['opening', 'pre_market']
+        self.assertEqual(list(CALENDAR.label_sessions(index)), expected)
+        self.assertEqual(list(CALENDAR.label_sessions(index.tz_convert('Europe/London'))), expected)
+        self.assertEqual(list(CALENDAR.label_sessions(index.asi8)), expected)
+        self.assertEqual(list(CALENDAR.label_sessions(index.asi8 // 10**9, unit='s')), expected)
+        self.assertEqual(list(CALENDAR.label_sessions(pd.Series(index))), expected)
+
+    def test_vectorized_matches_scalar(self):
+        """Test labeling an index matches labeling each timestamp"""
+        index = pd.date_range('2024-03-08', '2024-03-12', freq='17min', tz='UTC')  # Spans a DST change
+        labels = CALENDAR.label_sessions(index)
+        self.assertEqual(list(labels), [CALENDAR.session(timestamp) for timestamp in index])
+        self.assertEqual(list(labels), list(CALENDAR.label_sessions(index.tz_convert('America/New_York')
+                                                                         .tz_localize(None))))
+
+    def test_outside_table(self):
+        """Test days outside the lookup table fall back to the weekday rule"""
+        calendar = MarketCalendar(2020, 2021)
+        index = pd.DatetimeIndex(['2019-12-31 12:00', '2022-01-01 12:00', '2021-12-31 12:00'], tz='America/New_York')
+        self.assertEqual(list(calendar.label_sessions(index)), ['mid_day', 'closed', 'mid_day'])
+
+    def test_labeling_performance(self):
+        """Test labeling a million bars is fast"""
+        index = pd.date_range('2015-01-01', periods=1_000_000, freq='min', tz='UTC')
+        start = time.perf_counter()
+        codes = CALENDAR.session_codes(index)
+        elapsed = time.perf_counter() - start
+        print(f"\nLabeled {len(index):,} bars in {elapsed * 1000:.1f} ms")
+        self.assertEqual(len(codes), len(index))
+        self.assertLess(elapsed, 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
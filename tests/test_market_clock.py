@@ -0,0 +1,95 @@
+import unittest
+import datetime
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+from alpaca_trade_api.entity import Calendar
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_clock import CLOSED, EXTENDED, REGULAR, MarketClock
+
+def epoch(local):
+    """UTC epoch seconds of a New York wall-clock time"""
+    return pd.Timestamp(local).tz_localize('America/New_York').timestamp()
+
+class FakeCalendarApi:
+    def __init__(self, days=None, error=None):
+        self.days = days or []
+        self.error = error
+        self.calls = 0
+
+    def get_calendar(self, start=None, end=None):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return [Calendar(day) for day in self.days if start <= day['date'] <= end]
+
+class TestMarketClock(unittest.TestCase):
+    def test_sessions_from_exchange_rules(self):
+        """Test states across a full day, a holiday and a half day without an API"""
+        clock = MarketClock(lookahead_days=3)
+        clock.refresh(start=datetime.date(2024, 11, 27))
+        cases = {
+            '2024-11-27 03:59': CLOSED,
+            '2024-11-27 04:00': EXTENDED,
+            '2024-11-27 09:30': REGULAR,
+            '2024-11-27 15:59': REGULAR,
+            '2024-11-27 16:00': EXTENDED,
+            '2024-11-27 20:00': CLOSED,
+            '2024-11-28 12:00': CLOSED,    # Thanksgiving
+            '2024-11-29 12:59': REGULAR,   # Closes at 13:00
+            '2024-11-29 13:00': EXTENDED,
+            '2024-11-29 17:00': CLOSED,
+        }
+        for local, state in cases.items():
+            self.assertEqual(clock.status(epoch(local)), state, local)
+        self.assertEqual(clock.next_transition(epoch('2024-11-28 12:00')),
+                         (epoch('2024-11-29 04:00'), EXTENDED))
+
+    def test_sessions_from_api_calendar(self):
+        """Test the API calendar drives the transitions, with the rules as a fallback"""
+        api = FakeCalendarApi([{'date': '2024-07-03', 'open': '09:30', 'close': '13:00',
+                                'session_open': '0400', 'session_close': '1700'}])
+        clock = MarketClock(api, lookahead_days=1)
+        clock.refresh(start=datetime.date(2024, 7, 3))
+        self.assertEqual(api.calls, 1)
+        self.assertEqual(clock.status(epoch('2024-07-03 12:00')), REGULAR)
+        self.assertEqual(clock.status(epoch('2024-07-03 16:59')), EXTENDED)
+        self.assertEqual(clock.status(epoch('2024-07-03 17:00')), CLOSED)
+
+        clock = MarketClock(FakeCalendarApi(error=Exception('API Error')), lookahead_days=1)
+        clock.refresh(start=datetime.date(2024, 7, 3))
+        self.assertEqual(clock.status(epoch('2024-07-03 16:30')), EXTENDED)
+
+        # Queries are answered from the cached table
+        start = time.perf_counter()
+        for _ in range(10000):
+            clock.status()
+        self.assertLess((time.perf_counter() - start) / 10000, 50e-6)
+
+    def test_state_changes_are_pushed_at_transitions(self):
+        """Test run() calls on_change as each transition passes, and not before"""
+        clock = MarketClock()
+        now = time.time()
+        transitions = [now + 0.1, now + 0.2, now + 0.3]
+        clock._table = (transitions, [EXTENDED, REGULAR, EXTENDED])
+        clock.last_refresh = now
+
+        changes = []
+        thread = threading.Thread(target=clock.run, args=(lambda state: changes.append((state, time.time())),))
+        thread.start()
+        time.sleep(0.5)
+        clock.stop()
+        thread.join(timeout=2)
+
+        self.assertEqual([state for state, _ in changes], [CLOSED, EXTENDED, REGULAR, EXTENDED])
+        for (_, pushed_at), at in zip(changes[1:], transitions):
+            self.assertGreaterEqual(pushed_at, at)
+            self.assertLess(pushed_at - at, 0.05)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import os
+import sys
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ohlcv_buffer import OHLCVRingBuffer, OHLCVStore
+from indicators import TechnicalIndicators
+
+class TestOHLCVRingBuffer(unittest.TestCase):
+    def setUp(self):
+        """Set up bars and a buffer smaller than the history"""
+        rng = np.random.default_rng(5)
+        self.count = 250
+        self.close = 100 + rng.standard_normal(self.count).cumsum()
+        self.open = self.close + rng.standard_normal(self.count) * 0.1
+        self.high = np.maximum(self.open, self.close) + rng.uniform(0, 1, self.count)
+        self.low = np.minimum(self.open, self.close) - rng.uniform(0, 1, self.count)
+        self.volume = rng.integers(1000, 10000, self.count).astype(float)
+        self.timestamps = pd.date_range('2024-01-02 09:30', periods=self.count, freq='min').asi8
+
+        self.buffer = OHLCVRingBuffer(capacity=100, symbol='AAPL')
+        for i in range(self.count):
+            self.buffer.append(self.timestamps[i], self.open[i], self.high[i], self.low[i],
+                               self.close[i], self.volume[i])
+
+    def test_keeps_last_capacity_bars(self):
+        """Test the buffer holds the most recent bars in order after wrapping"""
+        self.assertEqual(len(self.buffer), 100)
+        np.testing.assert_array_equal(self.buffer.close, self.close[-100:])
+        np.testing.assert_array_equal(self.buffer.timestamp, self.timestamps[-100:])
+        np.testing.assert_array_equal(self.buffer.column('high', 10), self.high[-10:])
+        self.assertEqual(self.buffer.last_timestamp, self.timestamps[-1])
+
+    def test_views_are_zero_copy(self):
+        """Test column views are contiguous, read-only and share the buffer memory"""
+        view = self.buffer.column('close', 50)
+        self.assertTrue(view.flags['C_CONTIGUOUS'])
+        self.assertFalse(view.flags.writeable)
+        self.assertTrue(np.shares_memory(view, self.buffer._columns))
+
+    def test_append_does_not_allocate(self):
+        """Test appending to a full buffer does not grow memory"""
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(10000):
+            self.buffer.append(i, 1.0, 2.0, 0.5, 1.5, 100.0)
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        self.assertLess(after - before, 4096)
+
+    def test_extend_matches_append(self):
+        """Test bulk extend leaves the buffer as repeated appends would"""
+        buffer = OHLCVRingBuffer(capacity=100)
+        buffer.extend(self.timestamps[:30], self.open[:30], self.high[:30], self.low[:30],
+                      self.close[:30], self.volume[:30])
+        buffer.extend(self.timestamps[30:], self.open[30:], self.high[30:], self.low[30:],
+                      self.close[30:], self.volume[30:])
+        for name, expected in self.buffer.last().items():
+            np.testing.assert_array_equal(buffer.column(name), expected)
+
+    def test_indicators_accept_buffer(self):
+        """Test indicators take the buffer directly and match list inputs"""
+        close = list(self.close[-100:])
+        self.assertAlmostEqual(TechnicalIndicators.calculate_rsi(self.buffer),
+                               TechnicalIndicators.calculate_rsi(close))
+        self.assertAlmostEqual(TechnicalIndicators.calculate_volatility(self.buffer),
+                               TechnicalIndicators.calculate_volatility(close))
+        self.assertEqual(TechnicalIndicators.calculate_bollinger_bands(self.buffer),
+                         TechnicalIndicators.calculate_bollinger_bands(close))
+        self.assertEqual(TechnicalIndicators.calculate_macd(self.buffer),
+                         TechnicalIndicators.calculate_macd(close))
+        self.assertEqual(TechnicalIndicators.calculate_moving_averages(self.buffer),
+                         TechnicalIndicators.calculate_moving_averages(close))
+        self.assertAlmostEqual(
+            TechnicalIndicators.calculate_atr(self.buffer),
+            TechnicalIndicators.calculate_atr(list(self.high[-100:]), list(self.low[-100:]), close))
+        self.assertEqual(
+            TechnicalIndicators.calculate_volume_profile(self.buffer),
+            TechnicalIndicators.calculate_volume_profile(close, list(self.volume[-100:])))
+        np.testing.assert_array_equal(TechnicalIndicators.calculate_rsi_series(self.buffer),
+                                      TechnicalIndicators.calculate_rsi_series(close))
+
+    def test_atr_matches_loop(self):
+        """Test the vectorized ATR matches the true range definition"""
+        true_ranges = [
+            max(self.high[i] - self.low[i], abs(self.high[i] - self.close[i - 1]),
+                abs(self.low[i] - self.close[i - 1]))
+            for i in range(1, self.count)
+        ]
+        self.assertAlmostEqual(
+            TechnicalIndicators.calculate_atr(list(self.high), list(self.low), list(self.close), 14),
+            np.mean(true_ranges[-14:]))
+
+class TestOHLCVStore(unittest.TestCase):
+    def test_matrix_is_left_padded(self):
+        """Test stacking symbols right-aligns shorter histories"""
+        store = OHLCVStore(capacity=10)
+        for i in range(8):
+            store.append('AAPL', i, 1.0, 1.0, 1.0, 100.0 + i, 10.0)
+        for i in range(3):
+            store.append('MSFT', i, 1.0, 1.0, 1.0, 200.0 + i, 10.0)
+
+        matrix = store.matrix('close')
+        self.assertEqual(matrix.shape, (2, 8))
+        np.testing.assert_array_equal(matrix[0], 100.0 + np.arange(8))
+        self.assertTrue(np.all(np.isnan(matrix[1, :5])))
+        np.testing.assert_array_equal(matrix[1, 5:], 200.0 + np.arange(3))
+
+        rsi = TechnicalIndicators.calculate_rsi_batch(store.matrix('close', symbols=['MSFT', 'AAPL', 'TSLA']))
+        self.assertEqual(rsi.shape, (3, 8))
+        self.assertTrue(np.all(np.isnan(rsi[2])))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+
+import pandas as pd
+from alpaca_trade_api.entity import Order
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from balance_tracker import BalanceTracker
+from order_store import CLOSED_ORDER_STATUSES, OrderStore
+from tests.fake_alpaca import FakeAlpacaServer
+from utils.retry_executor import DeadlineExceeded
+from utils.rate_limiter import RATE_LIMITERS, RateLimiter
+
+class FakeOrdersApi:
+    """In-memory orders endpoint honouring status, after, until, direction and limit"""
+    def __init__(self):
+        self.orders = {}
+        self.listed = []  # (status, number of orders returned)
+        self.fetched = []  # order ids fetched one by one
+
+    def submit(self, order_id, symbol, status='new', minutes_ago=0):
+        submitted = pd.Timestamp.now(tz='UTC') - pd.Timedelta(minutes=minutes_ago)
+        self.orders[order_id] = {'id': order_id, 'symbol': symbol, 'status': status, 'qty': '1', 'side': 'buy',
+                                 'type': 'market', 'limit_price': None,
+                                 'submitted_at': submitted.strftime('%Y-%m-%dT%H:%M:%S.%fZ')}
+
+    def list_orders(self, status=None, limit=None, after=None, until=None, direction=None):
+        rows = sorted(self.orders.values(), key=lambda row: pd.Timestamp(row['submitted_at']))
+        if status == 'open':
+            rows = [row for row in rows if row['status'] not in CLOSED_ORDER_STATUSES]
+        elif status == 'closed':
+            rows = [row for row in rows if row['status'] in CLOSED_ORDER_STATUSES]
+        if after is not None:
+            rows = [row for row in rows if pd.Timestamp(row['submitted_at']) > pd.Timestamp(after)]
+        if until is not None:
+            rows = [row for row in rows if pd.Timestamp(row['submitted_at']) < pd.Timestamp(until)]
+        if direction != 'asc':
+            rows = rows[::-1]
+        rows = rows[:limit or 50]
+        self.listed.append((status, len(rows)))
+        return [Order(dict(row)) for row in rows]
+
+    def get_order(self, order_id):
+        self.fetched.append(order_id)
+        return Order(dict(self.orders[order_id]))
+
+class TestOrderStore(unittest.TestCase):
+    def setUp(self):
+        self.api = FakeOrdersApi()
+        for i in range(7):
+            self.api.submit(f"o{i}", 'AAPL' if i % 2 else 'MSFT', status='filled' if i < 5 else 'new',
+                            minutes_ago=60 - i)
+        self.store = OrderStore(self.api, page_size=3)
+
+    def test_first_sync_pages_through_history(self):
+        """Test the first sync pages with the cursor and indexes every order"""
+        open_orders = self.store.sync()
+        self.assertEqual([order.id for order in open_orders], ['o6', 'o5'])
+        self.assertEqual(len(self.store.orders), 7)
+        # Each page starts at the last order of the one before, so ties at a page boundary are kept
+        self.assertEqual([count for status, count in self.api.listed if status == 'all'], [3, 3, 3, 1])
+        # The open list is read once, for open orders older than the lookback
+        self.assertEqual([count for status, count in self.api.listed if status == 'open'], [2])
+        self.assertEqual([order.id for order in self.store.query(status='filled', symbol='AAPL')], ['o1', 'o3'])
+        self.assertEqual([order.id for order in self.store.query(status='open')], ['o5', 'o6'])
+        self.assertEqual(len(self.store.query(status='closed')), 5)
+
+    def test_later_syncs_are_incremental(self):
+        """Test a later sync downloads new orders and picks closures out of one closed page, not the open list"""
+        self.store.sync()
+        self.api.listed.clear()
+
+        self.api.submit('o7', 'TSLA')
+        self.api.orders['o5']['status'] = 'canceled'
+        open_orders = self.store.sync()
+
+        self.assertEqual([order.id for order in open_orders], ['o7', 'o6'])
+        # The last known order is re-read at the cursor, plus the one new order
+        self.assertEqual([count for status, count in self.api.listed if status == 'all'], [2])
+        # o5 is the oldest vanished order, so the closed page starts there and holds only it
+        self.assertEqual([count for status, count in self.api.listed if status == 'closed'], [1])
+        self.assertEqual(self.api.fetched, [])
+        self.assertEqual([status for status, count in self.api.listed], ['all', 'closed'])
+        self.assertEqual(self.store.get('o5').status, 'canceled')
+        self.assertEqual([order.id for order in self.store.query(symbol='TSLA')], ['o7'])
+
+    def test_closed_lookup_is_capped(self):
+        """Test closures are looked for in at most max_closed_pages, however many orders closed since"""
+        api = FakeOrdersApi()
+        api.submit('a0', 'AAPL', minutes_ago=50)
+        for i in range(1, 9):
+            api.submit(f"c{i}", 'MSFT', status='filled', minutes_ago=50 - i)
+        store = OrderStore(api, page_size=3)
+        store.sync()
+        api.listed.clear()
+
+        api.orders['a0']['status'] = 'canceled'
+        self.assertEqual(store.sync(), [])
+        self.assertEqual([status for status, count in api.listed], ['all', 'closed'])
+        self.assertEqual(store.get('a0').status, 'canceled')
+
+    def test_old_open_orders_are_checked_in_turn(self):
+        """Test open orders older than the closed window are re-read a few per sync, the longest unchecked first"""
+        api = FakeOrdersApi()
+        for i in range(3):
+            api.submit(f"gtc{i}", 'AAPL', minutes_ago=3 * 24 * 60 - i)
+        store = OrderStore(api, max_lookups=2)
+        self.assertEqual([order.id for order in store.sync()], ['gtc2', 'gtc1', 'gtc0'])
+
+        api.orders['gtc2']['status'] = 'canceled'
+        store.sync()
+        self.assertEqual(api.fetched, ['gtc0', 'gtc1'])
+        store.sync()
+        self.assertEqual(api.fetched[2:], ['gtc2', 'gtc0'])
+        self.assertEqual([order.id for order in store.query(status='open')], ['gtc0', 'gtc1'])
+        # Nothing old is paged through: no closed list without recent open orders, and no open list after the first sync
+        self.assertEqual([status for status, count in api.listed], ['all', 'open', 'all', 'all'])
+
+    def test_pages_do_not_repeat_boundary_orders(self):
+        """Test the order re-read at each page boundary is only returned once"""
+        api = FakeOrdersApi()
+        for i in range(5):
+            api.submit(f"o{i}", 'AAPL', minutes_ago=10 - i)
+        store = OrderStore(api, page_size=2)
+
+        open_orders = store.sync()
+        self.assertEqual([order.id for order in open_orders], ['o4', 'o3', 'o2', 'o1', 'o0'])
+
+    def test_sync_is_charged_against_its_timeout(self):
+        """Test each request gets what is left of the sync timeout, and none starts past it"""
+        timeouts = []
+        def request(endpoint, request_func, *args, timeout=None, **kwargs):
+            timeouts.append(timeout)
+            return request_func(*args, **kwargs)
+        store = OrderStore(self.api, request=request, page_size=3, request_timeout=10)
+
+        store.sync(timeout=5)
+        self.assertTrue(timeouts and all(timeout <= 5 for timeout in timeouts))
+
+        with patch('order_store.time.monotonic', side_effect=[100.0, 106.0]):
+            with self.assertRaises(DeadlineExceeded):
+                store.sync(timeout=5)
+
+class TestTrackerOrderStore(unittest.TestCase):
+    def test_snapshot_orders_come_from_the_store(self):
+        """Test a tracker with order tracking fills the orders section from the store"""
+        limiter_patch = patch.dict(RATE_LIMITERS, {'account': RateLimiter(max_tokens=1000, refill_rate=1000)})
+        limiter_patch.start()
+        self.addCleanup(limiter_patch.stop)
+        server = FakeAlpacaServer().start()
+        self.addCleanup(server.stop)
+        tracker = BalanceTracker('test_key', 'test_secret', server.base_url, snapshot_ttl=0, track_orders=True)
+        self.addCleanup(tracker.close)
+
+        info = tracker.get_account_info()
+        self.assertEqual(info['stale'], [])
+        self.assertEqual([order['id'] for order in info['orders']], ['order-1'])
+        self.assertEqual(tracker.order_store.get('order-1').symbol, 'GOOGL')
+
+if __name__ == '__main__':
+    unittest.main()
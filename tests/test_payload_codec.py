@@ -0,0 +1,53 @@
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_payloads import make_snapshot, run_benchmarks
+from payload_codec import FIELDS, PayloadCodec
+
+class TestPayloadCodec(unittest.TestCase):
+    def setUp(self):
+        self.codec = PayloadCodec(precision=2)
+        self.snapshot = {'total_equity': 10000.123456, 'seq': 3, 'stale': [],
+                         'positions': [{'symbol': 'AAPL', 'qty': '10', 'current_price': 160.0}],
+                         'custom': 0.005}
+
+    def test_json_rounds_floats(self):
+        """Test the json format keeps field names and rounds floats to the precision"""
+        self.assertEqual(self.codec.encode(self.snapshot, 'json'),
+                         {'total_equity': 10000.12, 'seq': 3, 'stale': [],
+                          'positions': [{'symbol': 'AAPL', 'qty': '10', 'current_price': 160.0}],
+                          'custom': 0.01})
+
+    def test_msgpack_round_trip(self):
+        """Test msgpack frames send known fields by index and decode back to the rounded payload"""
+        frame = self.codec.encode(self.snapshot, 'msgpack')
+        self.assertIsInstance(frame, bytes)
+        self.assertNotIn(b'total_equity', frame)
+        self.assertIn(b'custom', frame)  # Not in the field table, so sent by name
+        self.assertEqual(self.codec.decode(frame, 'msgpack'), self.codec.encode(self.snapshot, 'json'))
+        self.assertEqual(self.codec.describe('msgpack')['fields'], list(FIELDS))
+
+    def test_negotiation_falls_back_to_json(self):
+        """Test unknown or missing formats are served as json"""
+        self.assertEqual(self.codec.negotiate('msgpack'), 'msgpack')
+        self.assertEqual(self.codec.negotiate('protobuf'), 'json')
+        self.assertEqual(self.codec.negotiate(None), 'json')
+        self.assertNotIn('fields', self.codec.describe('json'))
+
+    def test_benchmark_compares_against_baseline(self):
+        """Test the benchmark runs every mode and msgpack puts fewer bytes on the wire"""
+        results = run_benchmarks(positions=[20], clients=[1, 5], repeat=1, min_time=0, log=lambda line: None)
+        self.assertEqual(len(results), 6)
+        for result in results.values():
+            self.assertGreater(result['bytes'], 0)
+            self.assertGreaterEqual(result['cpu_seconds'], 0)
+        baseline = results['baseline/positions=20/clients=5']['bytes']
+        self.assertLess(results['json/positions=20/clients=5']['bytes'], baseline)
+        self.assertLess(results['msgpack/positions=20/clients=5']['bytes'], baseline / 2)
+        self.assertEqual(len(make_snapshot(20)['orders']), 10)
+
+if __name__ == '__main__':
+    unittest.main()
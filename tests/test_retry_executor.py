@@ -0,0 +1,194 @@
+import unittest
+from unittest.mock import Mock
+import asyncio
+import os
+import sys
+import time
+import threading
+
+import requests
+from alpaca_trade_api.rest import APIError
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rate_limiter import RateLimiter
+from utils.retry_executor import (CLIENT_ERROR, NETWORK, RATE_LIMITED, SERVER_ERROR, TIMEOUT,
+                                  CircuitOpenError, DeadlineExceeded, RetryExecutor, classify_error)
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+class TestRetryExecutor(unittest.TestCase):
+    def setUp(self):
+        self.executor = RetryExecutor(max_attempts=3, base_delay=0.05, max_delay=0.2,
+                                      failure_threshold=3, reset_timeout=0.3)
+
+    def test_classify_error(self):
+        """Test errors are classified by type and status, not by message text"""
+        self.assertEqual(classify_error(APIError({'code': 429, 'message': 'slow down'})), RATE_LIMITED)
+        self.assertEqual(classify_error(APIError({'code': 40310000, 'message': 'too many requests'})),
+                         CLIENT_ERROR)
+        self.assertEqual(classify_error(APIError({'code': 50010000, 'message': 'internal'})), SERVER_ERROR)
+        self.assertEqual(classify_error(APIError({'message': 'x'}, http_error(504))), SERVER_ERROR)
+        self.assertEqual(classify_error(http_error(404)), CLIENT_ERROR)
+        self.assertEqual(classify_error(requests.ReadTimeout()), TIMEOUT)
+        self.assertEqual(classify_error(requests.ConnectionError()), NETWORK)
+
+    def test_retries_transient_errors_only(self):
+        """Test server errors are retried and client errors are raised at once"""
+        func = Mock(side_effect=[APIError({'code': 500, 'message': 'x'}), 'ok'])
+        self.assertEqual(self.executor.call('account', func), 'ok')
+        self.assertEqual(func.call_count, 2)
+
+        func = Mock(side_effect=APIError({'code': 403, 'message': 'subscription does not permit'}))
+        with self.assertRaises(APIError) as raised:
+            self.executor.call('account', func)
+        self.assertEqual(func.call_count, 1)
+        self.assertEqual(raised.exception.error_class, CLIENT_ERROR)
+
+    def test_one_rate_limit_token_per_call(self):
+        """Test retries do not spend extra tokens, and 429s are recorded on the limiter"""
+        limiter = RateLimiter(max_tokens=10, refill_rate=0.001)
+        func = Mock(side_effect=[APIError({'code': 429, 'message': 'x'}), requests.ConnectionError(), 'ok'])
+        self.assertEqual(self.executor.call('account', func, limiter=limiter), 'ok')
+        self.assertEqual(len(limiter.calls_history), 1)
+        self.assertEqual(len(limiter.error_history), 1)
+
+        # No token arriving before the deadline fails without waiting for one
+        empty = RateLimiter(max_tokens=1, refill_rate=1, refill_period=60)
+        empty.acquire()
+        start = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            self.executor.call('account', Mock(), timeout=0.5, limiter=empty)
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_deadline_bounds_retries(self):
+        """Test no back-off runs past the call's deadline"""
+        executor = RetryExecutor(max_attempts=10, base_delay=0.2, max_delay=1.0)
+        func = Mock(side_effect=requests.ConnectionError())
+        start = time.monotonic()
+        with self.assertRaises(requests.ConnectionError):
+            executor.call('account', func, timeout=0.5)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertLess(func.call_count, 10)
+
+    def test_circuit_opens_and_recovers(self):
+        """Test an endpoint that keeps failing fails fast until a probe succeeds"""
+        func = Mock(side_effect=APIError({'code': 503, 'message': 'down'}))
+        with self.assertRaises(APIError):
+            self.executor.call('orders', func)
+        self.assertEqual(func.call_count, 3)
+        self.assertEqual(self.executor.breaker('orders').state, 'open')
+
+        with self.assertRaises(CircuitOpenError):
+            self.executor.call('orders', func)
+        self.assertEqual(func.call_count, 3)
+        # Other endpoints are unaffected
+        self.assertEqual(self.executor.call('account', lambda: 'ok'), 'ok')
+
+        time.sleep(0.35)
+        self.assertEqual(self.executor.breaker('orders').state, 'half_open')
+        self.assertEqual(self.executor.call('orders', lambda: 'ok'), 'ok')
+        self.assertEqual(self.executor.breaker('orders').state, 'closed')
+
+    def test_call_async(self):
+        """Test the coroutine variant retries with asyncio.sleep"""
+        attempts = []
+
+        async def flaky():
+            attempts.append(time.monotonic())
+            if len(attempts) < 2:
+                raise asyncio.TimeoutError()
+            return 'ok'
+
+        self.assertEqual(asyncio.run(self.executor.call_async('account', flaky, timeout=1.0)), 'ok')
+        self.assertEqual(len(attempts), 2)
+        self.assertGreaterEqual(attempts[1] - attempts[0], 0.025)
+
+    def test_probe_is_released_when_the_call_never_runs(self):
+        """Test a half-open probe that misses its token or is cancelled does not wedge the circuit"""
+        executor = RetryExecutor(max_attempts=1, failure_threshold=1, reset_timeout=0.1)
+        with self.assertRaises(requests.ConnectionError):
+            executor.call('orders', Mock(side_effect=requests.ConnectionError()))
+        time.sleep(0.15)
+
+        empty = RateLimiter(max_tokens=1, refill_rate=1, refill_period=60)
+        empty.acquire()
+        with self.assertRaises(DeadlineExceeded):
+            executor.call('orders', Mock(), timeout=0.1, limiter=empty)
+        self.assertFalse(executor.breaker('orders').probing)
+
+        async def cancelled_probe():
+            task = asyncio.create_task(executor.call_async('orders', asyncio.sleep, args=(10,)))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancelled_probe())
+        self.assertFalse(executor.breaker('orders').probing)
+        self.assertEqual(executor.call('orders', lambda: 'ok'), 'ok')
+        self.assertEqual(executor.breaker('orders').state, 'closed')
+
+    def test_only_the_probe_closes_the_circuit(self):
+        """Test a call started before the circuit opened cannot close it while the probe is in flight"""
+        executor = RetryExecutor(max_attempts=1, failure_threshold=1, reset_timeout=0.1)
+        release_early, release_probe = threading.Event(), threading.Event()
+
+        def refused():
+            release_early.wait(5)
+            raise APIError({'code': 403, 'message': 'forbidden'})
+
+        def answered():
+            release_probe.wait(5)
+            return 'ok'
+
+        def run(func, results):
+            try:
+                results.append(executor.call('orders', func))
+            except Exception as e:
+                results.append(e)
+
+        early, probe = [], []
+        early_thread = threading.Thread(target=run, args=(refused, early))
+        early_thread.start()
+        with self.assertRaises(requests.ConnectionError):
+            executor.call('orders', Mock(side_effect=requests.ConnectionError()))
+        time.sleep(0.15)
+        probe_thread = threading.Thread(target=run, args=(answered, probe))
+        probe_thread.start()
+        time.sleep(0.05)
+        self.assertTrue(executor.breaker('orders').probing)
+
+        # The early call's refusal is an answer, but not the probe's
+        release_early.set()
+        early_thread.join()
+        self.assertIsInstance(early[0], APIError)
+        self.assertEqual(executor.breaker('orders').state, 'half_open')
+        self.assertTrue(executor.breaker('orders').probing)
+
+        release_probe.set()
+        probe_thread.join()
+        self.assertEqual(probe, ['ok'])
+        self.assertEqual(executor.breaker('orders').state, 'closed')
+
+    def test_call_async_waits_for_a_token(self):
+        """Test the coroutine variant sleeps on the loop for a token within the deadline"""
+        limiter = RateLimiter(max_tokens=1, refill_rate=10)
+        limiter.acquire()
+
+        async def ok():
+            return 'ok'
+
+        start = time.monotonic()
+        self.assertEqual(asyncio.run(self.executor.call_async('account', ok, timeout=1.0, limiter=limiter)), 'ok')
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+
+        limiter.acquire(wait=False)
+        with self.assertRaises(DeadlineExceeded):
+            asyncio.run(self.executor.call_async('account', ok, timeout=0.01, limiter=limiter))
+
+if __name__ == '__main__':
+    unittest.main()
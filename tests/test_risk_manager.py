@@ -5,7 +5,13 @@ import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import alpaca_trade_api as tradeapi
+
+from balance_tracker import BalanceTracker
 from risk_manager import RiskManager
+from tests.fake_alpaca import FakeAlpacaServer
+from utils.rate_limiter import RATE_LIMITERS, RateLimiter
+from utils.retry_executor import CircuitOpenError, RetryExecutor
 
 class TestRiskManager(unittest.TestCase):
     def setUp(self):
@@ -110,5 +116,25 @@ class TestRiskManager(unittest.TestCase):
         self.assertEqual(risk_metrics['largest_position'], 0.3)  # 3000 / 10000
         self.assertEqual(risk_metrics['unrealized_pl'], 100)  # 200 + (-100)
 
+class TestRiskManagerCircuits(unittest.TestCase):
+    def test_shares_the_trackers_circuit(self):
+        """Test account failures seen by a tracker open the circuit the risk manager calls through"""
+        limiter_patch = patch.dict(RATE_LIMITERS, {'account': RateLimiter(max_tokens=1000, refill_rate=1000)})
+        limiter_patch.start()
+        self.addCleanup(limiter_patch.stop)
+        server = FakeAlpacaServer(status={'/v2/account': 503}).start()
+        self.addCleanup(server.stop)
+        executor = RetryExecutor(max_attempts=1, failure_threshold=1, reset_timeout=60)
+        tracker = BalanceTracker('test_key', 'test_secret', server.base_url, snapshot_ttl=0, executor=executor)
+        self.addCleanup(tracker.close)
+        api = tradeapi.REST('test_key', 'test_secret', server.base_url, api_version='v2')
+        risk_manager = RiskManager(api, executor=executor)
+
+        tracker.get_account_info()
+        account_requests = sum(1 for path, _, _ in server.requests if path == '/v2/account')
+        with self.assertRaises(CircuitOpenError):
+            risk_manager._call('account', api.get_account)
+        self.assertEqual(sum(1 for path, _, _ in server.requests if path == '/v2/account'), account_requests)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,177 @@
+import unittest
+import os
+import sys
+import time
+import asyncio
+import importlib.util
+import socket
+import subprocess
+import urllib.request
+
+import aiohttp
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.fake_alpaca import FakeAlpacaServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def installed(package):
+    """Whether a package can be imported, without importing it"""
+    return importlib.util.find_spec(package) is not None
+
+class DashboardServer:
+    """
+    The dashboard served by app.run_server in a subprocess, in one SERVER_MODE.
+
+    The green modes monkey-patch the standard library on import, so the server
+    cannot share a process with the tests.
+    """
+    def __init__(self, mode, setup=''):
+        """
+        Args:
+            mode: SERVER_MODE for the subprocess
+            setup: Python run after 'import app' and before the server starts
+        """
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            self.port = probe.getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.mode = mode
+        self.script = f"import app\n{setup}\napp.run_server(host='127.0.0.1', port={self.port})\n"
+        self.process = None
+
+    def start(self, timeout=30):
+        env = dict(os.environ, APCA_API_KEY_ID='test_key', APCA_API_SECRET_KEY='test_secret', SERVER_MODE=self.mode)
+        self.process = subprocess.Popen([sys.executable, '-c', self.script], cwd=ROOT, env=env,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.time() + timeout
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', self.port), timeout=1).close()
+                return self
+            except OSError:
+                if time.time() > deadline or self.process.poll() is not None:
+                    self.stop()
+                    raise RuntimeError(f"Dashboard server did not start in {self.mode} mode")
+                time.sleep(0.2)
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+
+class TestServerLoad(unittest.TestCase):
+    def start_server(self, mode, setup=''):
+        try:
+            server = DashboardServer(mode, setup).start()
+        except RuntimeError as e:
+            self.fail(str(e))
+        self.addCleanup(server.stop)
+        return server
+
+    def run_load(self, mode):
+        """Drive STRESS_CLIENTS concurrent clients against a server and report latency percentiles"""
+        num_clients = int(os.getenv('STRESS_CLIENTS', '1000'))
+        requests_per_client = 5
+        server = self.start_server(mode)
+        latencies = []
+        errors = []
+
+        async def client(session, client_id):
+            # A Socket.IO polling handshake, then page loads with think time
+            paths = ['/socket.io/?EIO=4&transport=polling'] + ['/'] * requests_per_client
+            for path in paths:
+                start = time.perf_counter()
+                try:
+                    async with session.get(server.base_url + path) as response:
+                        await response.read()
+                        if response.status != 200:
+                            raise Exception(f"HTTP {response.status}")
+                    latencies.append(time.perf_counter() - start)
+                except Exception as e:
+                    errors.append(f"Client {client_id}: {str(e) or type(e).__name__}")
+                await asyncio.sleep(0.05)
+
+        async def run_clients():
+            connector = aiohttp.TCPConnector(limit=0)
+            timeout = aiohttp.ClientTimeout(total=60)
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+                await asyncio.gather(*(client(session, i) for i in range(num_clients)))
+
+        start_time = time.time()
+        asyncio.run(run_clients())
+        duration = time.time() - start_time
+
+        total = num_clients * (requests_per_client + 1)
+        times_ms = np.array(latencies) * 1000
+        print(f"\nDashboard Load Test Results ({mode} server):")
+        print(f"Clients: {num_clients}")
+        print(f"Total Requests: {total}")
+        print(f"Errors: {len(errors)}")
+        print(f"Duration: {duration:.2f} seconds")
+        print(f"Requests/second: {len(latencies) / duration:.2f}")
+        print(f"p50 Response Time: {np.percentile(times_ms, 50):.1f} ms")
+        print(f"p99 Response Time: {np.percentile(times_ms, 99):.1f} ms")
+
+        self.assertLess(len(errors), total * 0.01, errors[:5])
+
+    def run_async_tracker(self, mode):
+        """Run the AsyncBalanceTracker loop as a background task and check the server keeps serving"""
+        alpaca = FakeAlpacaServer().start()
+        self.addCleanup(alpaca.stop)
+        setup = ("from async_balance_tracker import AsyncBalanceTracker\n"
+                 f"tracker = AsyncBalanceTracker('test_key', 'test_secret', {alpaca.base_url!r})\n"
+                 "app.socketio.start_background_task(app.balance_thread, tracker)")
+        server = self.start_server(mode, setup)
+
+        # asyncio.run inside the background task polls the account, then the clock
+        deadline = time.time() + 30
+        while not {'/v2/account', '/v2/clock'} <= {path for path, _, _ in alpaca.requests}:
+            if time.time() > deadline:
+                self.fail(f"Balance loop made no requests in {mode} mode")
+            time.sleep(0.2)
+
+        # The event loop must not hold up the server while it sleeps between polls
+        with urllib.request.urlopen(server.base_url + '/', timeout=10) as response:
+            self.assertEqual(response.status, 200)
+
+    def test_dashboard_load(self):
+        """Test the dashboard in the environment's SERVER_MODE under 1000 concurrent clients"""
+        self.run_load(os.getenv('SERVER_MODE', 'dev'))
+
+    def test_eventlet_load(self):
+        """Test the eventlet server under 1000 concurrent clients"""
+        self.run_load('eventlet')
+
+    @unittest.skipUnless(installed('gevent'), "gevent is not installed")
+    def test_gevent_load(self):
+        """Test the gevent server under 1000 concurrent clients"""
+        self.run_load('gevent')
+
+    def test_async_tracker_dev(self):
+        """Test the asyncio balance loop runs as a background thread of the dev server"""
+        self.run_async_tracker('dev')
+
+    def test_async_tracker_eventlet(self):
+        """Test the asyncio balance loop runs inside an eventlet green thread"""
+        self.run_async_tracker('eventlet')
+
+    @unittest.skipUnless(installed('gevent'), "gevent is not installed")
+    def test_async_tracker_gevent(self):
+        """Test the asyncio balance loop runs inside a gevent green thread"""
+        self.run_async_tracker('gevent')
+
+    @unittest.skipIf(installed('gevent'), "gevent is installed")
+    def test_missing_green_package_is_reported(self):
+        """Test a green mode whose package is missing stops the server with a message naming it"""
+        env = dict(os.environ, APCA_API_KEY_ID='test_key', APCA_API_SECRET_KEY='test_secret', SERVER_MODE='gevent')
+        result = subprocess.run([sys.executable, '-c', 'import app'], cwd=ROOT, env=env,
+                                capture_output=True, text=True, timeout=60)
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("SERVER_MODE=gevent needs the gevent package", result.stdout)
+        self.assertIn("ImportError: SERVER_MODE=gevent requires the gevent package", result.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
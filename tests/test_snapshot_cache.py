@@ -0,0 +1,70 @@
+import unittest
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.snapshot_cache import SnapshotCache
+
+class TestSnapshotCache(unittest.TestCase):
+    def setUp(self):
+        self.calls = 0
+        self.release = threading.Event()
+
+    def slow_loader(self):
+        self.calls += 1
+        self.release.wait(2.0)
+        return {'call': self.calls}
+
+    def test_concurrent_misses_share_one_load(self):
+        """Test callers that miss together wait on a single load"""
+        cache = SnapshotCache(self.slow_loader, ttl=10.0)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [{'call': 1}] * 8)
+        self.assertEqual(cache.loads, 1)
+        self.assertEqual(cache.coalesced, 7)
+
+    def test_ttl_expiry_and_max_age(self):
+        """Test values are served until the TTL and reloaded after it"""
+        self.release.set()
+        cache = SnapshotCache(self.slow_loader, ttl=0.2)
+        self.assertEqual(cache.get(), {'call': 1})
+        self.assertEqual(cache.get(), {'call': 1})
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.get(max_age=0), {'call': 2})
+        time.sleep(0.25)
+        self.assertEqual(cache.get(), {'call': 3})
+        cache.invalidate()
+        self.assertEqual(cache.peek(), {'call': 3})
+        self.assertEqual(cache.get(), {'call': 4})
+
+    def test_failures_are_not_cached(self):
+        """Test a None result or an exception reaches every caller but is not cached"""
+        results = iter([None, ValueError('boom'), 'ok'])
+
+        def loader():
+            result = next(results)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        cache = SnapshotCache(loader, ttl=10.0)
+        self.assertIsNone(cache.get())
+        with self.assertRaises(ValueError):
+            cache.get()
+        self.assertEqual(cache.get(), 'ok')
+        self.assertEqual(cache.get(), 'ok')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snapshot_delta import SnapshotDiffer, diff_snapshots
+
+def make_position(symbol, price):
+    return {'symbol': symbol, 'qty': '10', 'side': 'buy', 'avg_entry_price': 100.0,
+            'current_price': price, 'unrealized_pl': (price - 100.0) * 10, 'unrealized_plpc': price - 100.0}
+
+def make_order(order_id, symbol):
+    return {'id': order_id, 'symbol': symbol, 'qty': '5', 'side': 'buy', 'type': 'limit',
+            'limit_price': 90.0, 'submitted_at': '2024-01-02 15:30:00'}
+
+def make_snapshot(equity, positions, orders, last_update='2024-01-02 15:30:00'):
+    return {'total_equity': equity, 'cash_balance': 5000.0, 'buying_power': 5000.0,
+            'positions': positions, 'orders': orders, 'stale': [], 'last_update': last_update}
+
+class TestSnapshotDelta(unittest.TestCase):
+    def test_diff_by_symbol_and_order_id(self):
+        """Test rows are added, updated with only changed fields, and removed by key"""
+        previous = make_snapshot(10000.0, [make_position('AAPL', 150.0), make_position('MSFT', 300.0)],
+                                 [make_order('o1', 'AAPL')])
+        current = make_snapshot(10100.0, [make_position('AAPL', 151.0), make_position('TSLA', 200.0)],
+                                [make_order('o1', 'AAPL'), make_order('o2', 'TSLA')], '2024-01-02 15:30:05')
+        delta = diff_snapshots(previous, current)
+
+        self.assertEqual(delta['account'], {'total_equity': 10100.0, 'last_update': '2024-01-02 15:30:05'})
+        self.assertEqual(delta['positions']['add'], [make_position('TSLA', 200.0)])
+        self.assertEqual(delta['positions']['remove'], ['MSFT'])
+        self.assertEqual(delta['positions']['update'],
+                         [{'symbol': 'AAPL', 'current_price': 151.0, 'unrealized_pl': 510.0, 'unrealized_plpc': 51.0}])
+        self.assertEqual(delta['orders'], {'add': [make_order('o2', 'TSLA')]})
+
+    def test_sequence_numbers(self):
+        """Test the first snapshot goes out in full and later ones as chained deltas"""
+        differ = SnapshotDiffer()
+        self.assertIsNone(differ.full_snapshot())
+        first = make_snapshot(10000.0, [make_position('AAPL', 150.0)], [])
+        self.assertIsNone(differ.update(first))
+        self.assertEqual(differ.full_snapshot()['seq'], 1)
+
+        # The same snapshot again changes nothing and does not advance the sequence
+        self.assertEqual(differ.update(first), {})
+        self.assertEqual(differ.seq, 1)
+
+        delta = differ.update(make_snapshot(10000.0, [make_position('AAPL', 151.0)], [], '2024-01-02 15:30:05'))
+        self.assertEqual((delta['base_seq'], delta['seq']), (1, 2))
+        self.assertNotIn('orders', delta)
+        self.assertEqual(differ.full_snapshot()['positions'][0]['current_price'], 151.0)
+
+    def test_poll_time_alone_is_not_a_change(self):
+        """Test a poll that only moves last_update sends nothing, and the next change carries it"""
+        differ = SnapshotDiffer()
+        differ.update(make_snapshot(10000.0, [make_position('AAPL', 150.0)], []))
+
+        polled = make_snapshot(10000.0, [make_position('AAPL', 150.0)], [], '2024-01-02 15:30:05')
+        self.assertEqual(differ.update(polled), {})
+        self.assertEqual(differ.seq, 1)
+
+        moved = make_snapshot(10000.0, [make_position('AAPL', 151.0)], [], '2024-01-02 15:30:10')
+        delta = differ.update(moved)
+        self.assertEqual(delta['account'], {'last_update': '2024-01-02 15:30:10'})
+        self.assertEqual(differ.full_snapshot()['last_update'], '2024-01-02 15:30:10')
+
+    def test_delta_is_compact_for_large_books(self):
+        """Test one price move in a large book costs a fraction of the full snapshot"""
+        positions = [make_position(f"SYM{i}", 100.0 + i) for i in range(500)]
+        orders = [make_order(f"o{i}", f"SYM{i}") for i in range(500)]
+        differ = SnapshotDiffer()
+        differ.update(make_snapshot(10000.0, positions, orders))
+
+        moved = list(positions)
+        moved[7] = make_position('SYM7', 110.0)
+        delta = differ.update(make_snapshot(10010.0, moved, orders, '2024-01-02 15:30:05'))
+
+        full_size = len(json.dumps(differ.full_snapshot()))
+        delta_size = len(json.dumps(delta))
+        self.assertLess(delta_size * 50, full_size)
+
+if __name__ == '__main__':
+    unittest.main()
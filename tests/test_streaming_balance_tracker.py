@@ -0,0 +1,127 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streaming_balance_tracker import StreamingBalanceTracker, TradeBook
+from tests.fake_alpaca import FakeAlpacaServer, FakeTradeStream
+from utils.rate_limiter import RATE_LIMITERS, RateLimiter
+
+def make_order(order_id, symbol, side, status, qty='5', filled_qty='0'):
+    return {'id': order_id, 'symbol': symbol, 'side': side, 'type': 'market', 'qty': qty,
+            'filled_qty': filled_qty, 'status': status, 'limit_price': None,
+            'submitted_at': '2024-01-02T15:31:00Z'}
+
+class TestTradeBook(unittest.TestCase):
+    def setUp(self):
+        self.book = TradeBook()
+        self.book.account = {'cash': '5000', 'buying_power': '5000', 'portfolio_value': '10000'}
+        self.book.positions['AAPL'] = {'symbol': 'AAPL', 'qty': '10', 'avg_entry_price': '150.00',
+                                       'current_price': '160.00'}
+
+    def fill(self, side, qty, price, position_qty, status='filled'):
+        order = make_order('o1', 'AAPL', side, status, qty=str(qty))
+        return self.book.apply({'event': 'fill', 'order': order, 'qty': str(qty),
+                                'price': str(price), 'position_qty': str(position_qty)})
+
+    def test_adding_to_a_position_averages_the_entry(self):
+        """Test a buy fill raises the quantity, averages the entry and spends cash"""
+        self.fill('buy', 5, 180.0, 15)
+        position = self.book.positions['AAPL']
+        self.assertEqual(position['qty'], '15')
+        self.assertAlmostEqual(float(position['avg_entry_price']), 160.0)
+        self.assertAlmostEqual(float(position['unrealized_pl']), 300.0)
+        self.assertEqual(self.book.account['cash'], '4100')
+
+    def test_reducing_closing_and_flipping(self):
+        """Test sells keep the entry price, close at zero and reset it on a flip"""
+        self.fill('sell', 4, 170.0, 6)
+        self.assertEqual(self.book.positions['AAPL']['qty'], '6')
+        self.assertAlmostEqual(float(self.book.positions['AAPL']['avg_entry_price']), 150.0)
+
+        self.fill('sell', 6, 170.0, 0)
+        self.assertNotIn('AAPL', self.book.positions)
+
+        self.fill('sell', 2, 165.0, -2)
+        position = self.book.positions['AAPL']
+        self.assertEqual((position['qty'], position['side']), ('-2', 'short'))
+        self.assertAlmostEqual(float(position['avg_entry_price']), 165.0)
+
+    def test_order_lifecycle(self):
+        """Test open orders are upserted and dropped once they close"""
+        self.book.apply({'event': 'new', 'order': make_order('o2', 'MSFT', 'buy', 'new')})
+        self.assertEqual(self.book.orders['o2']['status'], 'new')
+        self.book.apply({'event': 'partial_fill', 'order': make_order('o2', 'MSFT', 'buy', 'partially_filled', filled_qty='2'),
+                         'qty': '2', 'price': '300', 'position_qty': '2'})
+        self.assertEqual(self.book.orders['o2']['filled_qty'], '2')
+        self.assertEqual(self.book.positions['MSFT']['qty'], '2')
+        self.book.apply({'event': 'canceled', 'order': make_order('o2', 'MSFT', 'buy', 'canceled')})
+        self.assertNotIn('o2', self.book.orders)
+
+class TestStreamingBalanceTracker(unittest.TestCase):
+    def setUp(self):
+        """Start a fake REST API and a fake trade_updates stream"""
+        limiter_patch = patch.dict(RATE_LIMITERS, {'account': RateLimiter(max_tokens=1000, refill_rate=1000)})
+        limiter_patch.start()
+        self.addCleanup(limiter_patch.stop)
+        self.server = FakeAlpacaServer().start()
+        self.addCleanup(self.server.stop)
+        self.stream = FakeTradeStream().start()
+        self.addCleanup(self.stream.stop)
+        self.tracker = StreamingBalanceTracker('test_key', 'test_secret', self.server.base_url,
+                                               stream_url=self.stream.base_url, reconcile_interval=3600,
+                                               snapshot_ttl=0)
+        self.addCleanup(self.tracker.close)
+
+    def push(self, update):
+        self.stream.push(update)
+        self.assertTrue(self.tracker.wait_for_update(timeout=5))
+
+    def test_fills_update_the_snapshot_without_polling(self):
+        """Test stream events reach the snapshot and REST is only used to seed the book"""
+        info = self.tracker.get_account_info()
+        self.assertEqual(info['positions'][0]['qty'], '10')
+        self.assertEqual(len(self.server.requests), 3)
+
+        self.tracker.start()
+        self.assertTrue(self.stream.listening.wait(5))
+        self.assertEqual(self.stream.received[0]['data']['key_id'], 'test_key')
+
+        self.push({'event': 'new', 'order': make_order('o2', 'AAPL', 'buy', 'new')})
+        info = self.tracker.get_account_info()
+        self.assertEqual(sorted(order['id'] for order in info['orders']), ['o2', 'order-1'])
+
+        self.push({'event': 'fill', 'order': make_order('o2', 'AAPL', 'buy', 'filled', filled_qty='5'),
+                   'qty': '5', 'price': '180.00', 'position_qty': '15'})
+        info = self.tracker.get_account_info()
+        self.assertEqual([order['id'] for order in info['orders']], ['order-1'])
+        self.assertEqual(info['positions'][0]['qty'], '15')
+        self.assertAlmostEqual(info['positions'][0]['avg_entry_price'], 160.0)
+        self.assertEqual(info['cash_balance'], 4100.0)
+        self.assertEqual(len(self.server.requests), 3)
+
+        # A reconcile replaces the local book with what the API reports
+        self.tracker.reconcile()
+        info = self.tracker.get_account_info()
+        self.assertEqual(len(self.server.requests), 6)
+        self.assertEqual(info['positions'][0]['qty'], '10')
+        self.assertEqual(info['cash_balance'], 5000.0)
+
+    def test_reconcile_keeps_local_copy_of_failed_sections(self):
+        """Test a section that fails to reconcile keeps its streamed state"""
+        self.tracker.get_account_info()
+        self.tracker.start()
+        self.assertTrue(self.stream.listening.wait(5))
+        self.push({'event': 'new', 'order': make_order('o2', 'AAPL', 'buy', 'new')})
+
+        self.tracker.max_retries = 1
+        self.server.status['/v2/orders'] = 500
+        self.tracker.reconcile()
+        info = self.tracker.get_account_info()
+        self.assertEqual(info['stale'], ['orders'])
+        self.assertEqual(len(info['orders']), 2)
+
+if __name__ == '__main__':
+    unittest.main()
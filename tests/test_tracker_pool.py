@@ -0,0 +1,104 @@
+import unittest
+from unittest.mock import patch
+import asyncio
+import os
+import sys
+import gc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.fake_alpaca import FakeAlpacaServer
+from tracker_pool import TrackerPool
+from utils.rate_limiter import RATE_LIMITERS, RateLimiter
+
+class TestTrackerPool(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        """Start a local fake API"""
+        # The pool's accounts must not touch the shared account limiter
+        self.shared = RateLimiter(max_tokens=0, refill_rate=0.001)
+        limiter_patch = patch.dict(RATE_LIMITERS, {'account': self.shared})
+        limiter_patch.start()
+        self.addCleanup(limiter_patch.stop)
+        self.server = FakeAlpacaServer(latency={'/v2/account': 0.05, '/v2/positions': 0.05,
+                                                '/v2/orders': 0.05}).start()
+        self.addCleanup(self.server.stop)
+
+    def make_pool(self, accounts, **kwargs):
+        kwargs.setdefault('snapshot_ttl', 0)
+        pool = TrackerPool(**kwargs)
+        for i in range(accounts):
+            pool.add_account(f"acct-{i}", f"key-{i}", 'secret', self.server.base_url)
+        return pool
+
+    async def test_polls_are_staggered_and_aggregated(self):
+        """Test every account is polled on schedule, spread over the interval, and summed"""
+        pool = self.make_pool(40, interval=1.0, rate_budget=100000)
+        runner = asyncio.create_task(pool.run())
+        await asyncio.sleep(2.3)
+        pool.stop()
+        await runner
+        metrics = pool.metrics()
+        await pool.close()
+
+        self.assertTrue(all(account.polls >= 2 for account in pool.accounts.values()))
+        self.assertEqual(metrics['reporting'], 40)
+        self.assertEqual(metrics['total_equity'], 40 * 10000.0)
+        self.assertEqual(metrics['errors'], 0)
+
+        # Requests arrive spread out, not as a burst of 40 snapshots each interval
+        starts = sorted(started for path, started, _ in self.server.requests if path == '/v2/account')
+        busiest = max(sum(1 for t in starts if start <= t < start + 0.1) for start in starts)
+        self.assertLess(busiest, 15)
+        self.assertEqual(len(self.shared.calls_history), 0)
+
+    async def test_rate_budget_is_shared(self):
+        """Test the budget is split per account and the interval stretches to fit it"""
+        pool = self.make_pool(10, interval=1.0, rate_budget=600)
+        self.assertEqual(pool.share, 60)
+        self.assertTrue(all(account.limiter.refill_rate == 60 for account in pool.accounts.values()))
+        self.assertEqual(pool.effective_interval, 3.0)
+
+        pool.add_account('acct-10', 'key-10', 'secret', self.server.base_url)
+        await pool.remove_account('acct-0')
+        await pool.remove_account('acct-1')
+        self.assertAlmostEqual(pool.accounts['acct-10'].limiter.max_tokens, 600 / 9)
+        await pool.close()
+
+    async def test_small_shares_still_fit_a_snapshot(self):
+        """Test a share below one snapshot per minute still fetches every section once refilled"""
+        pool = self.make_pool(10, interval=1.0, rate_budget=5)
+        self.assertEqual(pool.share, 0.5)
+        self.assertEqual(pool.effective_interval, 360.0)
+        for account in pool.accounts.values():
+            self.assertEqual(account.limiter.max_tokens, 3)
+            self.assertEqual(account.limiter.refill_rate, 0.5)
+
+        for poll_round in range(2):
+            if poll_round:
+                # One effective interval later every bucket has refilled a snapshot's worth
+                for account in pool.accounts.values():
+                    account.limiter.last_refill -= pool.effective_interval
+            snapshots = await asyncio.gather(*(pool.poll(account_id) for account_id in pool.accounts))
+            self.assertTrue(all(snapshot is not None and snapshot['stale'] == [] for snapshot in snapshots))
+        await pool.close()
+
+    async def test_state_does_not_grow_with_polls(self):
+        """Test per-account state stays the same size however many polls it has served"""
+        pool = self.make_pool(30, interval=60, rate_budget=100000)
+
+        async def poll_all(rounds):
+            for _ in range(rounds):
+                await asyncio.gather(*(pool.poll(account_id) for account_id in pool.accounts))
+            gc.collect()
+            return len(gc.get_objects())
+
+        before = await poll_all(2)
+        after = await poll_all(6)
+        await pool.close()
+
+        print(f"\nObjects after 2 rounds: {before}, after 8: {after}")
+        self.assertEqual(pool.polls, 30 * 8)
+        self.assertLess(after - before, 30)
+
+if __name__ == '__main__':
+    unittest.main()
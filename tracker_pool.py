@@ -0,0 +1,299 @@
+import asyncio
+import heapq
+import json
+import logging
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+import config
+from async_balance_tracker import AsyncBalanceTracker, create_session
+from balance_tracker import SNAPSHOT_SECTIONS
+from utils.rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Fractional part of the golden ratio: successive multiples spread evenly over [0, 1) for any count
+_GOLDEN = 0.6180339887498949
+
+class PooledAccount:
+    """One account in a TrackerPool: credentials, its tracker and its latest snapshot"""
+    __slots__ = ('account_id', 'api_key', 'api_secret', 'base_url', 'limiter', 'tracker', 'snapshot',
+                 'polls', 'errors', 'polling')
+
+    def __init__(self, account_id, api_key, api_secret, base_url, limiter):
+        self.account_id = account_id
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.base_url = base_url
+        self.limiter = limiter
+        self.tracker = None  # Created on first poll, inside the pool's loop
+        self.snapshot = None
+        self.polls = 0
+        self.errors = 0
+        self.polling = False
+
+class TrackerPool:
+    """
+    Balance tracking for many accounts on one event loop.
+
+    Every account gets an AsyncBalanceTracker over one shared keep-alive
+    session. A single scheduler polls the accounts in turn, with start times
+    staggered across the interval so requests do not arrive in bursts. The
+    pool's rate budget is split evenly, and each account gets its own token
+    bucket refilling at its share. A bucket always holds at least one full
+    snapshot's worth of requests, and the interval is stretched when a share
+    cannot refill that every interval.
+
+    The pool keeps only the latest snapshot per account, plus fixed-size
+    pool-wide latency samples, so per-account memory does not grow with N or
+    with uptime.
+
+    Usage:
+        pool = TrackerPool(interval=10)
+        for account in accounts:
+            pool.add_account(account['id'], account['key'], account['secret'], account['base_url'])
+        await pool.run()
+    """
+    def __init__(self, interval=10.0, rate_budget=1000, max_concurrency=50, **tracker_options):
+        """
+        Initialize the pool.
+
+        Args:
+            interval: Seconds between polls of the same account
+            rate_budget: Requests per minute shared by all accounts
+            max_concurrency: Most snapshots in flight at once, which also sizes the connection pool
+            tracker_options: Passed on to every AsyncBalanceTracker
+        """
+        self.interval = interval
+        self.rate_budget = rate_budget
+        self.max_concurrency = max_concurrency
+        self.tracker_options = tracker_options
+
+        self.accounts = {}
+        self._schedule = []  # (due, sequence, PooledAccount) heap
+        self._sequence = 0
+        self._added = 0
+        self._session = None
+        self._slots = None
+        self._changed = None
+        self._running = False
+        self._tasks = set()
+
+        # Pool-wide, fixed-size
+        self.latencies = deque(maxlen=1000)
+        self.polls = 0
+        self.errors = 0
+
+    @property
+    def share(self):
+        """Requests per minute each account may make"""
+        return self.rate_budget / max(len(self.accounts), 1)
+
+    @property
+    def effective_interval(self):
+        """Poll interval per account, stretched so a snapshot fits in the account's share"""
+        return max(self.interval, len(SNAPSHOT_SECTIONS) * 60.0 / self.share)
+
+    def _rebalance(self):
+        """Resize every account's token bucket to the current share"""
+        share = self.share
+        # A smaller bucket could never hold the requests of one snapshot, so a section would miss its deadline
+        # on every poll; the refill rate alone keeps the account to its share
+        capacity = max(share, len(SNAPSHOT_SECTIONS))
+        for account in self.accounts.values():
+            with account.limiter.lock:
+                account.limiter.max_tokens = capacity
+                account.limiter.refill_rate = share
+                account.limiter.tokens = min(account.limiter.tokens, capacity)
+
+    def _loop_time(self):
+        try:
+            return asyncio.get_running_loop().time()
+        except RuntimeError:
+            return time.monotonic()
+
+    def _push(self, due, account):
+        self._sequence += 1
+        heapq.heappush(self._schedule, (due, self._sequence, account))
+        if self._changed is not None:
+            self._changed.set()
+
+    def add_account(self, account_id, api_key, api_secret, base_url):
+        """
+        Add an account; its first poll is staggered into the current interval.
+
+        Args:
+            account_id: Name the account is reported under
+            api_key: Alpaca API key ID
+            api_secret: Alpaca API secret key
+            base_url: Trading API URL, paper or live
+        """
+        if account_id in self.accounts:
+            raise ValueError(f"Account already in pool: {account_id}")
+        limiter = RateLimiter(max_tokens=1, refill_rate=1, refill_period=60)
+        account = self.accounts[account_id] = PooledAccount(account_id, api_key, api_secret, base_url, limiter)
+        self._rebalance()
+        limiter.tokens = limiter.max_tokens  # Start with a full share
+
+        offset = (self._added * _GOLDEN) % 1.0 * self.effective_interval
+        self._added += 1
+        self._push(self._loop_time() + offset, account)
+
+    async def remove_account(self, account_id):
+        """Remove an account and close its tracker; its queued poll is dropped"""
+        account = self.accounts.pop(account_id, None)
+        if account is None:
+            return
+        self._rebalance()
+        if account.tracker is not None:
+            await account.tracker.close()
+
+    @property
+    def session(self):
+        """Shared HTTP session, created on first use inside the running loop"""
+        if self._session is None or self._session.closed:
+            self._session = create_session(limit=self.max_concurrency * len(SNAPSHOT_SECTIONS))
+        return self._session
+
+    async def poll(self, account_id):
+        """
+        Fetch one account's snapshot now.
+
+        Returns:
+            dict: The snapshot, or None if it could not be fetched
+        """
+        account = self.accounts[account_id]
+        if account.tracker is None:
+            account.tracker = AsyncBalanceTracker(account.api_key, account.api_secret, account.base_url,
+                                                  session=self.session, rate_limiter=account.limiter,
+                                                  **self.tracker_options)
+        start = time.monotonic()
+        account.polling = True
+        try:
+            snapshot = await account.tracker.get_account_info()
+        except Exception as e:
+            logger.error(f"Error polling {account_id}: {str(e)}")
+            snapshot = None
+        finally:
+            account.polling = False
+        self.latencies.append(time.monotonic() - start)
+        self.polls += 1
+        account.polls += 1
+        if snapshot is None:
+            self.errors += 1
+            account.errors += 1
+        else:
+            account.snapshot = snapshot
+        return snapshot
+
+    async def _poll_in_slot(self, account_id):
+        try:
+            if account_id in self.accounts:
+                await self.poll(account_id)
+        finally:
+            self._slots.release()
+
+    async def run(self):
+        """Poll every account on its staggered schedule until stop() is called"""
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._changed = asyncio.Event()
+        self._running = True
+        loop = asyncio.get_running_loop()
+        while self._running:
+            if not self._schedule:
+                self._changed.clear()
+                await self._changed.wait()
+                continue
+            due, _, account = self._schedule[0]
+            delay = due - loop.time()
+            if delay > 0:
+                # Wake early if an account is added ahead of the head of the queue
+                self._changed.clear()
+                try:
+                    await asyncio.wait_for(self._changed.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._schedule)
+            if self.accounts.get(account.account_id) is not account:
+                continue  # Removed since it was scheduled
+            # Fixed-rate schedule, but never queue up missed polls after a stall
+            self._push(max(due + self.effective_interval, loop.time()), account)
+            if account.polling:
+                continue  # The last poll is still in flight; skip this one
+            await self._slots.acquire()
+            task = asyncio.create_task(self._poll_in_slot(account.account_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def stop(self):
+        """Stop the scheduler after its current step"""
+        self._running = False
+        if self._changed is not None:
+            self._changed.set()
+
+    def snapshot(self, account_id):
+        """The latest snapshot of an account, or None if it has not been fetched"""
+        return self.accounts[account_id].snapshot
+
+    def metrics(self):
+        """
+        Aggregate figures across the pool.
+
+        Returns:
+            dict: Account counts, summed balances, poll counts and latency percentiles in ms
+        """
+        snapshots = [account.snapshot for account in self.accounts.values() if account.snapshot is not None]
+        latencies = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        return {
+            'accounts': len(self.accounts),
+            'reporting': len(snapshots),
+            'stale': sum(1 for snapshot in snapshots if snapshot['stale']),
+            'total_equity': sum(snapshot['total_equity'] for snapshot in snapshots),
+            'cash_balance': sum(snapshot['cash_balance'] for snapshot in snapshots),
+            'daily_change': sum(snapshot['daily_change'] for snapshot in snapshots),
+            'positions': sum(len(snapshot['positions']) for snapshot in snapshots),
+            'orders': sum(len(snapshot['orders']) for snapshot in snapshots),
+            'polls': self.polls,
+            'errors': self.errors,
+            'poll_p50_ms': float(np.percentile(latencies, 50)),
+            'poll_p99_ms': float(np.percentile(latencies, 99)),
+            'rate_share_per_minute': self.share,
+            'effective_interval': self.effective_interval
+        }
+
+    async def close(self):
+        """Stop polling, close every tracker and the shared session"""
+        self.stop()
+        for task in list(self._tasks):
+            task.cancel()
+        for account in self.accounts.values():
+            if account.tracker is not None:
+                await account.tracker.close()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+async def _main(path):
+    with open(path) as f:
+        accounts = json.load(f)
+    pool = TrackerPool()
+    for account in accounts:
+        pool.add_account(account['id'], account['api_key'], account['api_secret'],
+                         account.get('base_url', config.Config.ALPACA_BASE_URL))
+    runner = asyncio.create_task(pool.run())
+    try:
+        while True:
+            await asyncio.sleep(60)
+            print(json.dumps(pool.metrics()))
+    finally:
+        runner.cancel()
+        await pool.close()
+
+if __name__ == "__main__":
+    # accounts.json: [{"id": "paper-1", "api_key": "...", "api_secret": "...", "base_url": "..."}]
+    asyncio.run(_main(sys.argv[1] if len(sys.argv) > 1 else 'accounts.json'))
@@ -0,0 +1,116 @@
+import logging
+import queue
+import threading
+from datetime import datetime
+
+from utils.rate_limiter import RateLimiter
+
+# Records per second let through for each level; levels not listed are never capped
+DEFAULT_RATE_LIMITS = {
+    logging.DEBUG: 20,
+    logging.INFO: 50,
+    logging.WARNING: 50
+}
+
+class BatchingLogHandler(logging.Handler):
+    """
+    Logging handler that ships records in batches from a background thread.
+
+    emit() only checks the level's rate cap and puts the record on a bounded
+    queue, so logging threads never wait on the transport. Every interval
+    the flusher drains the queue and calls send once with a batch:
+
+        {'records': [{'timestamp', 'level', 'message'}, ...],
+         'dropped': {'INFO': 12}}
+
+    Records over their level's rate cap, over the queue size or over
+    max_batch are dropped and counted in 'dropped' instead.
+    """
+    def __init__(self, send, interval=0.25, max_batch=200, queue_size=10000, rate_limits=None):
+        """
+        Initialize handler
+        :param send: Callable taking one batch dict, e.g. lambda batch: socketio.emit('log_batch', batch)
+        :param interval: Seconds between batches
+        :param max_batch: Most records per batch; older records beyond it are dropped
+        :param queue_size: Most records waiting between batches
+        :param rate_limits: Records per second by level number, replacing DEFAULT_RATE_LIMITS
+        """
+        super().__init__()
+        self.send = send
+        self.interval = interval
+        self.max_batch = max_batch
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        limits = DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits
+        self._limiters = {level: RateLimiter(max_tokens=rate, refill_rate=rate) for level, rate in limits.items()}
+        self._dropped = {}
+        self._dropped_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='log-batcher', daemon=True)
+        self._thread.start()
+
+    def _drop(self, levelname, count=1):
+        with self._dropped_lock:
+            self._dropped[levelname] = self._dropped.get(levelname, 0) + count
+
+    def emit(self, record):
+        # Records logged while sending a batch would feed back into the next one
+        if threading.current_thread() is self._thread:
+            return
+        limiter = self._limiters.get(record.levelno)
+        if limiter is not None and not limiter.acquire(wait=False):
+            self._drop(record.levelname)
+            return
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._drop(record.levelname)
+
+    def _format_record(self, record):
+        return {
+            'timestamp': datetime.fromtimestamp(record.created).isoformat(),
+            'level': record.levelname,
+            'message': self.format(record)
+        }
+
+    def _take_batch(self):
+        records = []
+        while True:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        # Keep the newest records when a burst outgrows the batch
+        overflow = len(records) - self.max_batch
+        if overflow > 0:
+            for record in records[:overflow]:
+                self._drop(record.levelname)
+            records = records[overflow:]
+
+        with self._dropped_lock:
+            dropped, self._dropped = self._dropped, {}
+        if not records and not dropped:
+            return None
+        return {'records': [self._format_record(record) for record in records], 'dropped': dropped}
+
+    def flush(self):
+        """Send whatever is waiting now"""
+        batch = self._take_batch()
+        if batch is not None:
+            try:
+                self.send(batch)
+            except Exception:
+                # There is nowhere to log a failure to ship logs; drop the batch
+                pass
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def close(self):
+        """Stop the flusher and send the last batch"""
+        self._stop.set()
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join(timeout=self.interval * 4)
+        self.flush()
+        super().close()
@@ -37,33 +37,50 @@ class RateLimiter:
         if recent_errors > 5:  # If more than 5 errors in last minute
             self.tokens = min(self.tokens, self.max_tokens * 0.5)  # Reduce available tokens
     
-    def acquire(self, tokens=1, wait=True):
+    def acquire(self, tokens=1, wait=True, timeout=None):
         """
         Acquire tokens from the bucket
         :param tokens: Number of tokens to acquire
         :param wait: Whether to wait for tokens if not available
+        :param timeout: Longest time to wait in seconds, or None to wait as long as needed
         :return: True if tokens were acquired, False otherwise
         """
-        with self.lock:
-            self._refill()
-            
-            if self.tokens >= tokens:
-                self.tokens -= tokens
-                self.calls_history.append(time.time())
-                return True
-            elif not wait:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                self._refill()
+
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    self.calls_history.append(time.time())
+                    return True
+                elif not wait:
+                    return False
+
+                # Calculate wait time
+                needed = tokens - self.tokens
+                wait_time = (needed / self.refill_rate) * self.refill_period
+
+            if wait_time <= 0:
                 return False
-            
-            # Calculate wait time
-            needed = tokens - self.tokens
-            wait_time = (needed / self.refill_rate) * self.refill_period
-            
-            if wait_time > 0:
-                time.sleep(wait_time)
-                return self.acquire(tokens, wait)  # Try again after waiting
-            
-            return False
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if wait_time > remaining:
+                    # The token will not be in before the deadline, so do not wait for it
+                    return False
+            # Sleep without the lock so other callers are not blocked, then try again
+            time.sleep(wait_time)
     
+    def wait_time(self, tokens=1):
+        """
+        Seconds until tokens would be available, without taking them
+        :param tokens: Number of tokens wanted
+        :return: 0 if they are available now
+        """
+        with self.lock:
+            self._refill()
+            return max(0.0, (tokens - self.tokens) / self.refill_rate * self.refill_period)
+
     def record_error(self):
         """Record an error occurrence"""
         with self.lock:
@@ -0,0 +1,313 @@
+import asyncio
+import random
+import socket
+import time
+from threading import Lock
+
+import requests
+from alpaca_trade_api.rest import APIError, RetryException
+
+# Error classes, and which of them are worth retrying / count against the circuit
+RATE_LIMITED = 'rate_limited'
+CLIENT_ERROR = 'client_error'
+SERVER_ERROR = 'server_error'
+TIMEOUT = 'timeout'
+NETWORK = 'network'
+UNKNOWN = 'unknown'
+
+RETRYABLE = (RATE_LIMITED, SERVER_ERROR, TIMEOUT, NETWORK, UNKNOWN)
+CIRCUIT_FAILURES = (SERVER_ERROR, TIMEOUT, NETWORK, UNKNOWN)
+
+def endpoint_key(base_url, endpoint):
+    """
+    Circuit name for an API endpoint, the same for every caller of a shared executor
+    :param base_url: API root, with or without a trailing /v2
+    :param endpoint: Path under /v2, e.g. 'account' or 'stocks/bars'
+    :return: e.g. 'https://paper-api.alpaca.markets/v2/account'
+    """
+    return f"{str(base_url).rstrip('/').removesuffix('/v2')}/v2/{endpoint}"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open"""
+    def __init__(self, endpoint, retry_after):
+        super().__init__(f"Circuit open for {endpoint}; retry in {retry_after:.1f}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+class DeadlineExceeded(Exception):
+    """Raised when the next attempt could not start before the call's deadline"""
+
+def _status_from_code(code):
+    """Alpaca error codes are the HTTP status followed by detail digits: 40310000 -> 403"""
+    if not isinstance(code, int) or code < 100:
+        return None
+    while code >= 1000:
+        code //= 10
+    return code
+
+def _classify_status(status):
+    if status == 429:
+        return RATE_LIMITED
+    if status == 408 or status >= 500:
+        return SERVER_ERROR
+    if 400 <= status < 500:
+        return CLIENT_ERROR
+    return UNKNOWN
+
+def classify_error(error):
+    """
+    Classify an exception from an API call by its type and status code
+    :param error: The exception
+    :return: One of RATE_LIMITED, CLIENT_ERROR, SERVER_ERROR, TIMEOUT, NETWORK or UNKNOWN
+    """
+    if isinstance(error, RetryException):
+        return RATE_LIMITED
+    if isinstance(error, APIError):
+        status = error.status_code or _status_from_code(error.code)
+        return _classify_status(status) if status else UNKNOWN
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return _classify_status(error.response.status_code)
+    if isinstance(error, (requests.Timeout, socket.timeout, asyncio.TimeoutError, TimeoutError)):
+        return TIMEOUT
+    if isinstance(error, (requests.ConnectionError, ConnectionError)):
+        return NETWORK
+    try:
+        import aiohttp
+        if isinstance(error, aiohttp.ClientResponseError):
+            return _classify_status(error.status)
+        if isinstance(error, aiohttp.ClientConnectionError):
+            return NETWORK
+    except ImportError:
+        pass
+    return UNKNOWN
+
+class CircuitBreaker:
+    """Per-endpoint circuit breaker: closed, open after repeated failures, half-open to probe"""
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        """
+        Initialize circuit breaker
+        :param failure_threshold: Consecutive failures that open the circuit
+        :param reset_timeout: Seconds the circuit stays open before one probe call is let through
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = float(reset_timeout)
+
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = Lock()
+
+    @property
+    def state(self):
+        with self.lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return 'open'
+            return 'half_open'
+
+    def allow(self):
+        """
+        Check whether a call may go ahead; while half-open the call that is let
+        through becomes the probe, and must end in record_success, record_failure
+        or release_probe
+        :return: (retry_after, probe): retry_after is 0 if the call may go ahead,
+            otherwise seconds until the next probe is allowed; probe is True for the probe call
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return 0, False
+            remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+            if remaining > 0:
+                return remaining, False
+            if self.probing:
+                return 0.1, False  # One probe at a time while half-open
+            self.probing = True
+            return 0, True
+
+    def release_probe(self):
+        """Give up the probe without a verdict, e.g. when the probe call was cancelled"""
+        with self.lock:
+            self.probing = False
+
+    def record_success(self, probe=False):
+        """
+        Record an answer from the endpoint
+        :param probe: Whether the call was the half-open probe; while the circuit is
+            open only the probe's answer closes it, not one from a call started earlier
+        """
+        with self.lock:
+            if self.opened_at is not None and not probe:
+                return
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                # A failed probe re-opens the circuit for another reset_timeout
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+class RetryExecutor:
+    """
+    Shared policy for calling the API: one rate-limit token per logical call,
+    jittered exponential back-off between attempts, a per-call deadline that no
+    retry may run past, and a circuit breaker per endpoint that fails fast
+    while the endpoint is down.
+    """
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=8.0, failure_threshold=5, reset_timeout=30.0):
+        """
+        Initialize retry executor
+        :param max_attempts: Attempts per call, including the first
+        :param base_delay: Back-off before the first retry, doubled for each one after
+        :param max_delay: Upper bound on any single back-off
+        :param failure_threshold: Consecutive failures that open an endpoint's circuit
+        :param reset_timeout: Seconds an open circuit waits before probing again
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.breakers = {}
+        self.lock = Lock()
+
+    def breaker(self, endpoint):
+        """Get the circuit breaker for an endpoint, creating it on first use"""
+        with self.lock:
+            breaker = self.breakers.get(endpoint)
+            if breaker is None:
+                breaker = self.breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def backoff(self, attempt, base_delay=None, max_delay=None):
+        """
+        Back-off before retry number attempt (0-based), with equal jitter
+        :return: Seconds, between half and all of the capped exponential delay
+        """
+        base_delay = self.base_delay if base_delay is None else base_delay
+        max_delay = self.max_delay if max_delay is None else max_delay
+        delay = min(base_delay * (2 ** attempt), max_delay)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _take_token(self, endpoint, limiter, deadline):
+        """Take one rate-limit token for the call, waiting for it until the deadline"""
+        if limiter is not None:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not limiter.acquire(tokens=1, wait=True, timeout=timeout):
+                raise DeadlineExceeded(f"No {endpoint} rate-limit token before the deadline")
+
+    async def _take_token_async(self, endpoint, limiter, deadline):
+        """Take one rate-limit token for the call, sleeping on the event loop until the deadline"""
+        if limiter is None:
+            return
+        while not limiter.acquire(tokens=1, wait=False):
+            wait_time = max(limiter.wait_time(), 0.01)
+            if deadline is not None and time.monotonic() + wait_time > deadline:
+                # The token will not be in before the deadline, so do not wait for it
+                raise DeadlineExceeded(f"No {endpoint} rate-limit token before the deadline")
+            await asyncio.sleep(wait_time)
+
+    def _open(self, endpoint):
+        """
+        Check the endpoint's circuit once the call holds its token
+        :return: (breaker, probe), probe being True if this call is the half-open probe
+        """
+        breaker = self.breaker(endpoint)
+        retry_after, probe = breaker.allow()
+        if retry_after:
+            raise CircuitOpenError(endpoint, retry_after)
+        return breaker, probe
+
+    def _after_error(self, error, endpoint, breaker, probe, limiter, attempt, attempts, deadline, base_delay,
+                     max_delay):
+        """
+        Decide what follows a failed attempt
+        :param probe: Whether this call is the breaker's half-open probe
+        :return: Seconds to wait before the next attempt; raises when there is none
+        """
+        kind = classify_error(error)
+        if kind in CIRCUIT_FAILURES:
+            breaker.record_failure()
+        elif probe:
+            # The endpoint answered the probe, so it is up even if the request was refused
+            breaker.record_success(probe)
+        if kind == RATE_LIMITED and limiter is not None:
+            limiter.record_error()
+        error.error_class = kind
+
+        if kind not in RETRYABLE or attempt + 1 >= attempts:
+            raise error
+        if breaker.state == 'open':
+            raise error
+        delay = self.backoff(attempt, base_delay, max_delay)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            raise error
+        return delay
+
+    def call(self, endpoint, func, args=(), kwargs=None, timeout=None, attempts=None, limiter=None,
+             base_delay=None, max_delay=None):
+        """
+        Call func with retries under the executor's policy
+        :param endpoint: Name of the circuit to use, e.g. 'account'
+        :param func: Blocking callable making the request
+        :param args: Positional arguments for func
+        :param kwargs: Keyword arguments for func
+        :param timeout: Seconds from now after which no further attempt starts
+        :param attempts: Override max_attempts for this call
+        :param limiter: RateLimiter to take one token from for the whole call
+        :param base_delay: Override base_delay for this call
+        :param max_delay: Override max_delay for this call
+        :return: What func returns; the last error is raised once retries run out
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        attempts = self.max_attempts if attempts is None else attempts
+        self._take_token(endpoint, limiter, deadline)
+        breaker, probe = self._open(endpoint)
+        try:
+            for attempt in range(attempts):
+                try:
+                    result = func(*args, **(kwargs or {}))
+                except Exception as e:
+                    time.sleep(self._after_error(e, endpoint, breaker, probe, limiter, attempt, attempts,
+                                                 deadline, base_delay, max_delay))
+                    continue
+                breaker.record_success(probe)
+                return result
+        finally:
+            if probe:
+                # However the probe ended, let the next call probe if this one gave no verdict
+                breaker.release_probe()
+
+    async def call_async(self, endpoint, func, args=(), kwargs=None, timeout=None, attempts=None, limiter=None,
+                         base_delay=None, max_delay=None):
+        """
+        Coroutine version of call: func is a coroutine function, and both the
+        rate-limit token and back-off are waited for with asyncio.sleep
+        :return: What func returns; the last error is raised once retries run out
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        attempts = self.max_attempts if attempts is None else attempts
+        await self._take_token_async(endpoint, limiter, deadline)
+        breaker, probe = self._open(endpoint)
+        try:
+            for attempt in range(attempts):
+                try:
+                    result = await func(*args, **(kwargs or {}))
+                except Exception as e:
+                    await asyncio.sleep(self._after_error(e, endpoint, breaker, probe, limiter, attempt, attempts,
+                                                          deadline, base_delay, max_delay))
+                    continue
+                breaker.record_success(probe)
+                return result
+        finally:
+            if probe:
+                # Also covers cancellation, which is not an Exception
+                breaker.release_probe()
+
+# Executor shared by every tracker, so circuits reflect the API as a whole
+API_EXECUTOR = RetryExecutor()
@@ -0,0 +1,137 @@
+import asyncio
+import time
+from concurrent.futures import Future
+from threading import Lock
+
+class SnapshotCache:
+    """Single-flight TTL cache around a blocking loader"""
+    def __init__(self, loader, ttl=2.0):
+        """
+        Initialize snapshot cache
+        :param loader: Zero-argument callable that fetches a fresh value
+        :param ttl: Seconds a loaded value is served before loading again; 0 disables caching
+        """
+        self.loader = loader
+        self.ttl = float(ttl)
+
+        self.value = None
+        self.loaded_at = None
+        self.lock = Lock()
+        self._in_flight = None
+
+        # Counters for monitoring how many loads the cache saved
+        self.hits = 0
+        self.loads = 0
+        self.coalesced = 0
+
+    def _fresh(self, now, max_age):
+        max_age = self.ttl if max_age is None else max_age
+        return self.loaded_at is not None and now - self.loaded_at < max_age
+
+    def get(self, max_age=None):
+        """
+        Get the cached value, loading it if it is older than the TTL
+        :param max_age: Override the TTL for this call
+        :return: The cached or freshly loaded value
+
+        Concurrent callers that miss the cache share one call to the loader
+        instead of each making their own. A None result or an exception is
+        passed to every waiting caller but is not cached.
+        """
+        leader = False
+        with self.lock:
+            if self._fresh(time.monotonic(), max_age):
+                self.hits += 1
+                return self.value
+            future = self._in_flight
+            if future is not None:
+                self.coalesced += 1
+            else:
+                future = self._in_flight = Future()
+                self.loads += 1
+                leader = True
+        if not leader:
+            return future.result()
+
+        try:
+            value = self.loader()
+        except BaseException as e:
+            with self.lock:
+                self._in_flight = None
+            future.set_exception(e)
+            raise
+        with self.lock:
+            if value is not None:
+                self.value = value
+                self.loaded_at = time.monotonic()
+            self._in_flight = None
+        future.set_result(value)
+        return value
+
+    def peek(self):
+        """
+        Get the last loaded value without loading
+        :return: The value, or None if nothing was loaded yet
+        """
+        with self.lock:
+            return self.value
+
+    def invalidate(self):
+        """Force the next get to load, without dropping the value for peek"""
+        with self.lock:
+            self.loaded_at = None
+
+class AsyncSnapshotCache:
+    """Single-flight TTL cache around a coroutine loader, for one event loop"""
+    def __init__(self, loader, ttl=2.0):
+        """
+        Initialize snapshot cache
+        :param loader: Zero-argument coroutine function that fetches a fresh value
+        :param ttl: Seconds a loaded value is served before loading again; 0 disables caching
+        """
+        self.loader = loader
+        self.ttl = float(ttl)
+
+        self.value = None
+        self.loaded_at = None
+        self._in_flight = None
+
+        self.hits = 0
+        self.loads = 0
+        self.coalesced = 0
+
+    async def get(self, max_age=None):
+        """
+        Get the cached value, loading it if it is older than the TTL
+        :param max_age: Override the TTL for this call
+        :return: The cached or freshly loaded value
+        """
+        max_age = self.ttl if max_age is None else max_age
+        if self.loaded_at is not None and time.monotonic() - self.loaded_at < max_age:
+            self.hits += 1
+            return self.value
+        if self._in_flight is not None and not self._in_flight.done():
+            self.coalesced += 1
+        else:
+            self.loads += 1
+            self._in_flight = asyncio.ensure_future(self._load())
+        # Shield the load so one cancelled caller does not cancel it for the others
+        return await asyncio.shield(self._in_flight)
+
+    async def _load(self):
+        value = await self.loader()
+        if value is not None:
+            self.value = value
+            self.loaded_at = time.monotonic()
+        return value
+
+    def peek(self):
+        """
+        Get the last loaded value without loading
+        :return: The value, or None if nothing was loaded yet
+        """
+        return self.value
+
+    def invalidate(self):
+        """Force the next get to load, without dropping the value for peek"""
+        self.loaded_at = None